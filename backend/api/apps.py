@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Keeps the search index in sync with File, Curriculum and LessonPlan saves
+        from . import signals  # noqa: F401
@@ -0,0 +1,19 @@
+import logging
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+def log_event(file_id, user, action, changed_fields=None):
+    """Record one audit event with a single INSERT; the File row is never touched."""
+    return AuditEvent.objects.create(
+        file_id=file_id,
+        user=user,
+        action=action,
+        changed_fields=changed_fields or []
+    )
+
+
+def build_event(file_id, user, action, changed_fields=None):
+    """Unsaved AuditEvent for bulk_create."""
+    return AuditEvent(file_id=file_id, user=user, action=action, changed_fields=changed_fields or [])
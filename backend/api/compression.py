@@ -0,0 +1,81 @@
+import gzip
+import logging
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+
+def accepted_encodings(header):
+    """Codings the client accepts (q > 0), from an Accept-Encoding header."""
+    accepted = set()
+    for item in (header or '').lower().split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip())
+    return accepted
+
+
+def choose_encoding(header):
+    """'br' when brotli is installed and accepted, else 'gzip' if accepted, else None."""
+    accepted = accepted_encodings(header)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'RESPONSE_COMPRESSION_BROTLI_QUALITY', 4))
+    return gzip.compress(content, compresslevel=getattr(settings, 'RESPONSE_COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Brotli or gzip compression for text and JSON responses of at least
+    RESPONSE_COMPRESSION_MIN_SIZE bytes, negotiated on Accept-Encoding.
+
+    Streaming responses (generation events, media files) are left alone so
+    they are neither buffered nor delayed.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+        if len(response.content) < getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The bytes differ per coding, so a strong ETag must become weak (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
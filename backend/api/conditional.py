@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import time
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'collection_version:'
+PENDING_ATTR = '_pending_collection_versions'
+
+
+def _version_key(scope):
+    return VERSION_KEY + ':'.join(str(part) for part in scope)
+
+
+def _new_version():
+    # A random token rather than a counter, so an evicted key can never bring an old ETag back
+    return uuid.uuid4().hex, time.time()
+
+
+def collection_versions(*scopes):
+    """(token, changed-at timestamp) for each collection scope, e.g. ('curriculums', profile.id)."""
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key) or _new_version()
+    return [versions[key] for key in keys]
+
+
+class _PendingVersions:
+    """Collection scopes touched in the current transaction, bumped together once it commits."""
+
+    def __init__(self):
+        self.keys = set()
+        self.flushed = False
+
+    def flush(self):
+        self.flushed = True
+        cache.set_many({key: _new_version() for key in self.keys}, None)
+
+
+def touch_collection(*scope):
+    """
+    Give a collection a new version once the current transaction commits.
+
+    Readers take the version before querying, so a reader racing the commit
+    can only pair an old version with new rows (one extra 200), never the
+    new version with old rows (a 304 for stale data). Each scope is bumped
+    at most once per transaction, however many rows change in it.
+    """
+    key = _version_key(scope)
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        cache.set(key, _new_version(), None)
+        return
+    pending = getattr(connection, PENDING_ATTR, None)
+    # A rolled-back transaction or savepoint discards the callback, and a flushed batch is done;
+    # start a new batch then
+    if pending is None or pending.flushed or not any(entry[1] == pending.flush for entry in connection.run_on_commit):
+        pending = _PendingVersions()
+        setattr(connection, PENDING_ATTR, pending)
+        transaction.on_commit(pending.flush)
+    pending.keys.add(key)
+
+
+def watermark(queryset, field):
+    """(row count, latest `field`) of a queryset; the count catches deletes the timestamp cannot."""
+    values = queryset.order_by().aggregate(count=Count('id'), latest=Max(field))
+    return values['count'], values['latest']
+
+
+def model_fingerprint(instance):
+    """Digest of a model instance's stored field values, for objects served from a cache."""
+    values = [(field.attname, field.value_to_string(instance)) for field in instance._meta.concrete_fields]
+    return hashlib.sha256(repr(values).encode('utf-8')).hexdigest()[:16]
+
+
+def response_validators(request, scopes=(), watermark=None, parts=()):
+    """
+    (ETag, Last-Modified timestamp or None) for the response `request` would get.
+
+    The ETag covers the collection versions, the optional (count, latest)
+    watermark, any extra `parts` and the full path and negotiated media type,
+    so each page, filter and renderer validates separately.
+    """
+    versions = collection_versions(*scopes) if scopes else []
+    times = [changed_at for _, changed_at in versions]
+    if watermark is not None and watermark[1] is not None:
+        times.append(watermark[1].timestamp())
+    payload = [
+        [token for token, _ in versions],
+        [str(value) for value in watermark or ()],
+        [str(part) for part in parts],
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', ''),
+    ]
+    digest = hashlib.sha256(repr(payload).encode('utf-8')).hexdigest()[:32]
+    return f'"{digest}"', (int(max(times)) if times else None)
+
+
+def _apply(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Clients may keep a copy but must revalidate it every time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response when the client's copy matches, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return _apply(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    if response.status_code == 200:
+        _apply(response, etag, last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    For generic views: answer GET with 304 when the client's ETag still
+    matches the `version_scopes` collections, before any query or serializer runs.
+    """
+    version_scopes = ()
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = response_validators(request, self.version_scopes)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return with_validators(super().get(request, *args, **kwargs), etag, last_modified)
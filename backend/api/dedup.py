@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import random
+import re
+import zlib
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from .models import Question, QuestionBucket
+
+logger = logging.getLogger(__name__)
+
+# Changing these invalidates every stored signature; rerun `manage.py question_duplicates --reindex`.
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 5
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def duplicate_threshold():
+    return getattr(settings, 'QUESTION_DUPLICATE_THRESHOLD', 0.8)
+
+
+def shingles(text):
+    """Character 5-grams of the lower-cased, punctuation-free text."""
+    text = ' '.join(re.sub(r'[^\w\s]', '', str(text).lower()).split())
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """MinHash signature of `text` (NUM_PERMUTATIONS ints), or None for empty text."""
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    if not signature or not other or len(signature) != len(other):
+        return 0.0
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+
+def band_keys(signature):
+    """
+    One 64-bit key per LSH band. Two questions share a key when a whole band of
+    their signatures is equal, which is likely only for similar texts.
+    """
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    keys = []
+    for band in range(LSH_BANDS):
+        chunk = signature[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(repr((band, chunk)).encode('utf-8'), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def index_questions(questions, replace=False):
+    """
+    Store LSH buckets for saved questions and flag near-duplicates.
+
+    Candidates come from one lookup on the bucket index, so cost grows with the
+    number of similar questions rather than the bank size. A question is only
+    flagged as a duplicate of an older one (lower id). With `replace`, existing
+    buckets and flags are recomputed (for edited questions), and so are the
+    flags of questions marked as their duplicates. Questions copied from the
+    question bank are reused on purpose: they get no buckets and are never
+    flagged. Returns the questions that are flagged.
+    """
+    reused = [q for q in questions if q.pk is not None and q.bank_question_id]
+    questions = [q for q in questions if q.pk is not None and not q.bank_question_id]
+    if replace and reused:
+        QuestionBucket.objects.filter(question__in=reused).delete()
+        Question.objects.filter(id__in=[q.id for q in reused]).exclude(duplicate_of=None) \
+            .update(duplicate_of=None, duplicate_score=None)
+    if not questions:
+        return []
+    threshold = duplicate_threshold()
+    with transaction.atomic():
+        keys_by_question = {q.id: band_keys(q.minhash) for q in questions if q.minhash}
+        if replace:
+            QuestionBucket.objects.filter(question__in=questions).delete()
+            dependents = list(Question.objects.filter(duplicate_of__in=questions, bank_question=None)
+                              .exclude(id__in=[q.id for q in questions])
+                              .only('id', 'minhash', 'duplicate_of', 'duplicate_score', 'bank_question'))
+        QuestionBucket.objects.bulk_create([
+            QuestionBucket(question_id=question_id, key=key)
+            for question_id, keys in keys_by_question.items() for key in keys
+        ])
+        if replace and dependents:
+            questions = questions + dependents
+            keys_by_question.update({q.id: band_keys(q.minhash) for q in dependents if q.minhash})
+
+        all_keys = {key for keys in keys_by_question.values() for key in keys}
+        bucket_members = defaultdict(set)
+        if all_keys:
+            for key, question_id in QuestionBucket.objects.filter(key__in=all_keys).values_list('key', 'question_id'):
+                bucket_members[key].add(question_id)
+        candidates = {
+            question_id: {other for key in keys for other in bucket_members[key] if other < question_id}
+            for question_id, keys in keys_by_question.items()
+        }
+        candidate_ids = set().union(*candidates.values()) if candidates else set()
+        signatures = dict(Question.objects.filter(id__in=candidate_ids).order_by().values_list('id', 'minhash'))
+
+        changed = []
+        flagged = []
+        for question in questions:
+            best_id, best_score = None, 0.0
+            for other in candidates.get(question.id, ()):
+                score = similarity(question.minhash, signatures.get(other))
+                if score >= threshold and score > best_score:
+                    best_id, best_score = other, score
+            if best_id is not None:
+                flagged.append(question)
+            if (best_id, best_score if best_id else None) != (question.duplicate_of_id, question.duplicate_score):
+                question.duplicate_of_id = best_id
+                question.duplicate_score = round(best_score, 4) if best_id else None
+                changed.append(question)
+        if changed:
+            Question.objects.bulk_update(changed, ['duplicate_of', 'duplicate_score'])
+    if flagged:
+        logger.info(f"Flagged {len(flagged)} near-duplicate question(s)")
+    return flagged
+
+
+def duplicate_clusters(threshold=None):
+    """
+    Near-duplicate groups across the whole question bank, largest first.
+
+    Only questions sharing at least one LSH bucket are compared, so the work is
+    proportional to the number of candidate pairs, not the square of the bank.
+    Returns a list of (question ids, lowest pairwise-link score) tuples.
+    """
+    threshold = duplicate_threshold() if threshold is None else threshold
+    shared = QuestionBucket.objects.values('key').annotate(members=Count('id')).filter(members__gt=1).values('key')
+    groups = defaultdict(list)
+    for key, question_id in QuestionBucket.objects.filter(key__in=shared).values_list('key', 'question_id').iterator():
+        groups[key].append(question_id)
+
+    pairs = set()
+    for members in groups.values():
+        members = sorted(set(members))
+        pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+    if not pairs:
+        return []
+
+    ids = {question_id for pair in pairs for question_id in pair}
+    signatures = dict(Question.objects.filter(id__in=ids).order_by().values_list('id', 'minhash').iterator())
+    parent = {question_id: question_id for question_id in ids}
+    link_score = {}
+
+    def find(question_id):
+        while parent[question_id] != question_id:
+            parent[question_id] = parent[parent[question_id]]
+            question_id = parent[question_id]
+        return question_id
+
+    for a, b in pairs:
+        score = similarity(signatures.get(a), signatures.get(b))
+        if score >= threshold:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+            link_score[a] = min(link_score.get(a, 1.0), score)
+            link_score[b] = min(link_score.get(b, 1.0), score)
+
+    clusters = defaultdict(list)
+    for question_id in link_score:
+        clusters[find(question_id)].append(question_id)
+    return sorted(
+        ((sorted(members), min(link_score[m] for m in members)) for members in clusters.values()),
+        key=lambda cluster: (-len(cluster[0]), cluster[0][0])
+    )
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, ExpressionWrapper, IntegerField, Min, Q, Value, When
+from django.db.models.functions import Lower
+from .models import File
+from .conditional import collection_versions
+from .file_access import readable_by
+from .file_filters import FACET_FIELDS, FILTER_PARAMS, apply_common_filters, dimension_filters
+
+logger = logging.getLogger(__name__)
+
+
+def facets_version():
+    """
+    The 'files' collection version token. It changes, once per committed
+    transaction, whenever a file, its grants or its tags change, so every
+    cached facet count is dropped without a version key of its own.
+    """
+    return collection_versions(('files',))[0][0]
+
+
+def _cache_key(params, user_role):
+    relevant = {key: params.get(key) for key in FILTER_PARAMS if params.get(key)}
+    digest = hashlib.sha256(json.dumps([user_role, relevant], sort_keys=True).encode('utf-8')).hexdigest()
+    return f'file_facets:{facets_version()}:{digest}'
+
+
+def compute_facets(params, user_role):
+    """
+    Per-value counts for every facet dimension in one grouped query.
+
+    Each dimension is counted with all other active filters applied but not its
+    own, so the sidebar shows what selecting another value would return. Rows
+    failing two or more active filters are excluded in SQL; the rest are grouped
+    and the per-dimension counts are summed in Python.
+
+    Values are grouped case-insensitively, like the __iexact listing filters, so
+    'Math' and 'math' are one facet labelled with one of the stored spellings.
+    """
+    active = dimension_filters(params)
+    files = readable_by(apply_common_filters(File.objects.all(), params), user_role)
+    flags = {
+        f'match_{field}': ExpressionWrapper(Q(**{f'{field}__iexact': value}), output_field=BooleanField())
+        for field, value in active.items()
+    }
+    if active:
+        misses = Value(0, output_field=IntegerField())
+        for field, value in active.items():
+            misses = misses + Case(When(Q(**{f'{field}__iexact': value}), then=Value(0)), default=Value(1),
+                                   output_field=IntegerField())
+        files = files.annotate(misses=misses).filter(misses__lte=1).annotate(**flags)
+
+    keys = {f'key_{field}': Lower(field) for field in FACET_FIELDS}
+    labels = {f'label_{field}': Min(field) for field in FACET_FIELDS}
+    rows = files.values(*flags, **keys).annotate(count=Count('id'), **labels).order_by()
+    counts = {field: Counter() for field in FACET_FIELDS}
+    names = {field: {} for field in FACET_FIELDS}
+    total = 0
+    for row in rows:
+        failed = [field for field in active if not row[f'match_{field}']]
+        if not failed:
+            total += row['count']
+        for field in FACET_FIELDS:
+            key = row[f'key_{field}']
+            if key and (not failed or failed == [field]):
+                label = names[field].setdefault(key, row[f'label_{field}'])
+                counts[field][label] += row['count']
+
+    return {
+        'total': total,
+        'facets': {
+            field: [{'value': value, 'count': count}
+                    for value, count in sorted(counter.items(), key=lambda item: (-item[1], item[0]))]
+            for field, counter in counts.items()
+        }
+    }
+
+
+def file_facets(params, user_role):
+    """Cached compute_facets; returns (facets, cache_hit)."""
+    key = _cache_key(params, user_role)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+    facets = compute_facets(params, user_role)
+    cache.set(key, facets, getattr(settings, 'FILE_FACETS_CACHE_TTL', 300))
+    return facets, False
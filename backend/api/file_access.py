@@ -0,0 +1,45 @@
+import logging
+from django.db import transaction
+from .models import FilePermission
+
+logger = logging.getLogger(__name__)
+
+
+def permission_rows(file_id, permissions):
+    """Unsaved FilePermission rows mirroring a File.permissions dict."""
+    rows = []
+    for role, actions in (permissions or {}).items():
+        if not isinstance(actions, dict):
+            continue
+        rows.append(FilePermission(
+            file_id=file_id,
+            role=str(role)[:50],
+            can_read=bool(actions.get('read', False)),
+            can_write=bool(actions.get('write', False)),
+            can_delete=bool(actions.get('delete', False)),
+        ))
+    return rows
+
+
+def sync_permissions(file):
+    """
+    Replace the FilePermission rows of `file` with its current permissions JSON.
+
+    Call it in the transaction that saved `file`: the File post_save signal
+    bumps the 'files' collection version when that transaction commits.
+    """
+    with transaction.atomic():
+        FilePermission.objects.filter(file_id=file.id).delete()
+        FilePermission.objects.bulk_create(permission_rows(file.id, file.permissions))
+
+
+def readable_by(queryset, user_role):
+    """
+    Restrict a File queryset to files `user_role` may read.
+
+    Joins the (role, can_read, file) index instead of scanning permissions JSON;
+    the unique (file, role) constraint keeps the join from duplicating files.
+    """
+    if user_role == 'Admin':
+        return queryset
+    return queryset.filter(permission_grants__role=user_role, permission_grants__can_read=True)
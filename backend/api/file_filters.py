@@ -0,0 +1,38 @@
+import logging
+from django.utils import timezone
+from .models import File
+from .file_access import readable_by
+from .tagging import parse_tags, filter_by_tags
+
+logger = logging.getLogger(__name__)
+
+# FileManager sidebar dimensions, matched case-insensitively
+FACET_FIELDS = ['type', 'uploaded_by', 'course', 'department', 'semester', 'subject', 'class_name', 'category']
+# Every query param that changes which files a listing returns
+FILTER_PARAMS = FACET_FIELDS + ['date_range', 'tag', 'tags', 'tag_match']
+
+
+def dimension_filters(params):
+    """{field: value} for the facet dimensions present in `params`."""
+    return {key: params.get(key) for key in FACET_FIELDS if params.get(key)}
+
+
+def apply_common_filters(queryset, params):
+    """Filters that are not facet dimensions: date range and tags."""
+    date_range = params.get('date_range')
+    if date_range == '7days':
+        queryset = queryset.filter(date__gte=timezone.now().date() - timezone.timedelta(days=7))
+    elif date_range == '30days':
+        queryset = queryset.filter(date__gte=timezone.now().date() - timezone.timedelta(days=30))
+    # ?tag=a (single) or ?tags=a,b with ?tag_match=all for AND (default OR)
+    tags = parse_tags(params.get('tags')) + parse_tags(params.get('tag'))
+    if tags:
+        queryset = filter_by_tags(queryset, tags, params.get('tag_match') == 'all')
+    return queryset
+
+
+def filtered_files(params, user_role):
+    """Files readable by `user_role` that match every listing filter in `params`."""
+    filters = {f'{key}__iexact': value for key, value in dimension_filters(params).items()}
+    queryset = apply_common_filters(File.objects.filter(**filters), params)
+    return readable_by(queryset, user_role)
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import logging
+import posixpath
+from django.conf import settings
+from django.core.files.base import ContentFile
+from .models import Profile, GenerationJob
+from .profile_cache import invalidate_profile
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> longest side in pixels. Thumbnails are cropped square for avatars.
+DEFAULT_VARIANTS = {'thumbnail': 128, 'medium': 512}
+SQUARE_VARIANTS = {'thumbnail'}
+VARIANT_DIR = 'profile_images/variants'
+
+
+class ImageProcessingError(Exception):
+    """Raised when an uploaded profile image cannot be decoded."""
+
+
+def variant_sizes():
+    return getattr(settings, 'PROFILE_IMAGE_VARIANTS', DEFAULT_VARIANTS)
+
+
+def _quality():
+    return getattr(settings, 'PROFILE_IMAGE_QUALITY', 82)
+
+
+def _load(storage, name, longest):
+    # Pillow is imported only where images are decoded and encoded, so views can
+    # queue processing without loading it
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    with storage.open(name, 'rb') as source:
+        try:
+            image = Image.open(source)
+            # Let the JPEG decoder scale down while decoding instead of inflating a 12MP photo
+            image.draft('RGB', (longest * 2, longest * 2))
+            image.load()
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+            raise ImageProcessingError(f"Cannot read image {name}: {str(e)}")
+    return ImageOps.exif_transpose(image)
+
+
+def _encode(image, fmt):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    if fmt == 'JPEG':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.convert('RGB').save(buffer, 'JPEG', quality=_quality(), optimize=True, progressive=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+        image.save(buffer, 'WEBP', quality=_quality(), method=4)
+    return buffer.getvalue()
+
+
+def render_variants(image):
+    """Encode every variant of `image`; returns {name: (extension, bytes)}."""
+    from PIL import Image, ImageOps
+
+    rendered = {}
+    for name, size in variant_sizes().items():
+        if name in SQUARE_VARIANTS:
+            resized = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        rendered[name] = ('jpg', _encode(resized, 'JPEG'))
+        rendered[f'{name}_webp'] = ('webp', _encode(resized, 'WEBP'))
+    return rendered
+
+
+def variant_name(profile_id, variant, extension, content):
+    # Named after the content, so a URL never changes meaning and can be cached forever
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return posixpath.join(VARIANT_DIR, str(profile_id), f'{digest}-{variant}.{extension}')
+
+
+def delete_variants(storage, variants, keep=()):
+    for name in set((variants or {}).values()) - set(keep):
+        try:
+            storage.delete(name)
+        except OSError as e:
+            logger.warning(f"Could not delete profile image variant {name}: {str(e)}")
+
+
+def process_profile_image(profile_id):
+    """
+    Write the resized variants of a profile's current image and record them.
+
+    The profile row is only updated if the image has not been replaced while
+    processing; otherwise the new variants are discarded and the job queued for
+    the newer image does the work. Returns the variant names, or None when the
+    profile has no image.
+    """
+    profile = Profile.objects.only('id', 'uid', 'profile_image', 'image_variants').get(id=profile_id)
+    if not profile.profile_image:
+        return None
+    storage = profile.profile_image.storage
+    source_name = profile.profile_image.name
+    image = _load(storage, source_name, max(variant_sizes().values()))
+
+    variants = {}
+    for variant, (extension, content) in render_variants(image).items():
+        name = variant_name(profile.id, variant, extension, content)
+        if not storage.exists(name):
+            storage.save(name, ContentFile(content))
+        variants[variant] = name
+
+    updated = Profile.objects.filter(id=profile.id, profile_image=source_name).update(image_variants=variants)
+    if not updated:
+        delete_variants(storage, variants, keep=profile.image_variants.values())
+        logger.info(f"Profile {profile.uid} image changed during processing, discarding variants")
+        return None
+    delete_variants(storage, profile.image_variants, keep=variants.values())
+    invalidate_profile(profile.uid)
+    logger.info(f"Processed profile image for {profile.uid} into {len(variants)} variant(s)")
+    return variants
+
+
+def enqueue_profile_image(profile):
+    """Queue variant generation for the run_generation_worker, once per profile."""
+    pending = GenerationJob.objects.filter(user=profile, kind='profile_image', status='pending').first()
+    return pending or GenerationJob.objects.create(user=profile, kind='profile_image', use_cache=False)
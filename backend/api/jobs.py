@@ -0,0 +1,71 @@
+import logging
+from datetime import timedelta
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from .models import GenerationJob
+from .generation import run_generation
+from .images import process_profile_image
+
+logger = logging.getLogger(__name__)
+
+
+def claim_jobs(limit):
+    """
+    Atomically move up to `limit` pending jobs to running and return their ids.
+
+    Each job is claimed with a conditional UPDATE, so several workers can poll
+    the same table without handing out a job twice.
+    """
+    claimed = []
+    if limit <= 0:
+        return claimed
+    candidates = (GenerationJob.objects.filter(status='pending')
+                  .order_by('created_at')
+                  .values_list('id', flat=True)[:limit * 2])
+    for job_pk in candidates:
+        updated = GenerationJob.objects.filter(id=job_pk, status='pending').update(
+            status='running',
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1
+        )
+        if updated:
+            claimed.append(job_pk)
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+
+def requeue_stale_jobs(timeout_seconds):
+    """Put jobs left running by a crashed worker back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    return GenerationJob.objects.filter(status='running', started_at__lt=cutoff).update(status='pending')
+
+
+def execute_job(job_pk):
+    close_old_connections()
+    try:
+        job = GenerationJob.objects.select_related('user').get(id=job_pk)
+        logger.info(f"Running generation job {job.job_id} ({job.kind})")
+        try:
+            if job.kind == 'profile_image':
+                process_profile_image(job.user_id)
+                result = None
+            else:
+                result = run_generation(job.kind, job.user, job.params, use_cache=job.use_cache)
+        except Exception as e:
+            logger.error(f"Generation job {job.job_id} failed: {str(e)}")
+            GenerationJob.objects.filter(id=job_pk).update(
+                status='failed', error=str(e), finished_at=timezone.now()
+            )
+            return
+
+        updates = {'status': 'succeeded', 'error': '', 'finished_at': timezone.now()}
+        if job.kind == 'lesson_plan':
+            updates.update(lesson_plan_id=result['id'], file_id=result['file_id'])
+        elif job.kind != 'profile_image':
+            updates.update(curriculum_id=result['id'], file_id=result['file_id'])
+        GenerationJob.objects.filter(id=job_pk).update(**updates)
+        logger.info(f"Generation job {job.job_id} succeeded")
+    finally:
+        close_old_connections()
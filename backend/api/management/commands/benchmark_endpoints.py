@@ -0,0 +1,462 @@
+import io
+import json
+import logging
+import math
+import platform
+import random
+import re
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import (CaptureQueriesContext, override_settings, setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api import openai_client
+from api.audit import build_event
+from api.dedup import index_questions, minhash
+from api.file_access import permission_rows, sync_permissions
+from api.models import (Profile, Curriculum, LessonPlan, Quiz, Question, File, FilePermission, FileVersion, FileTag,
+                        Tag, ShareLink, GenerationJob, AuditEvent)
+from api.search import index_objects
+from api.uploads import append_chunk, start_upload
+from api.versioning import build_version
+
+WORDS = ('students', 'will', 'analyse', 'the', 'unit', 'objectives', 'assessment', 'week', 'lecture', 'lab',
+         'reading', 'project', 'outcomes', 'module', 'introduction', 'advanced', 'review', 'practice', 'and',
+         'of', 'to', 'data', 'structures', 'algorithms', 'graphs', 'evaluation', 'rubric', 'grade', 'topic')
+TAGS = ('math', 'physics', 'chemistry', 'biology', 'history', 'exam', 'lab', 'homework', 'notes', 'slides')
+PERMISSIONS = {
+    'Admin': {'read': True, 'write': True, 'delete': True},
+    'Teacher': {'read': True, 'write': True, 'delete': False},
+    'Student': {'read': True, 'write': False, 'delete': False},
+}
+UPLOAD_CHUNK = 256 * 1024
+PERCENTILES = (50, 90, 99)
+
+
+def _text(rng, size):
+    lines = []
+    length = 0
+    while length < size:
+        line = f"## Section {len(lines) + 1}\n" + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)[:size]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class StubOpenAI:
+    """
+    Stands in for the OpenAI client: answers instantly with plausible content,
+    quiz prompts with questions in the JSON shape api.quiz_generation expects.
+    """
+
+    def __init__(self, completion_size):
+        self.completion_size = completion_size
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _content(self, messages):
+        self.calls += 1
+        prompt = messages[-1]['content']
+        if '"questions"' in prompt:
+            match = re.search(r'Generate (\d+)', prompt)
+            count = int(match.group(1)) if match else 5
+            return json.dumps({'questions': [{
+                'text': f'Benchmark question {self.calls}-{i}: which option describes {WORDS[i % len(WORDS)]}?',
+                'options': ['A', 'B', 'C', 'D'],
+                'correct_answer': 'A',
+                'explanation': 'A is correct for this benchmark question.',
+            } for i in range(count)]})
+        return _text(random.Random(self.calls), self.completion_size)
+
+    def create(self, model, messages, max_tokens, temperature, timeout=None, stream=False):
+        content = self._content(messages)
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        step = max(1, len(content) // 50)
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + step]))])
+                     for i in range(0, len(content), step)])
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database, stub OpenAI and time every route in api/urls.py: latency '
+            'percentiles, query counts and peak Python memory, optionally compared with a baseline JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=20, help='Profiles to seed')
+        parser.add_argument('--generated', type=int, default=25,
+                            help='Curricula and lesson plans seeded per profile (each)')
+        parser.add_argument('--files', type=int, default=500, help='Files to seed')
+        parser.add_argument('--versions', type=int, default=5, help='History versions per file')
+        parser.add_argument('--share-links', type=int, default=2, help='Share links per file')
+        parser.add_argument('--quizzes', type=int, default=100, help='Quizzes to seed')
+        parser.add_argument('--questions', type=int, default=10, help='Questions per quiz')
+        parser.add_argument('--content-size', type=int, default=4000,
+                            help='Characters of generated/file content per row and per stubbed completion')
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per route first')
+        parser.add_argument('--routes', default='', help='Comma-separated substrings; only matching routes run')
+        parser.add_argument('--baseline', help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', help='Write the results to this JSON file')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p90 latency and peak memory growth over the baseline (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        seed_options = {name: options[name] for name in
+                        ('profiles', 'generated', 'files', 'versions', 'share_links', 'quizzes', 'questions',
+                         'content_size')}
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as source:
+                baseline = json.load(source)
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        logging.disable(logging.CRITICAL)
+        stub = StubOpenAI(options['content_size'])
+        openai_client.reset_client()
+        openai_client._client = stub
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root, CHUNKED_UPLOAD_DIR=f'{media_root}/chunked_uploads'):
+                started = time.perf_counter()
+                seed = self._seed(options)
+                self.stdout.write(f"Seeded {connection.vendor} test database in {time.perf_counter() - started:.1f}s: "
+                                  + ', '.join(f"{name}={value}" for name, value in seed_options.items()))
+                results = self._run(seed, options)
+                self.stdout.write(f"Stubbed OpenAI answered {stub.calls} completion(s)")
+        finally:
+            openai_client.reset_client()
+            logging.disable(logging.NOTSET)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self._report(results, baseline, options['tolerance'], seed_options)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as out:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'seed': seed_options,
+                    'iterations': options['iterations'],
+                    'results': results,
+                }, out, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+        if baseline is not None and self.regressions:
+            raise CommandError(f"{len(self.regressions)} regression(s): {', '.join(self.regressions)}")
+        failed = [key for key, result in results.items() if result['errors']]
+        if failed:
+            raise CommandError(f"Unexpected status codes from: {', '.join(failed)}")
+
+    # Seeding
+
+    def _seed(self, options):
+        rng = random.Random(42)
+        size = options['content_size']
+        user = get_user_model().objects.create_user('benchmark', password=None)
+        with transaction.atomic():
+            profiles = [Profile(id=i + 1, uid=f'bench-{i}', first_name=f'Bench{i}', email=f'bench{i}@example.com',
+                                role='teacher') for i in range(max(1, options['profiles']))]
+            Profile.objects.bulk_create(profiles)
+
+            generated = []
+            for model, fields in ((Curriculum, {'degree': 'BSc', 'curriculum_type': 'custom'}),
+                                  (LessonPlan, {'grade_level': 'Grade 10', 'duration': '1 hour',
+                                                'lesson_type': 'custom'})):
+                next_id = (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+                rows = [model(id=next_id + i, user=profiles[i % len(profiles)], subject=f'Subject {i}',
+                              topics=' '.join(rng.sample(WORDS, 3)), generated_content=_text(rng, size), **fields)
+                        for i in range(options['generated'] * len(profiles))]
+                model.objects.bulk_create(rows, batch_size=500)
+                generated.extend(rows)
+
+            files = self._seed_files(rng, profiles, options)
+            quizzes = self._seed_quizzes(rng, profiles, options)
+            index_objects(generated + files)
+            job = GenerationJob.objects.create(user=profiles[0], kind='lesson_plan', status='succeeded',
+                                               params={'subject': 'Math'}, finished_at=timezone.now())
+        return SimpleNamespace(user=user, profiles=profiles, files=files, quizzes=quizzes, job=job,
+                               versions=options['versions'],
+                               links=list(ShareLink.objects.values_list('file_id', 'link_id')[:100]))
+
+    def _seed_files(self, rng, profiles, options):
+        tags = Tag.objects.bulk_create([Tag(name=name) for name in TAGS])
+        tag_ids = dict(Tag.objects.values_list('name', 'id')) if any(tag.pk is None for tag in tags) else \
+            {tag.name: tag.id for tag in tags}
+        next_id = (File.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        files, versions, links, events, file_tags = [], [], [], [], []
+        expires_at = timezone.now() + timedelta(days=7)
+        for i in range(options['files']):
+            names = rng.sample(TAGS, 2)
+            content = _text(rng, options['content_size'])
+            file = File(id=next_id + i, user=profiles[i % len(profiles)], name=f'benchmark-{i}.txt',
+                        title=f'Benchmark file {i}', author='Teacher', uploaded_by='Teacher', type='txt',
+                        permissions=PERMISSIONS, tags=names, content=content, course=f'Course {i % 7}',
+                        department=f'Department {i % 3}', semester=f'Semester {i % 2 + 1}',
+                        subject=rng.choice(WORDS), class_name=f'Class {i % 5}', category='Curriculum')
+            files.append(file)
+            file_tags.extend(FileTag(file_id=file.id, tag_id=tag_ids[name]) for name in names)
+            previous = None
+            for version in range(1, options['versions'] + 1):
+                # Each version edits a few lines, so most are stored as deltas
+                lines = content.split('\n')
+                for _ in range(3):
+                    lines[rng.randrange(len(lines))] = ' '.join(rng.sample(WORDS, 6))
+                content = '\n'.join(lines)
+                state = {'name': file.name, 'title': file.title, 'type': file.type, 'content': content}
+                versions.append(build_version(file.id, version, state, f'Benchmark version {version}', previous))
+                events.append(build_event(file.id, 'Teacher', 'edited', ['content']))
+                previous = content
+            file.content = content
+            links.extend(ShareLink(file_id=file.id, link_id=f'bench-{file.id}-{n}', expires_at=expires_at,
+                                   created_by='Teacher') for n in range(options['share_links']))
+
+        File.objects.bulk_create(files, batch_size=500)
+        FileVersion.objects.bulk_create(versions, batch_size=500)
+        FilePermission.objects.bulk_create([row for file in files for row in permission_rows(file.id, file.permissions)],
+                                           batch_size=1000)
+        FileTag.objects.bulk_create(file_tags, batch_size=1000)
+        ShareLink.objects.bulk_create(links, batch_size=1000)
+        AuditEvent.objects.bulk_create(events, batch_size=1000)
+        return files
+
+    def _seed_quizzes(self, rng, profiles, options):
+        next_quiz = (Quiz.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        next_question = (Question.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        quizzes, questions = [], []
+        for i in range(options['quizzes']):
+            quiz = Quiz(id=next_quiz + i, user=profiles[i % len(profiles)], title=f'Benchmark quiz {i}', mode='quiz')
+            quizzes.append(quiz)
+            for position in range(options['questions']):
+                text = f"Which statement about {' '.join(rng.sample(WORDS, 5))} is correct?"
+                questions.append(Question(id=next_question + len(questions), quiz=quiz, position=position, text=text,
+                                          type='mcq', options=['A', 'B', 'C', 'D'], correct_answer='A',
+                                          explanation='Benchmark explanation.', minhash=minhash(text)))
+        Quiz.objects.bulk_create(quizzes, batch_size=500)
+        Question.objects.bulk_create(questions, batch_size=500)
+        index_questions(questions)
+        return quizzes
+
+    # Routes
+
+    def _cases(self, seed):
+        """One entry per (route, method, variant); url/data may be callables of the per-iteration context."""
+        uid = seed.profiles[0].uid
+        files = seed.files
+        quiz = seed.quizzes[0]
+
+        def file_id(ctx):
+            return files[ctx['i'] % len(files)].id
+
+        def quiz_payload(ctx):
+            return {'uid': uid, 'title': f'Benchmark quiz {ctx["i"]}', 'mode': 'quiz', 'questions': [
+                {'text': f'Question {ctx["i"]}-{n}: what is {n} + {n}?', 'type': 'mcq',
+                 'options': [str(n * 2), str(n)], 'correct_answer': str(n * 2), 'explanation': 'Addition.'}
+                for n in range(10)
+            ]}
+
+        def new_file(ctx):
+            file = File.objects.create(name=f'delete-{ctx["i"]}.txt', uploaded_by='Teacher', type='txt',
+                                       permissions=PERMISSIONS, content='To be deleted')
+            sync_permissions(file)
+            return {'file_id': file.id}
+
+        def new_upload(ctx):
+            return {'upload_id': start_upload(seed.profiles[0], 'Teacher', 'chunk.bin', UPLOAD_CHUNK).upload_id}
+
+        def full_upload(ctx):
+            session = start_upload(seed.profiles[0], 'Teacher', 'complete.bin', UPLOAD_CHUNK)
+            append_chunk(session.upload_id, io.BytesIO(b'x' * UPLOAD_CHUNK), 0, UPLOAD_CHUNK)
+            return {'upload_id': session.upload_id}
+
+        link_file, link_id = seed.links[0] if seed.links else (files[0].id, 'missing')
+        generation = {'uid': uid, 'use_cache': False}
+        return [
+            {'route': 'generate-custom-curriculum', 'method': 'POST', 'url': '/api/generate-custom-curriculum/',
+             'data': dict(generation, degree='BSc', subject='Algorithms', topics='graphs, sorting')},
+            {'route': 'generate-standard-curriculum', 'method': 'POST', 'url': '/api/generate-standard-curriculum/',
+             'data': dict(generation, degree='BSc', subject='Data structures')},
+            {'route': 'get-user-curriculums', 'method': 'GET', 'url': f'/api/get-user-curriculums/{uid}/'},
+            {'route': 'generate-lesson-plan', 'method': 'POST', 'url': '/api/generate-lesson-plan/',
+             'data': dict(generation, subject='Physics', topics='motion', grade_level='Grade 10')},
+            {'route': 'generate-quiz', 'method': 'POST', 'url': '/api/generate-quiz/',
+             'data': {'uid': uid, 'topic': 'graphs', 'question_count': 10, 'use_bank': False}},
+            {'route': 'generate-batch', 'method': 'POST', 'url': '/api/generate-batch/',
+             'data': dict(generation, items=[
+                 {'kind': 'custom_curriculum', 'degree': 'BSc', 'subject': 'Algorithms', 'topics': 'graphs'},
+                 {'kind': 'standard_curriculum', 'degree': 'BSc', 'subject': 'Databases'},
+                 {'kind': 'lesson_plan', 'subject': 'Physics', 'topics': 'motion', 'grade_level': 'Grade 10'},
+             ])},
+            {'route': 'get-user-lesson-plans', 'method': 'GET', 'url': f'/api/get-user-lesson-plans/{uid}/'},
+            {'route': 'get-profile', 'method': 'GET', 'url': f'/api/get-profile/{uid}/'},
+            {'route': 'save-profile', 'method': 'POST', 'url': '/api/save-profile/',
+             'data': lambda ctx: {'uid': uid, 'bio': f'Benchmark bio {ctx["i"]}'}},
+            {'route': 'quiz-list-create', 'method': 'GET', 'url': f'/api/quizzes/?uid={uid}'},
+            {'route': 'quiz-list-create', 'method': 'POST', 'url': '/api/quizzes/', 'data': quiz_payload},
+            {'route': 'quiz-retrieve-update', 'method': 'GET', 'url': f'/api/quizzes/{quiz.id}/?uid={uid}'},
+            {'route': 'quiz-retrieve-update', 'method': 'PUT', 'url': f'/api/quizzes/{quiz.id}/?uid={uid}',
+             'data': quiz_payload},
+            {'route': 'file-list-create', 'method': 'GET', 'url': '/api/files/?user_role=Teacher'},
+            {'route': 'file-list-create', 'method': 'GET', 'variant': 'summary',
+             'url': '/api/files/?user_role=Student&view=summary&tags=math'},
+            {'route': 'file-list-create', 'method': 'POST', 'url': '/api/files/',
+             'data': lambda ctx: {'uid': uid, 'user_role': 'Teacher', 'name': f'new-{ctx["i"]}.txt',
+                                  'title': 'New file', 'uploaded_by': 'Teacher', 'type': 'txt',
+                                  'content': 'Benchmark upload', 'permissions': PERMISSIONS, 'tags': 'math,notes'}},
+            {'route': 'file-tags', 'method': 'GET', 'url': '/api/files/tags/?user_role=Student'},
+            {'route': 'file-facets', 'method': 'GET', 'url': '/api/files/facets/?user_role=Student&course=Course+1'},
+            {'route': 'file-retrieve-update', 'method': 'GET',
+             'url': lambda ctx: f'/api/files/{file_id(ctx)}/?user_role=Teacher'},
+            {'route': 'file-retrieve-update', 'method': 'PATCH',
+             'url': lambda ctx: f'/api/files/{file_id(ctx)}/?user_role=Teacher',
+             'data': lambda ctx: {'user_role': 'Teacher', 'content': f'Edited content {ctx["i"]}\n' * 20}},
+            {'route': 'delete-file', 'method': 'DELETE', 'setup': new_file,
+             'url': lambda ctx: f'/api/files/{ctx["file_id"]}/delete/?user_role=Admin'},
+            {'route': 'update-permissions', 'method': 'POST',
+             'url': lambda ctx: f'/api/files/{file_id(ctx)}/permissions/?user_role=Admin',
+             'data': {'permissions': PERMISSIONS}},
+            {'route': 'generate-share-link', 'method': 'POST',
+             'url': lambda ctx: f'/api/files/{file_id(ctx)}/share/?user_role=Teacher'},
+            {'route': 'access-share-link', 'method': 'POST',
+             'url': f'/api/files/{link_file}/share/{link_id}/access/?user_role=Student'},
+            {'route': 'rollback-file', 'method': 'POST',
+             'url': lambda ctx: f'/api/files/{file_id(ctx)}/rollback/?user_role=Teacher', 'data': {'version': 1}},
+            {'route': 'file-version', 'method': 'GET',
+             'url': lambda ctx: f'/api/files/{file_id(ctx)}/versions/{max(1, seed.versions)}/?user_role=Teacher'},
+            {'route': 'file-audit-events', 'method': 'GET',
+             'url': lambda ctx: f'/api/files/{file_id(ctx)}/audit/?user_role=Admin'},
+            {'route': 'start-chunked-upload', 'method': 'POST', 'url': '/api/uploads/',
+             'data': {'uid': uid, 'user_role': 'Teacher', 'filename': 'big.bin', 'size': 10 * UPLOAD_CHUNK}},
+            {'route': 'chunked-upload', 'method': 'PUT', 'setup': new_upload, 'body': b'x' * UPLOAD_CHUNK,
+             'url': lambda ctx: f'/api/uploads/{ctx["upload_id"]}/',
+             'headers': {'HTTP_CONTENT_RANGE': f'bytes 0-{UPLOAD_CHUNK - 1}/{UPLOAD_CHUNK}'}},
+            {'route': 'complete-chunked-upload', 'method': 'POST', 'setup': full_upload,
+             'url': lambda ctx: f'/api/uploads/{ctx["upload_id"]}/complete/', 'data': {'title': 'Uploaded'}},
+            {'route': 'search', 'method': 'GET', 'url': f'/api/search/?q=algorithms+graphs&user_role=Student&uid={uid}'},
+            {'route': 'generation-job', 'method': 'GET', 'url': f'/api/jobs/{seed.job.job_id}/'},
+        ]
+
+    def _request(self, client, case, ctx):
+        url = case['url'](ctx) if callable(case['url']) else case['url']
+        headers = dict(case.get('headers') or {})
+        if 'body' in case:
+            return client.generic(case['method'], url, case['body'], content_type='application/octet-stream',
+                                  **headers)
+        data = case.get('data')
+        data = data(ctx) if callable(data) else data
+        if data is None:
+            return client.generic(case['method'], url, **headers)
+        return client.generic(case['method'], url, json.dumps(data), content_type='application/json', **headers)
+
+    def _run(self, seed, options):
+        from api.urls import urlpatterns
+
+        client = APIClient()
+        client.force_authenticate(seed.user)
+        filters = self.route_filters = [value.strip() for value in options['routes'].split(',') if value.strip()]
+        cases = [case for case in self._cases(seed) if not filters or any(f in case['route'] for f in filters)]
+        covered = {case['route'] for case in self._cases(seed)}
+        missing = [pattern.name for pattern in urlpatterns if pattern.name not in covered]
+        if missing:
+            self.stdout.write(self.style.WARNING(f"No benchmark case for route(s): {', '.join(missing)}"))
+
+        results = {}
+        counter = 0
+        for case in cases:
+            key = f"{case['method']} {case['route']}" + (f" [{case['variant']}]" if case.get('variant') else '')
+            timings, queries, errors = [], [], []
+            for iteration in range(options['warmup'] + options['iterations'] + 1):
+                counter += 1
+                ctx = {'i': counter}
+                if case.get('setup'):
+                    ctx.update(case['setup'](ctx))
+                measured = iteration >= options['warmup']
+                last = iteration == options['warmup'] + options['iterations']
+                if last:
+                    # One extra request under tracemalloc, which would skew the timings
+                    tracemalloc.start()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = self._request(client, case, ctx)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if last:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    continue
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+                if measured:
+                    timings.append(elapsed)
+                    queries.append(len(captured))
+            results[key] = {
+                **{f'p{pct}_ms': round(percentile(timings, pct), 3) for pct in PERCENTILES},
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'queries': int(statistics.median(queries)),
+                'peak_kb': round(peak / 1024, 1),
+                'errors': sorted(set(errors)),
+            }
+        return results
+
+    # Reporting
+
+    def _report(self, results, baseline, tolerance, seed_options):
+        self.regressions = []
+        base_results = (baseline or {}).get('results', {})
+        if baseline is not None and baseline.get('seed') != seed_options:
+            self.stdout.write(self.style.WARNING(f"Baseline was seeded with {baseline.get('seed')}; "
+                                                 "numbers may not be comparable"))
+
+        header = f"{'route':<48} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KB':>9}"
+        self.stdout.write(header + ('  vs baseline' if baseline is not None else ''))
+        for key, result in results.items():
+            line = (f"{key:<48} {result['p50_ms']:>8.1f} {result['p90_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                    f"{result['queries']:>8} {result['peak_kb']:>9.1f}")
+            if result['errors']:
+                line += f"  status {','.join(map(str, result['errors']))}"
+            base = base_results.get(key)
+            if baseline is not None:
+                notes = self._compare(key, result, base, tolerance) if base else ['new']
+                line += '  ' + ', '.join(notes)
+            self.stdout.write(self.style.ERROR(line) if key in self.regressions or result['errors'] else line)
+        for key in sorted(set(base_results) - set(results)) if not self.route_filters else ():
+            self.stdout.write(f"{key:<48} (in baseline, not run)")
+
+    def _compare(self, key, result, base, tolerance):
+        notes = []
+        regressed = False
+        latency = result['p90_ms'] - base['p90_ms']
+        notes.append(f"p90 {latency:+.1f} ms ({latency / max(base['p90_ms'], 0.001):+.0%})")
+        # Ignore sub-millisecond noise on fast routes
+        if result['p90_ms'] > base['p90_ms'] * (1 + tolerance) and latency > 1:
+            regressed = True
+        if result['queries'] != base['queries']:
+            notes.append(f"queries {result['queries'] - base['queries']:+d}")
+            regressed = regressed or result['queries'] > base['queries']
+        memory = result['peak_kb'] - base['peak_kb']
+        if abs(memory) >= 64:
+            notes.append(f"peak {memory:+.0f} KB")
+        if result['peak_kb'] > base['peak_kb'] * (1 + tolerance) and memory >= 64:
+            regressed = True
+        if regressed:
+            self.regressions.append(key)
+            notes.append('REGRESSION')
+        return notes
@@ -0,0 +1,96 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from api.models import File, FilePermission
+from api.file_access import permission_rows, readable_by
+
+BENCHMARK_UPLOADER = '__permission_benchmark__'
+
+
+class Command(BaseCommand):
+    help = ('Seed files and compare the JSON permissions__contains listing filter with the indexed '
+            'FilePermission join. Run against a disposable database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=1_000_000, help='Number of files to seed')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT batch')
+        parser.add_argument('--read-ratio', type=float, default=0.1,
+                            help='Fraction of files the benchmarked role may read')
+        parser.add_argument('--role', default='Student', help='Role to list files for')
+        parser.add_argument('--page-size', type=int, default=50, help='Rows fetched per listing query')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (best is reported)')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows afterwards')
+
+    def handle(self, *args, **options):
+        role = options['role']
+        if not File.objects.filter(uploaded_by=BENCHMARK_UPLOADER).exists():
+            self._seed(options['files'], options['batch_size'], options['read_ratio'], role)
+        seeded = File.objects.filter(uploaded_by=BENCHMARK_UPLOADER).count()
+        self.stdout.write(f"{seeded} benchmark files on {connection.vendor}")
+
+        try:
+            indexed = readable_by(File.objects.all(), role)
+            self._report('indexed', indexed, options)
+            if connection.features.supports_json_field_contains:
+                legacy = File.objects.filter(permissions__contains={role: {'read': True}})
+                self._report('json contains', legacy, options)
+            else:
+                self.stdout.write(f"json contains: not supported on {connection.vendor}, skipped")
+        finally:
+            if not options['keep']:
+                self.stdout.write("Removing benchmark files")
+                self._remove()
+
+    def _remove(self):
+        # Raw DELETEs: QuerySet.delete() would collect every row and run the per-file post_delete
+        # handlers (search documents, collection versions). Seeded files only have permission rows.
+        seeded = File.objects.filter(uploaded_by=BENCHMARK_UPLOADER)
+        with transaction.atomic():
+            FilePermission.objects.filter(file__in=seeded)._raw_delete(FilePermission.objects.db)
+            removed = seeded._raw_delete(File.objects.db)
+        self.stdout.write(f"Removed {removed} benchmark files")
+
+    def _seed(self, total, batch_size, read_ratio, role):
+        rng = random.Random(42)
+        next_id = (File.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        started = time.perf_counter()
+        for offset in range(0, total, batch_size):
+            files = []
+            for file_id in range(next_id + offset, next_id + min(offset + batch_size, total)):
+                permissions = {
+                    'Admin': {'read': True, 'write': True, 'delete': True},
+                    'Teacher': {'read': True, 'write': True, 'delete': False},
+                    role: {'read': rng.random() < read_ratio, 'write': False, 'delete': False},
+                }
+                # Explicit ids so permission rows can be built without bulk_create returning pks
+                files.append(File(id=file_id, name=f'benchmark-{file_id}.txt', uploaded_by=BENCHMARK_UPLOADER,
+                                  type='txt', permissions=permissions))
+            with transaction.atomic():
+                File.objects.bulk_create(files)
+                FilePermission.objects.bulk_create(
+                    [row for file in files for row in permission_rows(file.id, file.permissions)]
+                )
+            self.stdout.write(f"Seeded {min(offset + batch_size, total)}/{total} files", ending='\r')
+        self.stdout.write(f"\nSeeded {total} files in {time.perf_counter() - started:.1f}s")
+
+    def _report(self, label, queryset, options):
+        ids = queryset.order_by('id').values_list('id', flat=True)
+        timings = {'count': [], 'first page': [], 'deep page': []}
+        for _ in range(max(1, options['repeat'])):
+            started = time.perf_counter()
+            total = queryset.count()
+            timings['count'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            list(ids[:options['page_size']])
+            timings['first page'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            list(ids[total // 2:total // 2 + options['page_size']])
+            timings['deep page'].append(time.perf_counter() - started)
+
+        summary = ', '.join(f"{name} {min(values) * 1000:.1f}ms" for name, values in timings.items())
+        self.stdout.write(f"{label}: {total} readable files; {summary}")
+        self.stdout.write(ids[:options['page_size']].explain())
@@ -0,0 +1,77 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from api.compression import brotli, compress
+from api.models import Curriculum, Profile
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import CurriculumSerializer
+
+WORDS = ('students', 'will', 'analyse', 'the', 'unit', 'objectives', 'assessment', 'week', 'lecture', 'lab',
+         'reading', 'project', 'outcomes', 'module', 'introduction', 'advanced', 'review', 'practice', 'and',
+         'of', 'to', 'data', 'structures', 'algorithms', 'graphs', 'evaluation', 'rubric', 'grade', 'topic')
+
+
+def _content(rng, size):
+    lines = []
+    length = 0
+    while length < size:
+        line = f"## Week {len(lines) + 1}\n- " + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)[:size]
+
+
+class Command(BaseCommand):
+    help = ('Compare JSON rendering time and bytes on the wire (identity, gzip, brotli) '
+            'for a curriculum list of --rows rows. Nothing is written to the database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Curricula in the list')
+        parser.add_argument('--content-size', type=int, default=4000, help='Characters of generated_content per row')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is reported')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        now = timezone.now()
+        profile = Profile(id=1, uid='benchmark', first_name='Bench', email='bench@example.com')
+        curriculums = [
+            Curriculum(id=i + 1, user=profile, degree='BSc', subject=f'Subject {i}', topics='Topic A, Topic B',
+                       generated_content=_content(rng, options['content_size']), curriculum_type='custom',
+                       created_at=now, updated_at=now)
+            for i in range(options['rows'])
+        ]
+        repeat = max(1, options['repeat'])
+
+        data, serialize_ms = self._best(repeat, lambda: {
+            'status': 'success', 'curriculums': CurriculumSerializer(curriculums, many=True).data, 'next': None
+        })
+        self.stdout.write(f"{options['rows']} rows, serializer: {serialize_ms:.1f} ms")
+        if orjson is None:
+            self.stdout.write("orjson is not installed: FastJSONRenderer falls back to JSONRenderer")
+
+        self.stdout.write(f"\n{'renderer':<18} {'ms':>9} {'bytes':>12}")
+        body = None
+        for label, renderer in (('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())):
+            body, elapsed = self._best(repeat, lambda: renderer.render(data, 'application/json'))
+            self.stdout.write(f"{label:<18} {elapsed:>9.1f} {len(body):>12}")
+
+        self.stdout.write(f"\n{'encoding':<18} {'ms':>9} {'bytes':>12} {'ratio':>7}")
+        self.stdout.write(f"{'identity':<18} {0:>9.1f} {len(body):>12} {1:>7.2f}")
+        for encoding in ('gzip', 'br'):
+            if encoding == 'br' and brotli is None:
+                self.stdout.write("br                 (brotli is not installed)")
+                continue
+            compressed, elapsed = self._best(repeat, lambda: compress(body, encoding))
+            self.stdout.write(f"{encoding:<18} {elapsed:>9.1f} {len(compressed):>12} "
+                              f"{len(body) / len(compressed):>7.2f}")
+
+    def _best(self, repeat, func):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
@@ -0,0 +1,68 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from api.models import Quiz
+from api.serializers import QuizSerializer
+
+
+def _question(index, suffix=''):
+    return {
+        'text': f'Question {index}{suffix}?',
+        'type': 'mcq',
+        'options': ['A', 'B', 'C', 'D'],
+        'correct_answer': 'A',
+        'explanation': f'Explanation {index}{suffix}',
+    }
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Count queries and time QuizSerializer create/update for growing question counts. '
+            'Everything runs in a transaction that is rolled back. Each write issues a fixed set of '
+            'statements whatever the question count, but SQLite splits bulk INSERTs at 999 bound '
+            'parameters, so there the count grows by one per extra batch of questions or LSH buckets.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,50,200', help='Comma-separated question counts')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        self.stdout.write(f"{'questions':>10} {'scenario':<24} {'queries':>8} {'ms':>9}")
+        for size in sizes:
+            try:
+                with transaction.atomic():
+                    self._run(size)
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+    def _measure(self, size, label, func):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = func()
+            elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"{size:>10} {label:<24} {len(queries):>8} {elapsed:>9.1f}")
+        return result
+
+    def _save(self, instance, data, partial=False):
+        serializer = QuizSerializer(instance, data=data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _run(self, size):
+        data = {'title': 'Benchmark', 'mode': 'assessment', 'difficulty': 'Medium',
+                'questions': [_question(i) for i in range(size)]}
+        quiz = self._measure(size, 'create', lambda: self._save(None, data))
+
+        current = QuizSerializer(Quiz.objects.prefetch_related('questions').get(id=quiz.id)).data['questions']
+        self._measure(size, 'title only', lambda: self._save(quiz, {'title': 'Renamed'}, partial=True))
+        self._measure(size, 'unchanged questions', lambda: self._save(quiz, {'questions': current}, partial=True))
+
+        # Edit every other question, drop the last quarter and append as many new ones
+        edited = [dict(q, text=q['text'] + ' (edited)') if i % 2 else q for i, q in enumerate(current)]
+        mixed = edited[:size - size // 4] + [_question(i, ' new') for i in range(size // 4)]
+        self._measure(size, 'edit/add/remove', lambda: self._save(quiz, {'questions': mixed}, partial=True))
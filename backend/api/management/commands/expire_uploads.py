@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = 'Abort chunked uploads that have been idle too long and delete their temporary files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-hours', type=float, default=24, help='Idle time before an upload expires')
+
+    def handle(self, *args, **options):
+        expired = expire_uploads(options['max_age_hours'])
+        self.stdout.write(f"Expired {expired} upload(s)")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from api.images import ImageProcessingError, enqueue_profile_image, process_profile_image
+from api.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Create resized variants for profile images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reprocess every profile image, e.g. after changing sizes')
+        parser.add_argument('--queue', action='store_true',
+                            help='Queue jobs for run_generation_worker instead of processing here')
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(profile_image='').exclude(profile_image__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(image_variants={})
+        processed = failed = 0
+        for profile in profiles.only('id', 'uid').iterator():
+            if options['queue']:
+                enqueue_profile_image(profile)
+                processed += 1
+                continue
+            try:
+                process_profile_image(profile.id)
+                processed += 1
+            except (ImageProcessingError, OSError) as e:
+                failed += 1
+                self.stderr.write(f"Profile {profile.uid}: {str(e)}")
+        action = 'Queued' if options['queue'] else 'Processed'
+        self.stdout.write(f"{action} {processed} profile image(s), {failed} failed")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from api.conditional import touch_collection
+from api.dedup import duplicate_clusters, duplicate_threshold, index_questions, minhash
+from api.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Report groups of near-duplicate questions across all quizzes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=None,
+                            help='Estimated similarity (0-1) to count as a duplicate; '
+                                 'defaults to QUESTION_DUPLICATE_THRESHOLD')
+        parser.add_argument('--limit', type=int, default=50, help='Number of groups to print')
+        parser.add_argument('--reindex', action='store_true',
+                            help='Recompute signatures, LSH buckets and duplicate flags for every question first')
+        parser.add_argument('--batch-size', type=int, default=500, help='Questions re-indexed per batch')
+
+    def handle(self, *args, **options):
+        if options['reindex']:
+            self._reindex(max(1, options['batch_size']))
+
+        threshold = duplicate_threshold() if options['threshold'] is None else options['threshold']
+        clusters = duplicate_clusters(threshold)
+        duplicates = sum(len(ids) - 1 for ids, _ in clusters)
+        self.stdout.write(f"{len(clusters)} group(s), {duplicates} redundant question(s) at similarity >= {threshold}")
+
+        shown = clusters[:options['limit']]
+        ids = {question_id for question_ids, _ in shown for question_id in question_ids}
+        questions = Question.objects.filter(id__in=ids).only('id', 'quiz_id', 'text').in_bulk()
+        for question_ids, score in shown:
+            self.stdout.write(f"\n{len(question_ids)} questions, similarity >= {score:.2f}")
+            for question_id in question_ids:
+                question = questions[question_id]
+                self.stdout.write(f"  #{question.id} (quiz {question.quiz_id}): {question.text[:100]}")
+
+    def _reindex(self, batch_size):
+        # In id order, so each question is only compared with already re-indexed, older ones
+        batch = []
+        count = 0
+        questions = Question.objects.order_by('id').only('id', 'text', 'duplicate_of', 'duplicate_score', 'bank_question')
+        for question in questions.iterator(chunk_size=batch_size):
+            question.minhash = minhash(question.text)
+            batch.append(question)
+            if len(batch) >= batch_size:
+                count += self._index_batch(batch)
+                batch = []
+        count += self._index_batch(batch)
+        touch_collection('quizzes')
+        self.stdout.write(f"Re-indexed questions, {count} flagged as near-duplicates")
+
+    def _index_batch(self, questions):
+        if not questions:
+            return 0
+        Question.objects.bulk_update(questions, ['minhash'])
+        return len(index_questions(questions, replace=True))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from api.models import File, Curriculum, LessonPlan
+from api.search import clear_index, index_objects
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index for all files, curricula and lesson plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Objects indexed per batch')
+
+    def handle(self, *args, **options):
+        clear_index()
+        batch_size = max(1, options['batch_size'])
+        for model in (File, Curriculum, LessonPlan):
+            batch = []
+            count = 0
+            for instance in model.objects.order_by('id').iterator(chunk_size=batch_size):
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    index_objects(batch)
+                    count += len(batch)
+                    batch = []
+            index_objects(batch)
+            count += len(batch)
+            self.stdout.write(f"Indexed {count} {model.__name__} object(s)")
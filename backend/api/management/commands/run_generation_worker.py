@@ -0,0 +1,47 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.core.management.base import BaseCommand
+from api.jobs import claim_jobs, execute_job, requeue_stale_jobs
+
+logger = logging.getLogger('api')
+
+
+class Command(BaseCommand):
+    help = ('Drain queued curriculum and lesson plan generation jobs, and profile image resizing, '
+            'with a bounded thread pool')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Maximum jobs running at once')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Requeue jobs that have been running longer than this many seconds')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        requeued = requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+        self.stdout.write(f"Generation worker started with concurrency {concurrency}")
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                while True:
+                    for job_pk in claim_jobs(concurrency - len(running)):
+                        running.add(executor.submit(execute_job, job_pk))
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception():
+                            logger.error(f"Generation worker thread crashed: {future.exception()}")
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping generation worker, waiting for running jobs")
+        self.stdout.write("Generation worker stopped")
@@ -0,0 +1,81 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before it can answer its first request
+STARTUP_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+finished = time.perf_counter()
+print(json.dumps({'django.setup()': (setup_done - started) * 1000, 'WSGI app + URLconf': (finished - setup_done) * 1000}))
+'''
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """[(module, self_us, cumulative_us, depth)] from `python -X importtime` output."""
+    modules = []
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return modules
+
+
+class Command(BaseCommand):
+    help = ('Start the project in a fresh interpreter under `python -X importtime` and report '
+            'the slowest imports. Fails when the total exceeds STARTUP_IMPORT_BUDGET_MS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=25, help='Modules and packages to list')
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help='Total import time allowed; defaults to STARTUP_IMPORT_BUDGET_MS, 0 disables the check')
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=dict(os.environ), capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        modules = parse_importtime(result.stderr)
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        total_ms = sum(cumulative for _, _, cumulative, depth in modules if depth == 0) / 1000
+        limit = options['limit']
+
+        self.stdout.write(f"{'phase':<24} {'ms':>9}")
+        for phase, elapsed in phases.items():
+            self.stdout.write(f"{phase:<24} {elapsed:>9.1f}")
+
+        self.stdout.write(f"\n{'slowest imports':<48} {'cumul ms':>9} {'self ms':>9}")
+        for name, own, cumulative, _ in sorted(modules, key=lambda module: -module[2])[:limit]:
+            self.stdout.write(f"{name:<48} {cumulative / 1000:>9.1f} {own / 1000:>9.1f}")
+
+        packages = defaultdict(int)
+        for name, own, _, _ in modules:
+            packages[name.split('.')[0]] += own
+        self.stdout.write(f"\n{'package':<48} {'self ms':>9} {'share':>7}")
+        for package, own in sorted(packages.items(), key=lambda item: -item[1])[:limit]:
+            self.stdout.write(f"{package:<48} {own / 1000:>9.1f} {own / 10 / max(total_ms, 0.001):>6.1f}%")
+
+        budget = options['budget_ms']
+        if budget is None:
+            budget = getattr(settings, 'STARTUP_IMPORT_BUDGET_MS', 0)
+        self.stdout.write(f"\n{len(modules)} modules imported in {total_ms:.1f} ms"
+                          + (f" (budget {budget:.0f} ms)" if budget else ''))
+        if budget and total_ms > budget:
+            raise CommandError(f"Import time {total_ms:.1f} ms is over the {budget:.0f} ms budget")
@@ -0,0 +1,175 @@
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from .models import File, ShareLink
+from .file_access import readable_by
+
+logger = logging.getLogger(__name__)
+
+# Anyone may fetch these (avatars); everything else must belong to a readable File
+PUBLIC_PREFIXES = ('profile_images/',)
+# Content-hashed names (api/images.py) never change meaning
+IMMUTABLE_PREFIXES = ('profile_images/variants/',)
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def delivery_mode():
+    """'' to stream from Django, 'x-accel-redirect' for nginx or 'x-sendfile' for Apache/lighttpd."""
+    return getattr(settings, 'MEDIA_DELIVERY', '')
+
+
+def can_read(request, path):
+    """True/False for a media path, or None when no File owns it."""
+    if path.startswith(PUBLIC_PREFIXES):
+        return True
+    files = File.objects.filter(file=path)
+    if not files.exists():
+        return None
+    link_id = request.GET.get('share')
+    if link_id and ShareLink.objects.filter(file__in=files, link_id=link_id, expires_at__gt=timezone.now()).exists():
+        return True
+    return readable_by(files, request.GET.get('user_role', 'Student')).exists()
+
+
+def _cache_control(path):
+    if path.startswith(IMMUTABLE_PREFIXES):
+        return 'public, max-age=31536000, immutable'
+    if path.startswith(PUBLIC_PREFIXES):
+        return 'public, no-cache'
+    return 'private, no-cache'
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable byte range, None to send the whole file, or 'invalid'."""
+    match = RANGE_HEADER.match((header or '').strip())
+    if not match or not any(match.groups()):
+        return None  # Multiple or malformed ranges: a full response is always allowed
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(0, size - int(last)), size - 1
+    if start >= size or size == 0:
+        return 'invalid'
+    return start, end
+
+
+class _RangeFile:
+    """Reads at most `length` bytes of an open file from its current position."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _delegate(path, full_path, content_type, headers):
+    response = HttpResponse(content_type=content_type, headers=headers)
+    if delivery_mode() == 'x-sendfile':
+        response['X-Sendfile'] = full_path
+    else:
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        # The proxy answers Range and conditional requests for the internal location itself
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a MEDIA_ROOT file after checking access in Python.
+
+    With MEDIA_DELIVERY set, the proxy sends the bytes (X-Accel-Redirect or
+    X-Sendfile) and the worker is freed immediately. Otherwise the file is
+    streamed from here with ETag/Last-Modified validation, single byte ranges
+    and FileResponse, which uses sendfile when the WSGI server supports it.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+
+    allowed = can_read(request, path)
+    if allowed is None:
+        raise Http404('File not found')
+    if not allowed:
+        logger.error(f"Media access denied for {path}")
+        return HttpResponseForbidden('Permission denied')
+
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('File not found')
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': _cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    if delivery_mode():
+        return _delegate(path, full_path, content_type, headers)
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            conditional[header] = headers[header]
+        return conditional
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if 'Range' in request.headers and (not if_range or if_range == etag):
+        byte_range = parse_range(request.headers['Range'], stat.st_size)
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416, content_type=content_type, headers=headers)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['Content-Length'] = stat.st_size
+        return response
+
+    source = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(source, content_type=content_type, headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    source.seek(start)
+    # Ranges reaching EOF keep the real file so the server can still sendfile() it
+    body = source if end == stat.st_size - 1 else _RangeFile(source, length)
+    response = FileResponse(body, status=206, content_type=content_type, headers=headers)
+    response['Content-Length'] = length
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
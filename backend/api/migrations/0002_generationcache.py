@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model', models.CharField(max_length=100)),
+                ('prompt', models.TextField()),
+                ('max_tokens', models.PositiveIntegerField()),
+                ('temperature', models.FloatField()),
+                ('response', models.TextField()),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:21
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_generationcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('kind', models.CharField(choices=[('custom_curriculum', 'Custom Curriculum'), ('standard_curriculum', 'Standard Curriculum'), ('lesson_plan', 'Lesson Plan')], max_length=30)),
+                ('params', models.JSONField(default=dict)),
+                ('use_cache', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('curriculum', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.curriculum')),
+                ('file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.file')),
+                ('lesson_plan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.lessonplan')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to='api.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='api_generat_status_8dc5c3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('owner', models.CharField(max_length=64)),
+                ('acquired_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
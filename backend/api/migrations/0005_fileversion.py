@@ -0,0 +1,141 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:27
+
+import difflib
+import json
+import django.db.models.deletion
+from datetime import date
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copies of api.versioning.compute_delta/apply_delta as they were when this
+# migration was written, so later changes to that module cannot alter it.
+def compute_delta(base, target):
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['=', i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(['-', i2 - i1])
+        if j2 > j1:
+            ops.append(['+', target_lines[j1:j2]])
+    return ops
+
+
+def apply_delta(base, ops):
+    base_lines = base.splitlines(keepends=True)
+    position = 0
+    out = []
+    for op, value in ops:
+        if op == '=':
+            out.extend(base_lines[position:position + value])
+            position += value
+        elif op == '-':
+            position += value
+        else:
+            out.extend(value)
+    return ''.join(out)
+
+
+def _parse_date(value, default):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def history_to_versions(apps, schema_editor):
+    File = apps.get_model('api', 'File')
+    FileVersion = apps.get_model('api', 'FileVersion')
+    interval = max(1, getattr(settings, 'FILE_VERSION_SNAPSHOT_INTERVAL', 10))
+
+    for file in File.objects.only('id', 'date', 'history').iterator():
+        rows = []
+        seen = set()
+        previous_content = None
+        entries = sorted((e for e in file.history or [] if isinstance(e, dict)), key=lambda e: e.get('version', 0))
+        for entry in entries:
+            version = entry.get('version')
+            if not isinstance(version, int) or version in seen:
+                continue
+            seen.add(version)
+            state = entry.get('state') or {}
+            content = state.get('content') or ''
+            row = FileVersion(
+                file_id=file.id,
+                version=version,
+                date=_parse_date(entry.get('date'), file.date),
+                changes=(entry.get('changes') or '')[:255],
+                name=(state.get('name') or '')[:255],
+                title=(state.get('title') or '')[:255],
+                type=(state.get('type') or '')[:50],
+                is_snapshot=True,
+                content=content,
+            )
+            if previous_content is not None and (version - 1) % interval != 0:
+                delta = compute_delta(previous_content, content)
+                if len(json.dumps(delta)) < len(content):
+                    row.is_snapshot = False
+                    row.content = ''
+                    row.delta = delta
+            rows.append(row)
+            previous_content = content
+        FileVersion.objects.bulk_create(rows, batch_size=500)
+
+
+def versions_to_history(apps, schema_editor):
+    File = apps.get_model('api', 'File')
+    FileVersion = apps.get_model('api', 'FileVersion')
+
+    for file in File.objects.only('id').iterator():
+        history = []
+        content = ''
+        for row in FileVersion.objects.filter(file_id=file.id).order_by('version'):
+            content = row.content if row.is_snapshot else apply_delta(content, row.delta)
+            history.append({
+                'version': row.version,
+                'date': row.date.isoformat(),
+                'changes': row.changes,
+                'state': {'name': row.name, 'title': row.title, 'type': row.type, 'content': content}
+            })
+        File.objects.filter(id=file.id).update(history=history)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_generationlock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('changes', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('type', models.CharField(blank=True, max_length=50)),
+                ('is_snapshot', models.BooleanField(default=True)),
+                ('content', models.TextField(blank=True)),
+                ('delta', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='api.file')),
+            ],
+            options={
+                'ordering': ['version'],
+                'constraints': [models.UniqueConstraint(fields=('file', 'version'), name='unique_file_version')],
+            },
+        ),
+        migrations.RunPython(history_to_versions, versions_to_history),
+        migrations.RemoveField(
+            model_name='file',
+            name='history',
+        ),
+    ]
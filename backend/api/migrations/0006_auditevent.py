@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from datetime import datetime, timezone as dt_timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _parse_timestamp(value):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return timezone.now()
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def audit_logs_to_events(apps, schema_editor):
+    File = apps.get_model('api', 'File')
+    AuditEvent = apps.get_model('api', 'AuditEvent')
+
+    rows = []
+    for file in File.objects.only('id', 'audit_logs').iterator():
+        for entry in file.audit_logs or []:
+            if not isinstance(entry, dict):
+                continue
+            changed_fields = entry.get('changed_fields')
+            rows.append(AuditEvent(
+                file_id=file.id,
+                timestamp=_parse_timestamp(entry.get('timestamp')),
+                user=str(entry.get('user') or '')[:100],
+                action=str(entry.get('action') or '')[:255],
+                changed_fields=changed_fields if isinstance(changed_fields, list) else [],
+            ))
+        if len(rows) >= 1000:
+            AuditEvent.objects.bulk_create(rows)
+            rows = []
+    AuditEvent.objects.bulk_create(rows)
+
+
+def events_to_audit_logs(apps, schema_editor):
+    File = apps.get_model('api', 'File')
+    AuditEvent = apps.get_model('api', 'AuditEvent')
+
+    for file in File.objects.only('id').iterator():
+        audit_logs = []
+        for event in AuditEvent.objects.filter(file_id=file.id).order_by('timestamp', 'id'):
+            entry = {'timestamp': event.timestamp.isoformat(), 'user': event.user, 'action': event.action}
+            if event.changed_fields:
+                entry['changed_fields'] = event.changed_fields
+            audit_logs.append(entry)
+        File.objects.filter(id=file.id).update(audit_logs=audit_logs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_fileversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.CharField(max_length=100)),
+                ('action', models.CharField(max_length=255)),
+                ('changed_fields', models.JSONField(blank=True, default=list)),
+                ('file', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='audit_events', to='api.file')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['file', 'timestamp'], name='api_auditev_file_id_1ff063_idx')],
+            },
+        ),
+        migrations.RunPython(audit_logs_to_events, events_to_audit_logs),
+        migrations.RemoveField(
+            model_name='file',
+            name='audit_logs',
+        ),
+    ]
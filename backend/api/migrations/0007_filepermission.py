@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_permissions(apps, schema_editor):
+    File = apps.get_model('api', 'File')
+    FilePermission = apps.get_model('api', 'FilePermission')
+
+    rows = []
+    for file in File.objects.only('id', 'permissions').iterator():
+        for role, actions in (file.permissions or {}).items():
+            if not isinstance(actions, dict):
+                continue
+            rows.append(FilePermission(
+                file_id=file.id,
+                role=str(role)[:50],
+                can_read=bool(actions.get('read', False)),
+                can_write=bool(actions.get('write', False)),
+                can_delete=bool(actions.get('delete', False)),
+            ))
+        if len(rows) >= 1000:
+            FilePermission.objects.bulk_create(rows)
+            rows = []
+    FilePermission.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_auditevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilePermission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=50)),
+                ('can_read', models.BooleanField(default=False)),
+                ('can_write', models.BooleanField(default=False)),
+                ('can_delete', models.BooleanField(default=False)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='permission_grants', to='api.file')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['role', 'can_read', 'file'], name='api_fileper_role_e8d642_idx')],
+                'constraints': [models.UniqueConstraint(fields=('file', 'role'), name='unique_file_permission_role')],
+            },
+        ),
+        migrations.RunPython(backfill_permissions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_filepermission'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='curriculum',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='api_curricu_user_id_316cc3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['date', 'id'], name='api_file_date_f91afe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['user', 'date', 'id'], name='api_file_user_id_f2bfe4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lessonplan',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='api_lessonp_user_id_e79eaa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='api_quiz_user_id_a798de_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'api_searchdocument_fts'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, body, tokenize = 'porter unicode61')")
+    elif vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE api_searchdocument ADD FULLTEXT INDEX api_searchdocument_fulltext (title, body)')
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE api_searchdocument DROP INDEX api_searchdocument_fulltext')
+
+
+def index_existing(apps, schema_editor):
+    SearchDocument = apps.get_model('api', 'SearchDocument')
+    sources = [
+        ('file', apps.get_model('api', 'File'),
+         lambda f: (f.title or f.name, '\n'.join([f.name, ' '.join(map(str, f.tags)) if isinstance(f.tags, list) else '', f.content or '']))),
+        ('curriculum', apps.get_model('api', 'Curriculum'),
+         lambda c: (f"{c.degree} - {c.subject}", '\n'.join([c.topics, c.generated_content]))),
+        ('lesson_plan', apps.get_model('api', 'LessonPlan'),
+         lambda l: (f"{l.subject} - {l.grade_level}", '\n'.join([l.topics, l.generated_content]))),
+    ]
+    for kind, model, fields in sources:
+        rows = []
+        for instance in model.objects.iterator():
+            title, body = fields(instance)
+            rows.append(SearchDocument(kind=kind, object_id=instance.id, user_id=instance.user_id,
+                                       title=(title or '')[:255], body=body))
+            if len(rows) >= 500:
+                SearchDocument.objects.bulk_create(rows)
+                rows = []
+        SearchDocument.objects.bulk_create(rows)
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, body) SELECT id, title, body FROM api_searchdocument')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('file', 'File'), ('curriculum', 'Curriculum'), ('lesson_plan', 'Lesson Plan')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'user'], name='api_searchd_kind_835d84_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def tags_to_index(apps, schema_editor):
+    File = apps.get_model('api', 'File')
+    Tag = apps.get_model('api', 'Tag')
+    FileTag = apps.get_model('api', 'FileTag')
+
+    file_names = {}
+    for file in File.objects.only('id', 'tags').iterator():
+        if isinstance(file.tags, list):
+            names = {str(tag).strip().lower()[:100] for tag in file.tags if str(tag).strip()}
+            if names:
+                file_names[file.id] = names
+    all_names = set().union(*file_names.values()) if file_names else set()
+    Tag.objects.bulk_create([Tag(name=name) for name in sorted(all_names)], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+    FileTag.objects.bulk_create(
+        [FileTag(file_id=file_id, tag_id=tag_ids[name]) for file_id, names in file_names.items() for name in names],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FileTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='api.file')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='file_links', to='api.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='files', through='api.FileTag', to='api.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='filetag',
+            index=models.Index(fields=['tag', 'file'], name='api_filetag_tag_id_be7eb2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='filetag',
+            constraint=models.UniqueConstraint(fields=('file', 'tag'), name='unique_file_tag'),
+        ),
+        migrations.RunPython(tags_to_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # No-op unless CACHES uses the database backend (i.e. REDIS_URL is unset)
+    if any(cache['BACKEND'].endswith('DatabaseCache') for cache in settings.CACHES.values()):
+        call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_tag'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='question',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_question_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bank_key', models.CharField(max_length=64)),
+                ('subject', models.CharField(blank=True, max_length=100)),
+                ('topic', models.CharField(max_length=255)),
+                ('grade', models.CharField(blank=True, max_length=50)),
+                ('type', models.CharField(choices=[('mcq', 'Multiple Choice'), ('truefalse', 'True/False'), ('shortanswer', 'Short Answer'), ('essay', 'Essay')], max_length=20)),
+                ('difficulty', models.CharField(max_length=20)),
+                ('text', models.TextField()),
+                ('text_hash', models.CharField(max_length=64)),
+                ('options', models.JSONField(default=list)),
+                ('correct_answer', models.TextField()),
+                ('explanation', models.TextField()),
+                ('times_used', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bank_key', 'type', 'difficulty', 'times_used'], name='api_bankque_bank_ke_bcf291_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bank_key', 'type', 'difficulty', 'text_hash'), name='unique_bank_question')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_existing_questions(apps, schema_editor):
+    from api.dedup import minhash
+
+    Question = apps.get_model('api', 'Question')
+    QuestionBucket = apps.get_model('api', 'QuestionBucket')
+    batch = []
+    for question in Question.objects.only('id', 'text').iterator(chunk_size=1000):
+        question.minhash = minhash(question.text)
+        batch.append(question)
+        if len(batch) == 1000:
+            _save_batch(Question, QuestionBucket, batch)
+            batch = []
+    _save_batch(Question, QuestionBucket, batch)
+
+
+def _save_batch(Question, QuestionBucket, questions):
+    from api.dedup import band_keys
+
+    Question.objects.bulk_update(questions, ['minhash'])
+    QuestionBucket.objects.bulk_create(
+        [QuestionBucket(question_id=q.id, key=key) for q in questions if q.minhash for key in band_keys(q.minhash)],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_bankquestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.question'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='duplicate_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='minhash',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='bank_question',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.bankquestion'),
+        ),
+        migrations.CreateModel(
+            name='QuestionBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='api.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'question'], name='api_questio_key_e19c78_idx')],
+            },
+        ),
+        migrations.RunPython(index_existing_questions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_question_minhash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='generationjob',
+            name='kind',
+            field=models.CharField(choices=[('custom_curriculum', 'Custom Curriculum'), ('standard_curriculum', 'Standard Curriculum'), ('lesson_plan', 'Lesson Plan'), ('profile_image', 'Profile Image Variants')], max_length=30),
+        ),
+    ]
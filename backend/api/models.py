@@ -18,20 +18,51 @@ class Profile(models.Model):
     bio = models.TextField(blank=True, null=True)
     role = models.CharField(max_length=20, default='teacher')
     profile_image = models.ImageField(upload_to=profile_image_path, null=True, blank=True)
+    # Resized copies of profile_image by variant name, written by api/images.py in the background
+    image_variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name or ''} ({self.email})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored uid and image so save() needs no extra query to compare
+        instance._loaded = {
+            name: value for name, value in zip(field_names, values)
+            if name in ('uid', 'profile_image') and value is not models.DEFERRED
+        }
+        instance._loaded['pk'] = instance.pk
+        return instance
+
     def save(self, *args, **kwargs):
-        if self.pk:
-            try:
-                old_instance = Profile.objects.get(pk=self.pk)
-                if old_instance.profile_image and self.profile_image != old_instance.profile_image:
-                    old_instance.profile_image.delete(save=False)
-            except Profile.DoesNotExist:
-                pass
+        from .profile_cache import invalidate_profile
+
+        loaded = getattr(self, '_loaded', {})
+        # Only an instance read from (or already written to) this pk's row is an update of it
+        stored_row = self.pk is not None and loaded.get('pk') == self.pk
+        if not stored_row:
+            loaded = {}
+        if self.pk and 'profile_image' not in loaded:
+            stored = Profile.objects.filter(pk=self.pk).values('uid', 'profile_image').first()
+            loaded = stored or {}
+        old_image = loaded.get('profile_image')
+        storage = self._meta.get_field('profile_image').storage
+        if old_image != self.profile_image.name:
+            if old_image:
+                # Without a stored image the variants, if any, were copied from another row
+                storage.delete(old_image)
+                for name in set(self.image_variants.values()):
+                    storage.delete(name)
+            self.image_variants = {}
+        elif stored_row and 'update_fields' not in kwargs and not kwargs.get('force_insert'):
+            # Variants are written by the image worker; don't overwrite them with a stale copy
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name != 'image_variants']
         super().save(*args, **kwargs)
+        self._loaded = {'pk': self.pk, 'uid': self.uid, 'profile_image': self.profile_image.name}
+        invalidate_profile(self.uid, loaded.get('uid'))
 
 class Curriculum(models.Model):
     user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='curriculums')
@@ -48,6 +79,7 @@ class Curriculum(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', 'created_at', 'id'])]
 
 class LessonPlan(models.Model):
     user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='lesson_plans')
@@ -65,6 +97,7 @@ class LessonPlan(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', 'created_at', 'id'])]
 
 class Quiz(models.Model):
     user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='quizzes', null=True, blank=True)
@@ -76,6 +109,9 @@ class Quiz(models.Model):
     def __str__(self):
         return f"{self.title} ({self.mode})"
 
+    class Meta:
+        indexes = [models.Index(fields=['user', 'created_at', 'id'])]
+
 class Question(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='questions')
     text = models.TextField()
@@ -88,10 +124,60 @@ class Question(models.Model):
     options = models.JSONField(default=list)
     correct_answer = models.TextField()
     explanation = models.TextField()
+    # Order within the quiz, so questions can be updated in place without losing their order
+    position = models.PositiveIntegerField(default=0)
+    # MinHash signature of the text (see api/dedup.py), and the older question it nearly repeats
+    minhash = models.JSONField(null=True, blank=True)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    duplicate_score = models.FloatField(null=True, blank=True)
+    # The question bank entry this text was taken from; such deliberate reuse is not deduplicated
+    bank_question = models.ForeignKey('BankQuestion', on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='+')
 
     def __str__(self):
         return f"{self.text} ({self.type})"
 
+    class Meta:
+        ordering = ['position', 'id']
+
+class QuestionBucket(models.Model):
+    """LSH band key of a question's MinHash signature; questions sharing a key are duplicate candidates."""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='lsh_buckets')
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['key', 'question'])]
+
+class BankQuestion(models.Model):
+    """
+    Generated question kept for reuse across users, keyed by the normalized
+    subject/topic/grade plus question type and difficulty.
+    """
+    bank_key = models.CharField(max_length=64)
+    subject = models.CharField(max_length=100, blank=True)
+    topic = models.CharField(max_length=255)
+    grade = models.CharField(max_length=50, blank=True)
+    type = models.CharField(max_length=20, choices=Question._meta.get_field('type').choices)
+    difficulty = models.CharField(max_length=20)
+    text = models.TextField()
+    text_hash = models.CharField(max_length=64)
+    options = models.JSONField(default=list)
+    correct_answer = models.TextField()
+    explanation = models.TextField()
+    times_used = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.topic} [{self.type}/{self.difficulty}]: {self.text[:50]}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bank_key', 'type', 'difficulty', 'text_hash'], name='unique_bank_question')
+        ]
+        indexes = [
+            models.Index(fields=['bank_key', 'type', 'difficulty', 'times_used'])
+        ]
+
 def get_default_permissions():
     return {
         'Admin': {'read': True, 'write': True, 'delete': True},
@@ -108,7 +194,6 @@ class File(models.Model):
     date = models.DateField(auto_now_add=True)
     file = models.FileField(upload_to='files/', null=True, blank=True)  # Make file optional
     permissions = models.JSONField(default=get_default_permissions)
-    history = models.JSONField(default=list)
     type = models.CharField(max_length=50)
     tags = models.JSONField(default=list)
     content = models.TextField(blank=True)
@@ -118,10 +203,164 @@ class File(models.Model):
     subject = models.CharField(max_length=100, blank=True)
     class_name = models.CharField(max_length=100, blank=True, db_column='class')
     category = models.CharField(max_length=100, default='Curriculum')
-    audit_logs = models.JSONField(default=list)
+    # Indexed copy of `tags`, kept in sync by api.tagging
+    tag_set = models.ManyToManyField('Tag', through='FileTag', related_name='files', blank=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id']),
+            models.Index(fields=['user', 'date', 'id'])
+        ]
+
+class UploadSession(models.Model):
+    """A resumable chunked upload, written to a temporary file until it completes as a File."""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('complete', 'Complete'),
+        ('aborted', 'Aborted'),
+    ]
+
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='uploads', null=True, blank=True)
+    user_role = models.CharField(max_length=20)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    # Client-supplied checksum to verify on completion, and the one computed from the data
+    expected_sha256 = models.CharField(max_length=64, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    file = models.ForeignKey(File, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"UploadSession {self.upload_id} ({self.filename}, {self.received}/{self.size})"
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'updated_at'])]
+
+class Tag(models.Model):
+    # Lower-cased so "Math" and "math" share one row (and one facet)
+    name = models.CharField(max_length=100, unique=True)
 
     def __str__(self):
         return self.name
+
+class FileTag(models.Model):
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='file_links')
+
+    def __str__(self):
+        return f"{self.file_id} #{self.tag_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file', 'tag'], name='unique_file_tag')
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'file'])
+        ]
+
+class FilePermission(models.Model):
+    """
+    Indexed copy of File.permissions, one row per role, so listings can filter
+    by role without parsing JSON. Kept in sync by api.file_access.
+    """
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='permission_grants')
+    role = models.CharField(max_length=50)
+    can_read = models.BooleanField(default=False)
+    can_write = models.BooleanField(default=False)
+    can_delete = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.file_id} {self.role} (r={self.can_read}, w={self.can_write}, d={self.can_delete})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file', 'role'], name='unique_file_permission_role')
+        ]
+        indexes = [
+            models.Index(fields=['role', 'can_read', 'file'])
+        ]
+
+class FileVersion(models.Model):
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='versions')
+    version = models.PositiveIntegerField()
+    date = models.DateField()
+    changes = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    title = models.CharField(max_length=255, blank=True)
+    type = models.CharField(max_length=50, blank=True)
+    # Full content for snapshots; line delta against the previous version otherwise
+    is_snapshot = models.BooleanField(default=True)
+    content = models.TextField(blank=True)
+    delta = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.file_id} v{self.version} ({'snapshot' if self.is_snapshot else 'delta'})"
+
+    class Meta:
+        ordering = ['version']
+        constraints = [
+            models.UniqueConstraint(fields=['file', 'version'], name='unique_file_version'),
+        ]
+
+class AuditEvent(models.Model):
+    # No FK constraint or cascade: events outlive the file they describe
+    file = models.ForeignKey(File, on_delete=models.DO_NOTHING, db_constraint=False, related_name='audit_events')
+    timestamp = models.DateTimeField(default=timezone.now)
+    user = models.CharField(max_length=100)
+    action = models.CharField(max_length=255)
+    changed_fields = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f"{self.timestamp.isoformat()} {self.user} {self.action} (file {self.file_id})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Audit events are append-only and cannot be modified")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Audit events are append-only and cannot be deleted")
+
+    class Meta:
+        indexes = [models.Index(fields=['file', 'timestamp'])]
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a File, Curriculum or LessonPlan. The inverted index over
+    it (MySQL FULLTEXT or an SQLite FTS5 table) is maintained by api.search.
+    """
+    KIND_CHOICES = [
+        ('file', 'File'),
+        ('curriculum', 'Curriculum'),
+        ('lesson_plan', 'Lesson Plan'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='+', null=True, blank=True)
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document')
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'user'])
+        ]
+
 class ShareLink(models.Model):
     file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='share_links')
     link_id = models.CharField(max_length=36, unique=True)
@@ -130,4 +369,64 @@ class ShareLink(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"ShareLink for {self.file.name} (Expires: {self.expires_at})"
\ No newline at end of file
+        return f"ShareLink for {self.file.name} (Expires: {self.expires_at})"
+
+class GenerationCache(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    prompt = models.TextField()
+    max_tokens = models.PositiveIntegerField()
+    temperature = models.FloatField()
+    response = models.TextField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"GenerationCache {self.key[:12]} ({self.model}, hits: {self.hit_count})"
+
+
+class GenerationLock(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    owner = models.CharField(max_length=64)
+    acquired_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"GenerationLock {self.key[:12]} (owner: {self.owner})"
+
+class GenerationJob(models.Model):
+    KIND_CHOICES = [
+        ('custom_curriculum', 'Custom Curriculum'),
+        ('standard_curriculum', 'Standard Curriculum'),
+        ('lesson_plan', 'Lesson Plan'),
+        ('profile_image', 'Profile Image Variants'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='generation_jobs')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict)
+    use_cache = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    curriculum = models.ForeignKey(Curriculum, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    lesson_plan = models.ForeignKey(LessonPlan, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    file = models.ForeignKey(File, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"GenerationJob {self.job_id} ({self.kind}, {self.status})"
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
@@ -0,0 +1,249 @@
+import logging
+import random
+import threading
+import time
+from django.conf import settings
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class UpstreamError(Exception):
+    """A completion that failed here rather than in the openai SDK."""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without contacting OpenAI while the circuit breaker is open."""
+
+
+class DeadlineExceededError(UpstreamError):
+    """Raised when a call (including retries) runs past its latency deadline."""
+
+
+def openai_module():
+    """
+    The openai package, imported on first use.
+
+    It takes about half a second to import, which every worker would
+    otherwise pay at boot whether or not it ever generates anything.
+    """
+    import openai
+    return openai
+
+
+def openai_errors():
+    """
+    Exception classes for a failed completion, for `except openai_errors():`.
+
+    The tuple is only built when an exception is being matched, so the
+    openai import stays deferred until then.
+    """
+    return openai_module().OpenAIError, UpstreamError
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_client():
+    """
+    Return the process-wide OpenAI client, creating it on first use.
+
+    The client owns an httpx connection pool so TLS sessions are reused across
+    requests and threads. Retries are handled here rather than by the SDK.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                openai = openai_module()
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=_setting('OPENAI_POOL_MAX_CONNECTIONS', 20),
+                        max_keepalive_connections=_setting('OPENAI_POOL_MAX_KEEPALIVE', 10),
+                        keepalive_expiry=_setting('OPENAI_POOL_KEEPALIVE_EXPIRY', 30.0),
+                    ),
+                    timeout=httpx.Timeout(_setting('OPENAI_DEADLINE', 30.0), connect=5.0),
+                )
+                _client = openai.OpenAI(
+                    api_key=config('OPENAI_API_KEY', default=''),
+                    base_url=_setting('OPENAI_BASE_URL', None),
+                    http_client=http_client,
+                    max_retries=0,
+                )
+    return _client
+
+
+def reset_client():
+    """Drop the shared client (e.g. after changing OPENAI_BASE_URL) and reset the breaker."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+    breaker.reset()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `threshold` failed calls the circuit opens and calls fail fast with
+    CircuitOpenError for `cooldown` seconds; the next call after that is let
+    through as a trial and closes the circuit again if it succeeds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            cooldown = _setting('OPENAI_BREAKER_COOLDOWN', 30.0)
+            if time.monotonic() - self.opened_at >= cooldown and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+        raise CircuitOpenError("OpenAI circuit breaker is open; skipping upstream call")
+
+    def end_trial(self):
+        """Let another trial through if this one ended without recording an outcome."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("OpenAI circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= _setting('OPENAI_BREAKER_THRESHOLD', 5):
+                if self.opened_at is None:
+                    logger.warning(f"OpenAI circuit breaker opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+breaker = CircuitBreaker()
+
+
+def _is_retryable(error):
+    openai = openai_module()
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _backoff(attempt):
+    # Full jitter: sleep a random amount up to the capped exponential delay
+    base = _setting('OPENAI_BACKOFF_BASE', 0.5)
+    cap = _setting('OPENAI_BACKOFF_MAX', 8.0)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _call_with_retries(create_kwargs, deadline):
+    breaker.before_call()
+    try:
+        return _attempt_with_retries(create_kwargs, deadline)
+    finally:
+        # Anything but an OpenAIError (a bad argument, an interrupt) records no outcome;
+        # without this the half-open trial would never end and the circuit never close
+        breaker.end_trial()
+
+
+def _attempt_with_retries(create_kwargs, deadline):
+    max_retries = _setting('OPENAI_MAX_RETRIES', 3)
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            breaker.record_failure()
+            raise DeadlineExceededError(f"OpenAI request exceeded its {deadline:.1f}s deadline")
+        try:
+            return get_client().chat.completions.create(timeout=remaining, **create_kwargs)
+        except openai_module().OpenAIError as e:
+            if not _is_retryable(e):
+                # Client errors (bad request, auth) mean the upstream itself answered
+                breaker.record_success()
+                raise
+            delay = _backoff(attempt)
+            if attempt >= max_retries or time.monotonic() - started + delay >= deadline:
+                breaker.record_failure()
+                raise
+            logger.warning(f"OpenAI call failed ({str(e)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def chat_completion(messages, model, max_tokens, temperature, deadline=None):
+    """Return the stripped completion text, retrying transient failures within `deadline` seconds."""
+    deadline = deadline or _setting('OPENAI_DEADLINE', 30.0)
+    response = _call_with_retries({
+        'model': model,
+        'messages': messages,
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+    }, deadline)
+    breaker.record_success()
+    return response.choices[0].message.content.strip()
+
+
+def stream_chat_completion(messages, model, max_tokens, temperature, deadline=None):
+    """
+    Yield content deltas as they arrive.
+
+    Retries only cover opening the stream; once tokens have been sent to the
+    caller a failure is raised instead of silently restarting the answer.
+    """
+    deadline = deadline or _setting('OPENAI_DEADLINE', 30.0)
+    started = time.monotonic()
+    stream = _call_with_retries({
+        'model': model,
+        'messages': messages,
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+        'stream': True,
+    }, deadline)
+    failed = False
+    try:
+        for chunk in stream:
+            if time.monotonic() - started > deadline:
+                raise DeadlineExceededError(f"OpenAI stream exceeded its {deadline:.1f}s deadline")
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except openai_errors():
+        failed = True
+        breaker.record_failure()
+        raise
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+        if not failed:
+            breaker.record_success()
@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+import logging
+import operator
+from functools import reduce
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+logger = logging.getLogger(__name__)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed ordering that ends in a unique field.
+
+    The cursor holds the ordering values of the last row served, so every page
+    is one range scan on the ordering index however deep the client goes, and
+    rows inserted meanwhile never shift or repeat later pages.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        if ordering:
+            self.ordering = tuple(ordering)
+        self.request = None
+        self.next_values = None
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'API_PAGE_SIZE', 50)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        return max(1, min(size, getattr(settings, 'API_MAX_PAGE_SIZE', 200)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self._after(queryset.model, position))
+
+        rows = list(queryset[:page_size + 1])
+        self.next_values = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_values = self._position(rows[-1])
+        return rows
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (ValueError, UnicodeError, binascii.Error):
+            logger.error(f"Could not decode cursor: {encoded}")
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _fields(self, model):
+        return [(name.lstrip('-'), name.startswith('-'), model._meta.get_field(name.lstrip('-')))
+                for name in self.ordering]
+
+    def _position(self, row):
+        return [field.value_to_string(row) for _, _, field in self._fields(type(row))]
+
+    def _after(self, model, values):
+        # (a, b, id) < (x, y, z)  ==  a < x OR (a = x AND b < y) OR (a = x AND b = y AND id < z)
+        branches = []
+        equal = Q()
+        for (name, descending, field), raw in zip(self._fields(model), values):
+            try:
+                value = field.to_python(raw)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if descending else 'gt'
+            branches.append(equal & Q(**{f'{name}__{lookup}': value}))
+            equal &= Q(**{name: value})
+        return reduce(operator.or_, branches)
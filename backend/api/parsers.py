@@ -0,0 +1,28 @@
+import codecs
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from .renderers import FastJSONRenderer, orjson
+
+
+def _is_utf8(encoding):
+    try:
+        return codecs.lookup(encoding).name == 'utf-8'
+    except LookupError:
+        return False
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSONParser that decodes UTF-8 bodies with orjson when it is installed."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not _is_utf8(encoding):
+            # JSONParser also validates the charset
+            return super().parse(stream, media_type, parser_context)
+        try:
+            # Like JSONParser with STRICT_JSON, orjson rejects NaN and Infinity
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as e:
+            raise ParseError('JSON parse error - %s' % str(e))
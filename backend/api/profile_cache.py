@@ -0,0 +1,64 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import caches
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+MEMO_ATTR = '_profile_memo'
+
+
+def _cache():
+    return caches[getattr(settings, 'PROFILE_CACHE_ALIAS', 'default')]
+
+
+def cache_key(uid):
+    # uids come from Firebase; hash them so any character is a valid cache key
+    return 'profile:' + hashlib.sha256(str(uid).encode('utf-8')).hexdigest()
+
+
+def _memo(request):
+    if request is None:
+        return None
+    request = getattr(request, '_request', request)  # DRF Request wraps the HttpRequest
+    memo = getattr(request, MEMO_ATTR, None)
+    if memo is None:
+        memo = {}
+        setattr(request, MEMO_ATTR, memo)
+    return memo
+
+
+def cached_profile(uid, request=None):
+    """
+    Profile for `uid`, looked up in the request memo, then the profile cache,
+    then the database. Misses are remembered for the rest of the request only.
+    Raises Profile.DoesNotExist like Profile.objects.get.
+    """
+    memo = _memo(request)
+    if memo is not None and uid in memo:
+        profile = memo[uid]
+    else:
+        key = cache_key(uid)
+        profile = _cache().get(key)
+        if profile is None:
+            profile = Profile.objects.filter(uid=uid).first()
+            if profile is not None:
+                _cache().set(key, profile, getattr(settings, 'PROFILE_CACHE_TTL', 60))
+        if memo is not None:
+            memo[uid] = profile
+    if profile is None:
+        raise Profile.DoesNotExist(f"No profile with uid {uid}")
+    return profile
+
+
+def invalidate_profile(*uids, request=None):
+    """Drop cached profiles, and the request's memo entries when `request` is given."""
+    uids = [uid for uid in uids if uid]
+    if not uids:
+        return
+    _cache().delete_many([cache_key(uid) for uid in uids])
+    memo = _memo(request)
+    if memo is not None:
+        for uid in uids:
+            memo.pop(uid, None)
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .models import BankQuestion
+from .generation import normalize_prompt
+from .openai_client import chat_completion, openai_errors
+from .serializers import QuizSerializer
+
+logger = logging.getLogger(__name__)
+
+QUIZ_TYPES = ['mcq', 'truefalse', 'shortanswer']
+ASSESSMENT_TYPES = ['shortanswer', 'essay']
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+
+TYPE_INSTRUCTIONS = {
+    'mcq': 'Multiple Choice questions, each with exactly 4 options and 1 correct answer '
+           '(correct_answer must be one of the options)',
+    'truefalse': 'True/False questions, each with options ["True", "False"]',
+    'shortanswer': 'Short Answer questions, each with an empty options array and a concise correct answer',
+    'essay': "Essay questions (open-ended, problem-solving or analytical tasks aligned with Bloom's Taxonomy: "
+             "knowledge, comprehension, analysis, evaluation), each with an empty options array and a suggested answer",
+}
+
+
+class QuizGenerationError(Exception):
+    """Raised when neither the question bank nor OpenAI produced any question."""
+
+
+def extract_quiz_params(data):
+    """Validate quiz generation input; returns (params, error_message)."""
+    topic = (data.get('topic') or '').strip()
+    if not topic:
+        return None, 'Topic is required'
+    mode = data.get('mode') or 'quiz'
+    if mode not in ('quiz', 'assessment'):
+        return None, 'Mode must be quiz or assessment'
+    allowed = QUIZ_TYPES if mode == 'quiz' else ASSESSMENT_TYPES
+    types = data.get('question_types') or allowed
+    if isinstance(types, str):
+        types = [t.strip() for t in types.split(',') if t.strip()]
+    types = list(dict.fromkeys(t for t in types if t in allowed))
+    if not types:
+        return None, f"Question types must be some of: {', '.join(allowed)}"
+    difficulty = (data.get('difficulty') or 'Medium').strip().capitalize()
+    if difficulty not in DIFFICULTIES:
+        return None, f"Difficulty must be one of: {', '.join(DIFFICULTIES)}"
+    try:
+        count = int(data.get('question_count', 10))
+    except (TypeError, ValueError):
+        return None, 'Question count must be a number'
+    max_questions = getattr(settings, 'QUIZ_MAX_QUESTIONS', 50)
+    if not 1 <= count <= max_questions:
+        return None, f'Question count must be between 1 and {max_questions}'
+
+    subject = (data.get('subject') or '').strip()
+    return {
+        'topic': topic,
+        'subject': subject,
+        'grade': (data.get('grade') or '').strip(),
+        'mode': mode,
+        'question_types': types,
+        'difficulty': difficulty,
+        'question_count': count,
+        'title': (data.get('title') or subject or topic)[:255],
+    }, None
+
+
+def bank_key(params):
+    parts = [normalize_prompt(params[name]) for name in ('subject', 'topic', 'grade')]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_prompt(text).encode('utf-8')).hexdigest()
+
+
+def split_count(count, types):
+    """Spread `count` questions over `types` as evenly as possible, in order."""
+    return {qtype: count // len(types) + (1 if i < count % len(types) else 0) for i, qtype in enumerate(types)}
+
+
+def take_from_bank(key, qtype, difficulty, count):
+    """Least-used bank questions first, so reuse is spread across the bank."""
+    if count <= 0:
+        return []
+    with transaction.atomic():
+        picked = list(BankQuestion.objects.filter(bank_key=key, type=qtype, difficulty=difficulty)
+                      .order_by('times_used', 'id')[:count])
+        if picked:
+            BankQuestion.objects.filter(id__in=[q.id for q in picked]).update(times_used=F('times_used') + 1)
+    return [dict(_question_data(q), bank_question=q.id) for q in picked]
+
+
+def _question_data(source):
+    return {
+        'text': source.text,
+        'type': source.type,
+        'options': source.options,
+        'correct_answer': source.correct_answer,
+        'explanation': source.explanation,
+    }
+
+
+def _load_json(content):
+    text = re.sub(r'^```(?:json)?\s*|\s*```$', '', content.strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        match = re.search(r'[\[{].*[\]}]', text, re.DOTALL)
+        if not match:
+            raise ValueError('Quiz generation response is not JSON')
+        return json.loads(match.group(0))
+
+
+def parse_questions(content, qtype):
+    """Validate model output into question dicts of `qtype`, dropping malformed entries."""
+    data = _load_json(content)
+    if isinstance(data, dict):
+        data = data.get('questions', [])
+    questions = []
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict):
+            continue
+        text = str(item.get('text') or '').strip()
+        answer = str(item.get('correct_answer') or item.get('correctAnswer') or '').strip()
+        if not text or not answer:
+            continue
+        options = [str(option) for option in item.get('options') or [] if str(option).strip()]
+        if qtype == 'truefalse':
+            options = ['True', 'False']
+        elif qtype == 'mcq':
+            if len(options) < 2:
+                continue
+            if answer not in options:
+                options = options[:3] + [answer]
+        else:
+            options = []
+        questions.append({
+            'text': text,
+            'type': qtype,
+            'options': options,
+            'correct_answer': answer,
+            'explanation': str(item.get('explanation') or '').strip(),
+        })
+    return questions
+
+
+def generate_questions(params, qtype, count):
+    prompt = (
+        f"Generate {count} {TYPE_INSTRUCTIONS[qtype]} for {params['grade'] or 'general'} students"
+        f"{' on ' + params['subject'] if params['subject'] else ''} about {params['topic']} at "
+        f"{params['difficulty']} difficulty (Easy: recall, Medium: application, Hard: analysis). "
+        f"For each question, include a 1-2 sentence explanation justifying the answer. "
+        f'Respond with only a JSON object of the form {{"questions": [{{"text": "...", "options": [...], '
+        f'"correct_answer": "...", "explanation": "..."}}]}}.'
+    )
+    content = chat_completion(
+        [{'role': 'user', 'content': prompt}],
+        model=getattr(settings, 'QUIZ_GENERATION_MODEL', 'gpt-4o-mini'),
+        max_tokens=min(4000, 250 * count + 200),
+        temperature=0.7,
+    )
+    return parse_questions(content, qtype)[:count]
+
+
+def generate_quiz(profile, params, use_bank=True, save=True):
+    """
+    Build a quiz from the question bank first and call OpenAI only for the
+    shortfall, one request per question type, run concurrently. Newly generated
+    questions are added to the bank.
+
+    Returns a dict with the quiz (saved unless `save` is False), how many
+    questions came from the bank or OpenAI, the number still missing and any
+    per-type errors. Raises QuizGenerationError if no question was produced.
+    """
+    key = bank_key(params)
+    wanted = split_count(params['question_count'], params['question_types'])
+    from_bank = {
+        qtype: take_from_bank(key, qtype, params['difficulty'], count) if use_bank else []
+        for qtype, count in wanted.items()
+    }
+    shortfall = {qtype: count - len(from_bank[qtype]) for qtype, count in wanted.items()
+                 if count > len(from_bank[qtype])}
+
+    generated = {}
+    errors = {}
+    if shortfall:
+        workers = min(len(shortfall), getattr(settings, 'QUIZ_GENERATION_CONCURRENCY', 4))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(generate_questions, params, qtype, count): qtype
+                       for qtype, count in shortfall.items()}
+            for future in as_completed(futures):
+                qtype = futures[future]
+                try:
+                    generated[qtype] = future.result()
+                except (*openai_errors(), ValueError) as e:
+                    logger.error(f"Quiz question generation failed for {qtype}: {str(e)}")
+                    errors[qtype] = str(e)
+
+    new_questions = [q for qtype in params['question_types'] for q in generated.get(qtype, [])]
+    if new_questions:
+        BankQuestion.objects.bulk_create([
+            BankQuestion(
+                bank_key=key,
+                subject=params['subject'][:100],
+                topic=params['topic'][:255],
+                grade=params['grade'][:50],
+                difficulty=params['difficulty'],
+                text_hash=text_hash(q['text']),
+                times_used=1,
+                **q
+            )
+            for q in new_questions
+        ], ignore_conflicts=True)
+        # ignore_conflicts returns no ids; link each question to its bank row so dedup skips its reuse
+        bank_ids = {
+            (qtype, digest): bank_id for bank_id, qtype, digest in BankQuestion.objects.filter(
+                bank_key=key, difficulty=params['difficulty'], text_hash__in=[text_hash(q['text']) for q in new_questions]
+            ).values_list('id', 'type', 'text_hash')
+        }
+        for q in new_questions:
+            q['bank_question'] = bank_ids.get((q['type'], text_hash(q['text'])))
+
+    questions = [q for qtype in params['question_types']
+                 for q in from_bank[qtype] + generated.get(qtype, [])]
+    if not questions:
+        raise QuizGenerationError('; '.join(f"{qtype}: {error}" for qtype, error in errors.items())
+                                  or 'No questions could be generated')
+
+    quiz_data = {
+        'title': params['title'],
+        'mode': params['mode'],
+        'difficulty': params['difficulty'],
+        'questions': questions,
+    }
+    if save:
+        serializer = QuizSerializer(data=quiz_data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=profile)
+        quiz_data = serializer.data
+
+    bank_count = sum(len(q) for q in from_bank.values())
+    logger.info(f"Quiz on '{params['topic']}': {bank_count} question(s) from the bank, "
+                f"{len(new_questions)} generated, {params['question_count'] - len(questions)} missing")
+    return {
+        'quiz': quiz_data,
+        'from_bank': bank_count,
+        'generated': len(new_questions),
+        'missing': params['question_count'] - len(questions),
+        'errors': errors,
+    }
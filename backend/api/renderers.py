@@ -0,0 +1,39 @@
+import logging
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Kept escaped so the output stays a strict JavaScript subset, as JSONRenderer does
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Output matches JSONRenderer for compact, unicode responses. Indented
+    output (the browsable API, `; indent=` media types) and anything orjson
+    rejects, such as integers wider than 64 bits, go through JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # Dates, decimals, lazy strings... go through encoder_class, exactly as JSONRenderer encodes them
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError as e:
+            logger.warning(f"orjson could not encode response, using JSONRenderer: {str(e)}")
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in _LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
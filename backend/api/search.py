@@ -0,0 +1,198 @@
+import logging
+import re
+from django.db import connection, transaction
+from django.db.models import BooleanField, CharField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from .models import SearchDocument, File, Curriculum, LessonPlan, FilePermission
+
+logger = logging.getLogger(__name__)
+
+# SQLite only: FTS5 table whose rowid is the SearchDocument id
+FTS_TABLE = 'api_searchdocument_fts'
+SNIPPET_LENGTH = 200
+MAX_QUERY_TERMS = 16
+
+# Fields whose change requires the document to be re-indexed
+INDEXED_FIELDS = {
+    File: {'user', 'name', 'title', 'tags', 'content'},
+    Curriculum: {'user', 'degree', 'subject', 'topics', 'generated_content'},
+    LessonPlan: {'user', 'subject', 'grade_level', 'topics', 'generated_content'},
+}
+KINDS = {File: 'file', Curriculum: 'curriculum', LessonPlan: 'lesson_plan'}
+
+
+def document_fields(instance):
+    """Return (kind, owner id, title, body) for a File, Curriculum or LessonPlan."""
+    if isinstance(instance, File):
+        tags = ' '.join(str(tag) for tag in instance.tags) if isinstance(instance.tags, list) else ''
+        return 'file', instance.user_id, instance.title or instance.name, '\n'.join(
+            [instance.name, tags, instance.content or '']
+        )
+    if isinstance(instance, Curriculum):
+        return 'curriculum', instance.user_id, f"{instance.degree} - {instance.subject}", '\n'.join(
+            [instance.topics, instance.generated_content]
+        )
+    return 'lesson_plan', instance.user_id, f"{instance.subject} - {instance.grade_level}", '\n'.join(
+        [instance.topics, instance.generated_content]
+    )
+
+
+def _uses_fts5():
+    return connection.vendor == 'sqlite'
+
+
+def _uses_fulltext():
+    return connection.vendor == 'mysql'
+
+
+def _fts_replace(documents):
+    if not _uses_fts5() or not documents:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(doc.id,) for doc in documents])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+            [(doc.id, doc.title, doc.body) for doc in documents]
+        )
+
+
+def _fts_delete(document_ids):
+    if not _uses_fts5() or not document_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in document_ids])
+
+
+def index_objects(instances):
+    """Create or refresh the search documents of saved objects in a few queries."""
+    if not instances:
+        return
+    documents = []
+    for instance in instances:
+        kind, user_id, title, body = document_fields(instance)
+        documents.append(SearchDocument(kind=kind, object_id=instance.pk, user_id=user_id,
+                                        title=(title or '')[:255], body=body))
+    with transaction.atomic():
+        SearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['user', 'title', 'body', 'updated_at'],
+        )
+        if _uses_fts5():
+            # Upserted rows do not get their ids back; read them once per kind
+            by_kind = {}
+            for doc in documents:
+                by_kind.setdefault(doc.kind, {})[doc.object_id] = doc
+            for kind, docs in by_kind.items():
+                ids = SearchDocument.objects.filter(kind=kind, object_id__in=docs).values_list('object_id', 'id')
+                for object_id, pk in ids:
+                    docs[object_id].id = pk
+            _fts_replace(documents)
+
+
+def index_object(instance):
+    index_objects([instance])
+
+
+def remove_object(instance):
+    kind = KINDS[type(instance)]
+    with transaction.atomic():
+        documents = SearchDocument.objects.filter(kind=kind, object_id=instance.pk)
+        _fts_delete(list(documents.values_list('id', flat=True)))
+        documents.delete()
+
+
+def clear_index():
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        if _uses_fts5():
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+
+def query_terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:MAX_QUERY_TERMS]
+
+
+def visible_documents(profile, user_role):
+    """Files readable by `user_role` plus the curricula and lesson plans owned by `profile`."""
+    if user_role == 'Admin':
+        visible = Q(kind='file')
+    else:
+        readable = FilePermission.objects.filter(role=user_role, can_read=True).values('file_id')
+        visible = Q(kind='file', object_id__in=readable)
+    if profile is not None:
+        visible |= Q(kind__in=['curriculum', 'lesson_plan'], user=profile)
+    return SearchDocument.objects.filter(visible)
+
+
+def make_snippet(body, terms):
+    """Window of `body` around the first matching term, for backends without a snippet function."""
+    lower = body.lower()
+    positions = [lower.find(term) for term in terms if term in lower]
+    start = max(0, min(positions) - SNIPPET_LENGTH // 4) if positions else 0
+    snippet = body[start:start + SNIPPET_LENGTH].strip()
+    if start > 0:
+        snippet = '…' + snippet
+    if start + SNIPPET_LENGTH < len(body):
+        snippet += '…'
+    return snippet
+
+
+def ranked(documents, terms):
+    """
+    Filter `documents` to those matching `terms` and annotate a `rank` (higher
+    is better), plus a `snippet` where the backend can build one.
+    """
+    if _uses_fts5():
+        match = ' '.join(f'"{term}"' for term in terms)
+        # Correlated on the document id, so each annotation reads one FTS row
+        fts_row = f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = api_searchdocument.id'
+        return documents.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            # bm25 is lower-is-better; title matches weigh more than body matches
+            rank=RawSQL(f'SELECT -bm25({FTS_TABLE}, 4.0, 1.0) {fts_row}', [match], output_field=FloatField()),
+            snippet=RawSQL(f"SELECT snippet({FTS_TABLE}, 1, '', '', '…', 32) {fts_row}", [match],
+                           output_field=CharField()),
+        ).only('kind', 'object_id', 'title')
+    if _uses_fulltext():
+        match = 'MATCH(api_searchdocument.title, api_searchdocument.body) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+        against = ' '.join(terms)
+        return documents.filter(RawSQL(match, [against], output_field=BooleanField())).annotate(
+            rank=RawSQL(match, [against], output_field=FloatField())
+        ).only('kind', 'object_id', 'title', 'body')
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return documents.annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def search(query, profile, user_role, kinds=None, limit=20):
+    """
+    Ranked search over the documents visible to the caller.
+
+    Uses FTS5 (bm25 ranking, native snippets) on SQLite and a FULLTEXT
+    natural-language match on MySQL; other backends fall back to a
+    substring filter without ranking.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    documents = visible_documents(profile, user_role)
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+
+    results = []
+    for doc in ranked(documents, terms).order_by('-rank', '-id')[:limit]:
+        snippet = getattr(doc, 'snippet', None)
+        if snippet is None:
+            snippet = make_snippet(doc.body, terms)
+        results.append({
+            'kind': doc.kind,
+            'id': doc.object_id,
+            'title': doc.title,
+            'snippet': snippet,
+            'rank': round(float(doc.rank), 4),
+        })
+    return results
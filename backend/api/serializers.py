@@ -1,5 +1,12 @@
 from rest_framework import serializers
-from .models import Profile, Curriculum, LessonPlan, Quiz, Question, File, ShareLink
+from .models import (Profile, Curriculum, LessonPlan, Quiz, Question, BankQuestion, File, ShareLink, GenerationJob,
+                     AuditEvent)
+from .versioning import build_version, record_version, version_summaries
+from .audit import log_event
+from .file_access import sync_permissions
+from .tagging import parse_tags, sync_tags
+from .dedup import index_questions, minhash
+from django.db import transaction
 from django.utils import timezone
 import logging
 
@@ -11,8 +18,18 @@ class ShareLinkSerializer(serializers.ModelSerializer):
         fields = ['link_id', 'expires_at', 'created_by', 'created_at']
         read_only_fields = ['created_at']
 
+def initial_version(file_id, data):
+    state = {
+        'name': data.get('name'),
+        'title': data.get('title', ''),
+        'type': data.get('type'),
+        'content': data.get('content', f"Mock content for {data.get('name')}")
+    }
+    return build_version(file_id, 1, state, 'Initial upload')
+
 class FileSerializer(serializers.ModelSerializer):
     share_links = ShareLinkSerializer(many=True, read_only=True)
+    history = serializers.SerializerMethodField()
     user = serializers.SlugRelatedField(
         slug_field='uid',
         queryset=Profile.objects.all(),
@@ -24,8 +41,8 @@ class FileSerializer(serializers.ModelSerializer):
         model = File
         fields = ['id', 'user', 'name', 'title', 'author', 'uploaded_by', 'date', 'file', 'permissions', 
                   'history', 'type', 'tags', 'content', 'course', 'department', 'semester', 'subject', 
-                  'class_name', 'category', 'audit_logs', 'share_links']
-        read_only_fields = ['date', 'history', 'audit_logs']
+                  'class_name', 'category', 'share_links']
+        read_only_fields = ['date']
         extra_kwargs = {
             'file': {'required': False, 'allow_null': True},
             'name': {'required': True},
@@ -34,39 +51,25 @@ class FileSerializer(serializers.ModelSerializer):
             'type': {'required': True},
         }
 
+    def get_history(self, obj):
+        return version_summaries(obj)
+
     def create(self, validated_data):
         logger.info(f"Creating File with data: {validated_data}")
         
-        # Handle tags
-        tags = validated_data.pop('tags', [])
-        if isinstance(tags, str):
-            tags = [tag.strip() for tag in tags.split(',')] if tags else []
-        validated_data['tags'] = tags
-
-        # Create history entry
-        history_entry = {
-            'version': 1,
-            'date': timezone.now().date().isoformat(),
-            'changes': 'Initial upload',
-            'state': {
-                'name': validated_data.get('name'),
-                'title': validated_data.get('title', ''),
-                'type': validated_data.get('type'),
-                'content': validated_data.get('content', f"Mock content for {validated_data.get('name')}")
-            }
-        }
-        validated_data['history'] = [history_entry]
+        validated_data['tags'] = parse_tags(validated_data.pop('tags', []))
 
-        # Create audit log
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': validated_data.get('uploaded_by', 'Unknown'),
-            'action': 'uploaded'
-        }
-        validated_data['audit_logs'] = [audit_log]
+        audit_user = validated_data.pop('audit_user', None) or validated_data.get('uploaded_by', 'Unknown')
 
         try:
-            file_instance = File.objects.create(**validated_data)
+            # Without its grant rows a file is invisible to everyone but Admin, so the file,
+            # first version, grants, tags and audit row commit together or not at all
+            with transaction.atomic():
+                file_instance = File.objects.create(**validated_data)
+                initial_version(file_instance.id, validated_data).save()
+                sync_permissions(file_instance)
+                sync_tags(file_instance)
+                log_event(file_instance.id, audit_user, 'uploaded')
             logger.info(f"File created with ID: {file_instance.id}")
             return file_instance
         except Exception as e:
@@ -76,68 +79,82 @@ class FileSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         logger.info(f"Updating File ID {instance.id} with data: {validated_data}")
         
-        # Handle tags
-        tags = validated_data.pop('tags', instance.tags)
-        if isinstance(tags, str):
-            tags = [tag.strip() for tag in tags.split(',')] if tags else instance.tags
-        validated_data['tags'] = tags
-
-        # Track changes for history and audit logs
-        changed_fields = [k for k in ['name', 'title', 'content', 'type'] if k in validated_data and validated_data[k] != getattr(instance, k)]
-        if changed_fields:
-            new_version = len(instance.history) + 1
-            history_entry = {
-                'version': new_version,
-                'date': timezone.now().date().isoformat(),
-                'changes': f'Updated to version {new_version}: {", ".join(changed_fields)}',
-                'state': {
+        validated_data['tags'] = parse_tags(validated_data.pop('tags', instance.tags), default=instance.tags)
+        tags_changed = validated_data['tags'] != instance.tags
+
+        audit_user = validated_data.pop('audit_user', None) or validated_data.get('uploaded_by', instance.uploaded_by)
+
+        # The version, audit row, field changes, grants and tags commit together
+        with transaction.atomic():
+            # Track changes for history and audit logs
+            changed_fields = [k for k in ['name', 'title', 'content', 'type'] if k in validated_data and validated_data[k] != getattr(instance, k)]
+            if changed_fields:
+                record_version(instance, {
                     'name': instance.name,
                     'title': instance.title,
                     'type': instance.type,
                     'content': instance.content
-                }
-            }
-            instance.history.append(history_entry)
-
-        # Create audit log for any changes
-        if changed_fields or validated_data.get('uploaded_by') != instance.uploaded_by or 'permissions' in validated_data:
-            audit_log = {
-                'timestamp': timezone.now().isoformat(),
-                'user': validated_data.get('uploaded_by', instance.uploaded_by),
-                'action': 'edited',
-                'changed_fields': changed_fields or ['permissions'] if 'permissions' in validated_data else []
-            }
-            instance.audit_logs.append(audit_log)
-
-        # Update instance fields
-        instance.name = validated_data.get('name', instance.name)
-        instance.title = validated_data.get('title', instance.title)
-        instance.author = validated_data.get('author', instance.author)
-        instance.uploaded_by = validated_data.get('uploaded_by', instance.uploaded_by)
-        instance.type = validated_data.get('type', instance.type)
-        instance.tags = validated_data.get('tags', instance.tags)
-        instance.content = validated_data.get('content', instance.content)
-        instance.course = validated_data.get('course', instance.course)
-        instance.department = validated_data.get('department', instance.department)
-        instance.semester = validated_data.get('semester', instance.semester)
-        instance.subject = validated_data.get('subject', instance.subject)
-        instance.class_name = validated_data.get('class_name', instance.class_name)
-        instance.category = validated_data.get('category', instance.category)
-        instance.permissions = validated_data.get('permissions', instance.permissions)
-        if 'file' in validated_data:
-            instance.file = validated_data.get('file')
+                }, f'Updated to version {{version}}: {", ".join(changed_fields)}')
+
+            # Create audit log for any changes
+            if changed_fields or validated_data.get('uploaded_by') != instance.uploaded_by or 'permissions' in validated_data:
+                log_event(
+                    instance.id,
+                    audit_user,
+                    'edited',
+                    changed_fields or (['permissions'] if 'permissions' in validated_data else [])
+                )
+
+            # Update instance fields
+            instance.name = validated_data.get('name', instance.name)
+            instance.title = validated_data.get('title', instance.title)
+            instance.author = validated_data.get('author', instance.author)
+            instance.uploaded_by = validated_data.get('uploaded_by', instance.uploaded_by)
+            instance.type = validated_data.get('type', instance.type)
+            instance.tags = validated_data.get('tags', instance.tags)
+            instance.content = validated_data.get('content', instance.content)
+            instance.course = validated_data.get('course', instance.course)
+            instance.department = validated_data.get('department', instance.department)
+            instance.semester = validated_data.get('semester', instance.semester)
+            instance.subject = validated_data.get('subject', instance.subject)
+            instance.class_name = validated_data.get('class_name', instance.class_name)
+            instance.category = validated_data.get('category', instance.category)
+            instance.permissions = validated_data.get('permissions', instance.permissions)
+            if 'file' in validated_data:
+                instance.file = validated_data.get('file')
+
+            try:
+                instance.save()
+                if 'permissions' in validated_data:
+                    sync_permissions(instance)
+                if tags_changed:
+                    sync_tags(instance)
+            except Exception as e:
+                logger.error(f"Failed to update File ID {instance.id}: {str(e)}")
+                raise serializers.ValidationError(f"Failed to update file: {str(e)}")
+        logger.info(f"File ID {instance.id} updated successfully")
+        return instance
+
+# Grid metadata only: no content, stored file path or permissions JSON (listings filter on FilePermission)
+FILE_SUMMARY_FIELDS = ['id', 'user', 'name', 'title', 'author', 'uploaded_by', 'date', 'type', 'tags', 'course',
+                       'department', 'semester', 'subject', 'class_name', 'category']
+
+class FileSummarySerializer(serializers.ModelSerializer):
+    """Metadata-only file representation for listings (no content, history or share links)."""
+    user = serializers.SlugRelatedField(slug_field='uid', read_only=True)
+
+    class Meta:
+        model = File
+        fields = FILE_SUMMARY_FIELDS
+        read_only_fields = FILE_SUMMARY_FIELDS
 
-        try:
-            instance.save()
-            logger.info(f"File ID {instance.id} updated successfully")
-            return instance
-        except Exception as e:
-            logger.error(f"Failed to update File ID {instance.id}: {str(e)}")
-            raise serializers.ValidationError(f"Failed to update file: {str(e)}")
 class ProfileSerializer(serializers.ModelSerializer):
+    # Resized avatars (thumbnail, medium and their _webp twins); empty until the image worker has run
+    profile_image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
-        fields = ['uid', 'first_name', 'last_name', 'email', 'phone_number', 'dob', 'qualification', 'address', 'bio', 'role', 'profile_image']
+        fields = ['uid', 'first_name', 'last_name', 'email', 'phone_number', 'dob', 'qualification', 'address', 'bio', 'role', 'profile_image', 'profile_image_variants']
         read_only_fields = ['created_at']
         extra_kwargs = {
             'first_name': {'required': True},
@@ -147,14 +164,21 @@ class ProfileSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         uid = validated_data.get('uid')
-        try:
-            profile = Profile.objects.get(uid=uid)
+        # A locked fresh row, never the cached copy: saving a stale profile loses other writes
+        with transaction.atomic():
+            profile = Profile.objects.select_for_update().filter(uid=uid).first()
+            if profile is None:
+                return Profile.objects.create(**validated_data)
             for attr, value in validated_data.items():
                 setattr(profile, attr, value)
             profile.save()
             return profile
-        except Profile.DoesNotExist:
-            return Profile.objects.create(**validated_data)
+
+    def get_profile_image_variants(self, obj):
+        if not obj.profile_image:
+            return {}
+        storage = obj.profile_image.storage
+        return {variant: storage.url(name) for variant, name in obj.image_variants.items()}
 
 
 class CurriculumSerializer(serializers.ModelSerializer):
@@ -180,11 +204,19 @@ class LessonPlanSerializer(serializers.ModelSerializer):
         return obj.user.email if obj.user else None
 
 class QuestionSerializer(serializers.ModelSerializer):
-    correct_answer = serializers.CharField(source='correct_answer')
+    # Writable on update so QuizSerializer can match incoming questions to existing rows (read-only on create)
+    id = serializers.IntegerField(required=False)
+    correct_answer = serializers.CharField()
+    # Sent back by clients saving questions from /api/generate-quiz/; kept only while the text is the bank's
+    bank_question = serializers.IntegerField(source='bank_question_id', required=False, allow_null=True)
 
     class Meta:
         model = Question
-        fields = ['id', 'text', 'type', 'options', 'correct_answer', 'explanation']
+        fields = ['id', 'text', 'type', 'options', 'correct_answer', 'explanation', 'bank_question', 'duplicate_of',
+                  'duplicate_score']
+        read_only_fields = ['duplicate_of', 'duplicate_score']
+
+QUESTION_FIELDS = ['text', 'type', 'options', 'correct_answer', 'explanation', 'position', 'minhash', 'bank_question']
 
 class QuizSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True)
@@ -193,11 +225,23 @@ class QuizSerializer(serializers.ModelSerializer):
         model = Quiz
         fields = ['id', 'title', 'mode', 'difficulty', 'created_at', 'questions']
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is None:
+            # Question ids only ever match rows of the quiz being updated; a new quiz takes none
+            fields['questions'].child.fields['id'].read_only = True
+        return fields
+
     def create(self, validated_data):
         questions_data = validated_data.pop('questions')
-        quiz = Quiz.objects.create(**validated_data)
-        for question_data in questions_data:
-            Question.objects.create(quiz=quiz, **question_data)
+        values = _check_bank_sources([_question_values(question_data) for question_data in questions_data])
+        with transaction.atomic():
+            quiz = Quiz.objects.create(**validated_data)
+            questions = Question.objects.bulk_create([
+                Question(quiz=quiz, position=position, minhash=minhash(question_values['text']), **question_values)
+                for position, question_values in enumerate(values)
+            ])
+            index_questions(_with_ids(quiz, questions))
         return quiz
 
     def update(self, instance, validated_data):
@@ -205,11 +249,84 @@ class QuizSerializer(serializers.ModelSerializer):
         instance.title = validated_data.get('title', instance.title)
         instance.mode = validated_data.get('mode', instance.mode)
         instance.difficulty = validated_data.get('difficulty', instance.difficulty)
-        instance.save()
 
-        if questions_data is not None:
-            instance.questions.all().delete()
-            for question_data in questions_data:
-                Question.objects.create(quiz=instance, **question_data)
+        with transaction.atomic():
+            instance.save()
+            if questions_data is not None:
+                _sync_questions(instance, questions_data)
+
+        return instance
+
+def _question_values(question_data):
+    return {key: value for key, value in question_data.items() if key != 'id'}
+
+def _check_bank_sources(rows):
+    """Drop the bank_question link of question values whose text is not that bank question's text."""
+    ids = {values.get('bank_question_id') for values in rows} - {None}
+    texts = dict(BankQuestion.objects.filter(id__in=ids).values_list('id', 'text')) if ids else {}
+    for values in rows:
+        if values.get('bank_question_id') is not None and texts.get(values['bank_question_id']) != values['text']:
+            values['bank_question_id'] = None
+    return rows
 
-        return instance
\ No newline at end of file
+def _with_ids(quiz, questions):
+    """Bulk-created questions with their primary keys, reloaded on backends that do not return them."""
+    if all(question.pk is not None for question in questions):
+        return questions
+    return list(Question.objects.filter(quiz=quiz, position__in=[q.position for q in questions]))
+
+def _sync_questions(quiz, questions_data):
+    """
+    Diff incoming questions against the stored ones by id: one bulk UPDATE for
+    changed rows, one bulk INSERT for new ones and one DELETE for the rest.
+    New and re-worded questions are then checked for near-duplicates.
+    """
+    existing = {question.id: question for question in quiz.questions.all()}
+    rows = []
+    for position, question_data in enumerate(questions_data):
+        values = dict(_question_values(question_data), position=position)
+        question = existing.get(question_data.get('id'))
+        if question is not None and 'bank_question_id' not in values:
+            values['bank_question_id'] = question.bank_question_id
+        rows.append((question, values))
+    _check_bank_sources([values for _, values in rows])
+
+    changed, created, reworded, kept = [], [], [], set()
+    for question, values in rows:
+        if question is None or question.id in kept:
+            created.append(Question(quiz=quiz, minhash=minhash(values['text']), **values))
+            continue
+        kept.add(question.id)
+        if any(getattr(question, field) != value for field, value in values.items()):
+            if question.text != values['text']:
+                question.minhash = minhash(values['text'])
+                reworded.append(question)
+            for field, value in values.items():
+                setattr(question, field, value)
+            changed.append(question)
+
+    removed = set(existing) - kept
+    if removed:
+        Question.objects.filter(quiz=quiz, id__in=removed).delete()
+    if changed:
+        Question.objects.bulk_update(changed, QUESTION_FIELDS)
+    if created:
+        created = _with_ids(quiz, Question.objects.bulk_create(created))
+    if reworded or created:
+        index_questions(reworded + created, replace=bool(reworded))
+    if hasattr(quiz, '_prefetched_objects_cache'):
+        quiz._prefetched_objects_cache.pop('questions', None)
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenerationJob
+        fields = ['job_id', 'kind', 'status', 'attempts', 'error', 'curriculum', 'lesson_plan', 'file',
+                  'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = ['id', 'timestamp', 'user', 'action', 'changed_fields']
+        read_only_fields = fields
@@ -0,0 +1,52 @@
+import logging
+from django.db.models.signals import post_save, post_delete
+from .models import File, Curriculum, LessonPlan, Profile, Quiz, ShareLink, FileVersion
+from .search import INDEXED_FIELDS, index_object, remove_object
+from .profile_cache import invalidate_profile
+from .conditional import touch_collection
+
+logger = logging.getLogger(__name__)
+
+
+def update_search_document(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & INDEXED_FIELDS[sender]:
+        return
+    index_object(instance)
+
+
+def delete_search_document(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+def profile_deleted(sender, instance, **kwargs):
+    invalidate_profile(instance.uid)
+
+
+def user_collection_changed(sender, instance, raw=False, **kwargs):
+    if not raw and instance.user_id:
+        touch_collection(sender._meta.model_name, instance.user_id)
+
+
+def collection_changed(sender, instance, raw=False, **kwargs):
+    # Files (with their share links and history) and quizzes validate as one collection each:
+    # a listing depends on every file's permissions, and duplicate flags cross quizzes.
+    # The 'files' version also keys the cached facet counts (api.facets)
+    if not raw:
+        touch_collection('quizzes' if sender is Quiz else 'files')
+
+
+post_delete.connect(profile_deleted, sender=Profile, dispatch_uid='profile-cache-delete')
+
+for model in (Curriculum, LessonPlan):
+    post_save.connect(user_collection_changed, sender=model, dispatch_uid=f'version-save-{model.__name__}')
+    post_delete.connect(user_collection_changed, sender=model, dispatch_uid=f'version-delete-{model.__name__}')
+
+for model in (File, ShareLink, FileVersion, Quiz):
+    post_save.connect(collection_changed, sender=model, dispatch_uid=f'version-save-{model.__name__}')
+    post_delete.connect(collection_changed, sender=model, dispatch_uid=f'version-delete-{model.__name__}')
+
+for model in (File, Curriculum, LessonPlan):
+    post_save.connect(update_search_document, sender=model, dispatch_uid=f'search-save-{model.__name__}')
+    post_delete.connect(delete_search_document, sender=model, dispatch_uid=f'search-delete-{model.__name__}')
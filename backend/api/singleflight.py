@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import GenerationLock
+
+logger = logging.getLogger(__name__)
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _acquire_db_lock(key, owner):
+    now = timezone.now()
+    GenerationLock.objects.filter(key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            GenerationLock.objects.create(
+                key=key,
+                owner=owner,
+                expires_at=now + timedelta(seconds=getattr(settings, 'GENERATION_LOCK_TTL', 120))
+            )
+        return True
+    except IntegrityError:
+        return False
+
+
+def _release_db_lock(key, owner):
+    GenerationLock.objects.filter(key=key, owner=owner).delete()
+
+
+def _run_with_db_lock(key, compute, lookup):
+    """
+    Run `compute` while holding the database lock row for `key`.
+
+    If another process holds it, poll `lookup` until that process has stored
+    its result; if it gives up (lock released without a result) or the wait
+    exceeds GENERATION_LOCK_TTL, take over and compute locally.
+    Returns (result, computed_here).
+    """
+    owner = uuid.uuid4().hex
+    poll_interval = getattr(settings, 'GENERATION_LOCK_POLL_INTERVAL', 0.25)
+    give_up_at = time.monotonic() + getattr(settings, 'GENERATION_LOCK_TTL', 120)
+    while True:
+        if _acquire_db_lock(key, owner):
+            try:
+                # The previous holder may have finished between our cache miss and now
+                result = lookup()
+                if result is not None:
+                    return result, False
+                return compute(), True
+            finally:
+                _release_db_lock(key, owner)
+
+        result = lookup()
+        if result is not None:
+            logger.info(f"Joined in-flight generation {key[:12]} from another process")
+            return result, False
+        if time.monotonic() >= give_up_at:
+            logger.warning(f"Timed out waiting for in-flight generation {key[:12]}, generating locally")
+            return compute(), True
+        time.sleep(poll_interval)
+
+
+def single_flight(key, compute, lookup):
+    """
+    Coalesce concurrent calls for the same key into one `compute()`.
+
+    Threads in this process wait on the leader's result directly; other
+    processes are serialized through a GenerationLock row and read the
+    leader's result back through `lookup()` (the generation cache).
+    Returns (result, computed_here).
+    """
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+
+    if not leader:
+        if call.event.wait(getattr(settings, 'GENERATION_LOCK_TTL', 120)):
+            if call.error is not None:
+                raise call.error
+            logger.info(f"Joined in-flight generation {key[:12]}")
+            return call.result, False
+        return compute(), True
+
+    try:
+        call.result, computed = _run_with_db_lock(key, compute, lookup)
+        return call.result, computed
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.event.set()
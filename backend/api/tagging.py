@@ -0,0 +1,71 @@
+import logging
+from django.db import transaction
+from django.db.models import Count
+from .models import Tag, FileTag
+
+logger = logging.getLogger(__name__)
+
+
+def parse_tags(value, default=None):
+    """
+    Normalize tags given as a list or a comma-separated string.
+
+    Blank entries and case-insensitive duplicates are dropped; an empty string
+    (or None) yields `default`.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return list(default or [])
+    if isinstance(value, str):
+        value = value.split(',')
+    tags = []
+    seen = set()
+    for tag in value:
+        tag = str(tag).strip()
+        if tag and tag.lower() not in seen:
+            seen.add(tag.lower())
+            tags.append(tag)
+    return tags
+
+
+def tag_names(tags):
+    """Index keys (lower-cased, max 100 chars) for a list of tags."""
+    return list(dict.fromkeys(str(tag).strip().lower()[:100] for tag in tags if str(tag).strip()))
+
+
+def sync_tags(file):
+    """
+    Make the FileTag rows of `file` match its tags JSON. Like sync_permissions,
+    call it in the transaction that saved `file`.
+    """
+    names = tag_names(file.tags if isinstance(file.tags, list) else [])
+    with transaction.atomic():
+        if names:
+            Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        tag_ids = set(Tag.objects.filter(name__in=names).values_list('id', flat=True)) if names else set()
+        current = set(FileTag.objects.filter(file_id=file.id).values_list('tag_id', flat=True))
+        if current - tag_ids:
+            FileTag.objects.filter(file_id=file.id, tag_id__in=current - tag_ids).delete()
+        FileTag.objects.bulk_create([FileTag(file_id=file.id, tag_id=tag_id) for tag_id in tag_ids - current])
+
+
+def filter_by_tags(queryset, tags, match_all=False):
+    """
+    Restrict a File queryset to files having any (or, with `match_all`, every)
+    of `tags`, resolved through the (tag, file) index.
+    """
+    names = tag_names(tags)
+    if not names:
+        return queryset
+    links = FileTag.objects.filter(tag__name__in=names).values('file_id')
+    if match_all and len(names) > 1:
+        links = links.annotate(matched=Count('tag_id')).filter(matched=len(names)).values('file_id')
+    return queryset.filter(id__in=links)
+
+
+def tag_counts(files):
+    """[{'tag', 'count'}] for a File queryset, computed in one grouped query."""
+    rows = (FileTag.objects.filter(file__in=files)
+            .values('tag__name')
+            .annotate(count=Count('file_id'))
+            .order_by('-count', 'tag__name'))
+    return [{'tag': row['tag__name'], 'count': row['count']} for row in rows]
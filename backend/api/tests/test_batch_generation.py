@@ -0,0 +1,75 @@
+from collections import Counter
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from api import generation, search, signals
+from api.generation import run_batch_generation
+from api.models import AuditEvent, Curriculum, File, FilePermission, FileVersion, LessonPlan, Profile
+
+ITEMS = [
+    ('custom_curriculum', {'degree': 'BSc', 'subject': 'Physics', 'topics': 'Optics'}),
+    ('lesson_plan', {'subject': 'Biology', 'topics': 'Cells', 'grade_level': '9', 'duration': '1 hour'}),
+    ('standard_curriculum', {'degree': 'MSc', 'subject': 'Chemistry'}),
+    ('lesson_plan', {'subject': 'History', 'topics': 'Rome', 'grade_level': '7', 'duration': '2 hours'}),
+]
+
+
+def fake_generate(kind, params, use_cache=True):
+    if params.get('subject') == 'History':
+        raise RuntimeError('upstream exploded')
+    return f"{kind} about {params['subject']}", params['subject'] == 'Physics'
+
+
+class BatchGenerationTests(TestCase):
+    def setUp(self):
+        self.profile = Profile.objects.create(uid='batch', first_name='Batch', email='batch@example.com')
+        patcher = mock.patch('api.generation.generate_content', side_effect=fake_generate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_batch(self, bulk_insert_returns_rows):
+        indexed = Counter()
+
+        def count(instances):
+            indexed.update((type(instance).__name__, instance.pk) for instance in instances)
+
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=bulk_insert_returns_rows), \
+                mock.patch.object(generation, 'index_objects', side_effect=count), \
+                mock.patch.object(signals, 'index_object', side_effect=lambda instance: count([instance])):
+            results = run_batch_generation(self.profile, ITEMS, concurrency=2)
+        return results, indexed
+
+    def assert_results(self, results, indexed):
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+        self.assertEqual([result['status'] for result in results], ['success', 'success', 'success', 'error'])
+        self.assertEqual(results[3]['error'], 'upstream exploded')
+        self.assertEqual([result['cached'] for result in results[:3]], [True, False, False])
+
+        curricula = Curriculum.objects.filter(user=self.profile)
+        lesson_plans = LessonPlan.objects.filter(user=self.profile)
+        files = File.objects.filter(user=self.profile)
+        self.assertEqual(set(curricula.values_list('id', flat=True)), {results[0]['id'], results[2]['id']})
+        self.assertEqual(list(lesson_plans.values_list('id', flat=True)), [results[1]['id']])
+        self.assertEqual(set(files.values_list('id', flat=True)), {result['file_id'] for result in results[:3]})
+        self.assertEqual(curricula.get(id=results[0]['id']).generated_content, 'custom_curriculum about Physics')
+        for model in (FileVersion, AuditEvent):
+            self.assertEqual(model.objects.filter(file__in=files).count(), 3)
+        self.assertTrue(FilePermission.objects.filter(file__in=files).exists())
+
+        # Every saved object is indexed exactly once, whichever path saved it
+        expected = {('Curriculum', results[0]['id']), ('LessonPlan', results[1]['id']),
+                    ('Curriculum', results[2]['id'])} | {('File', result['file_id']) for result in results[:3]}
+        self.assertEqual(indexed, Counter(expected))
+
+    def test_bulk_insert(self):
+        self.assert_results(*self.run_batch(True))
+
+    def test_per_row_fallback_without_returning_bulk_inserts(self):
+        self.assert_results(*self.run_batch(False))
+
+    def test_search_documents_are_written(self):
+        results = run_batch_generation(self.profile, ITEMS[:2])
+        documents = set(search.SearchDocument.objects.values_list('kind', 'object_id'))
+        self.assertTrue({('curriculum', results[0]['id']), ('lesson_plan', results[1]['id']),
+                         ('file', results[0]['file_id'])} <= documents)
@@ -0,0 +1,93 @@
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.conditional import PENDING_ATTR, collection_versions, touch_collection
+from api.file_access import sync_permissions
+from api.models import File, Quiz
+
+READABLE = {'Student': {'read': True}, 'Teacher': {'read': True}}
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_quiz(self, title='Cells'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Quiz.objects.create(title=title, mode='quiz')
+
+    def test_matching_etag_gets_304_without_querying_the_collection(self):
+        self.create_quiz()
+        response = self.client.get('/api/quizzes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/quizzes/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertFalse([q for q in queries.captured_queries if 'api_quiz' in q['sql']])
+
+        # Each URL validates separately
+        other = self.client.get('/api/quizzes/?page_size=1', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other.status_code, 200)
+
+    def test_write_invalidates_once_the_transaction_commits(self):
+        etag = self.client.get('/api/quizzes/')['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            Quiz.objects.create(title='First', mode='quiz')
+            Quiz.objects.create(title='Second', mode='quiz')
+            # Not committed yet: the old version still validates
+            self.assertEqual(self.client.get('/api/quizzes/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        flushes = [callback for callback in callbacks if getattr(callback, '__name__', '') == 'flush']
+        self.assertEqual(len(flushes), 1)
+        flushes[0]()
+        response = self.client.get('/api/quizzes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_rolled_back_savepoint_starts_a_new_batch(self):
+        before = collection_versions(('quizzes',), ('files',))
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    touch_collection('quizzes')
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+            self.assertFalse(connection.run_on_commit)
+            touch_collection('files')
+            self.assertEqual(getattr(connection, PENDING_ATTR).keys, {'collection_version:files'})
+        after = collection_versions(('quizzes',), ('files',))
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_file_grants_invalidate_the_file_listing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            file = File.objects.create(name='notes.txt', uploaded_by='Teacher', type='txt', permissions=READABLE)
+            sync_permissions(file)
+        etag = self.client.get('/api/files/?user_role=Student')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            file.permissions = {'Student': {'read': False}}
+            file.save()
+            sync_permissions(file)
+        response = self.client.get('/api/files/?user_role=Student', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    @override_settings(RESPONSE_COMPRESSION_MIN_SIZE=10)
+    def test_compressed_response_has_a_weak_etag_that_still_validates(self):
+        for i in range(5):
+            self.create_quiz(f'Quiz {i}')
+        plain = self.client.get('/api/quizzes/')
+        compressed = self.client.get('/api/quizzes/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['ETag'], 'W/' + plain['ETag'])
+        self.assertFalse(plain['ETag'].startswith('W/'))
+
+        revalidated = self.client.get('/api/quizzes/', HTTP_ACCEPT_ENCODING='gzip',
+                                      HTTP_IF_NONE_MATCH=compressed['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
@@ -0,0 +1,129 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from api.dedup import (LSH_BANDS, NUM_PERMUTATIONS, band_keys, duplicate_clusters, index_questions, minhash,
+                       shingles, similarity)
+from api.models import BankQuestion, Question, QuestionBucket, Quiz
+
+PHOTOSYNTHESIS = 'Which organelle in a plant cell is responsible for carrying out photosynthesis?'
+PHOTOSYNTHESIS_REWORDED = 'Which organelle in the plant cell is responsible for carrying out photosynthesis?'
+MITOSIS = 'During which phase of mitosis do the sister chromatids separate and move to opposite poles?'
+MITOSIS_REWORDED = 'During which phase of mitosis do sister chromatids separate and move to opposite poles?'
+UNRELATED = [
+    'What is the capital city of Australia and when was it founded?',
+    'Solve for x in the equation 3x + 7 = 22 and show your working.',
+    'Name the author of the novel Pride and Prejudice published in 1813.',
+]
+
+
+class SignatureTests(SimpleTestCase):
+    def test_shingles_ignore_case_punctuation_and_spacing(self):
+        self.assertEqual(shingles('Hello,   World!'), shingles('hello world'))
+        self.assertEqual(shingles('abc'), {'abc'})
+        self.assertEqual(shingles(' ?! '), set())
+
+    def test_minhash_is_deterministic(self):
+        signature = minhash(PHOTOSYNTHESIS)
+        self.assertEqual(len(signature), NUM_PERMUTATIONS)
+        self.assertEqual(signature, minhash(PHOTOSYNTHESIS.upper()))
+        self.assertIsNone(minhash(''))
+
+    def test_similarity_estimates(self):
+        self.assertEqual(similarity(minhash(MITOSIS), minhash(MITOSIS)), 1.0)
+        self.assertGreaterEqual(similarity(minhash(MITOSIS), minhash(MITOSIS_REWORDED)), 0.8)
+        for text in UNRELATED:
+            self.assertLess(similarity(minhash(MITOSIS), minhash(text)), 0.3)
+        self.assertEqual(similarity(minhash(MITOSIS), None), 0.0)
+        self.assertEqual(similarity(minhash(MITOSIS), [1, 2, 3]), 0.0)
+
+    def test_near_duplicates_share_a_band_and_unrelated_texts_do_not(self):
+        keys = set(band_keys(minhash(PHOTOSYNTHESIS)))
+        self.assertEqual(len(band_keys(minhash(PHOTOSYNTHESIS))), LSH_BANDS)
+        self.assertTrue(keys & set(band_keys(minhash(PHOTOSYNTHESIS_REWORDED))))
+        for text in [MITOSIS] + UNRELATED:
+            with self.subTest(text=text):
+                self.assertFalse(keys & set(band_keys(minhash(text))))
+
+    def test_identical_bands_at_different_positions_get_different_keys(self):
+        signature = [7] * NUM_PERMUTATIONS
+        self.assertEqual(len(set(band_keys(signature))), LSH_BANDS)
+
+
+class IndexTests(TestCase):
+    def setUp(self):
+        self.quiz = Quiz.objects.create(title='Biology', mode='quiz')
+
+    def add(self, *texts, **extra):
+        questions = Question.objects.bulk_create([
+            Question(quiz=self.quiz, text=text, type='shortanswer', correct_answer='-', explanation='-',
+                     minhash=minhash(text), **extra)
+            for text in texts
+        ])
+        index_questions(questions)
+        return questions
+
+    def reword(self, question, text):
+        question.text = text
+        question.minhash = minhash(text)
+        question.save(update_fields=['text', 'minhash'])
+        return index_questions([question], replace=True)
+
+    def test_newer_near_duplicate_is_flagged_against_the_older_question(self):
+        original, = self.add(PHOTOSYNTHESIS)
+        copy, other = self.add(PHOTOSYNTHESIS_REWORDED, UNRELATED[0])
+
+        copy.refresh_from_db()
+        other.refresh_from_db()
+        original.refresh_from_db()
+        self.assertEqual(copy.duplicate_of_id, original.id)
+        self.assertGreaterEqual(copy.duplicate_score, 0.8)
+        self.assertIsNone(original.duplicate_of_id)
+        self.assertIsNone(other.duplicate_of_id)
+        self.assertEqual(QuestionBucket.objects.filter(question=copy).count(), LSH_BANDS)
+
+    def test_rewording_recomputes_flags_and_those_of_dependents(self):
+        original, = self.add(MITOSIS)
+        copy, = self.add(MITOSIS_REWORDED)
+
+        self.reword(copy, UNRELATED[1])
+        copy.refresh_from_db()
+        self.assertIsNone(copy.duplicate_of_id)
+
+        self.reword(copy, MITOSIS_REWORDED)
+        self.reword(original, UNRELATED[2])
+        copy.refresh_from_db()
+        self.assertIsNone(copy.duplicate_of_id)
+        self.assertIsNone(copy.duplicate_score)
+
+    def test_bank_questions_get_no_buckets_and_are_never_flagged(self):
+        self.add(PHOTOSYNTHESIS)
+        bank = BankQuestion.objects.create(bank_key='k', topic='Plants', type='shortanswer', difficulty='Medium',
+                                           text=PHOTOSYNTHESIS_REWORDED, text_hash='h', correct_answer='-',
+                                           explanation='-')
+        reused, = self.add(PHOTOSYNTHESIS_REWORDED, bank_question=bank)
+
+        reused.refresh_from_db()
+        self.assertIsNone(reused.duplicate_of_id)
+        self.assertFalse(QuestionBucket.objects.filter(question=reused).exists())
+
+    def test_duplicate_clusters_group_near_duplicates_only(self):
+        photosynthesis = self.add(PHOTOSYNTHESIS, PHOTOSYNTHESIS_REWORDED, PHOTOSYNTHESIS + '  ')
+        mitosis = self.add(MITOSIS, MITOSIS_REWORDED)
+        self.add(*UNRELATED)
+
+        clusters = duplicate_clusters(0.8)
+        self.assertEqual([ids for ids, _ in clusters],
+                         [sorted(q.id for q in photosynthesis), sorted(q.id for q in mitosis)])
+        for _, score in clusters:
+            self.assertGreaterEqual(score, 0.8)
+        self.assertEqual(duplicate_clusters(1.01), [])
+
+    def test_reindex_command(self):
+        self.add(MITOSIS, MITOSIS_REWORDED)
+        QuestionBucket.objects.all().delete()
+        Question.objects.update(minhash=None, duplicate_of=None, duplicate_score=None)
+
+        out = StringIO()
+        call_command('question_duplicates', '--reindex', '--batch-size', '1', stdout=out)
+        self.assertIn('1 flagged as near-duplicates', out.getvalue())
+        self.assertIn('1 group(s), 1 redundant question(s)', out.getvalue())
@@ -0,0 +1,39 @@
+from django.test import TestCase
+from api.facets import compute_facets
+from api.file_access import sync_permissions
+from api.file_filters import filtered_files
+from api.models import File
+
+READABLE = {'Student': {'read': True}, 'Teacher': {'read': True}}
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, subject, semester in [('a.txt', 'Math', 'Fall'), ('b.txt', 'math', 'Fall'),
+                                        ('c.txt', 'MATH', 'Spring'), ('d.txt', 'Physics', 'fall')]:
+            file = File.objects.create(name=name, uploaded_by='Teacher', type='txt', subject=subject,
+                                       semester=semester, permissions=READABLE)
+            sync_permissions(file)
+
+    def counts(self, facets, field):
+        return {entry['value'].casefold(): entry['count'] for entry in facets['facets'][field]}
+
+    def test_values_differing_only_in_case_are_one_facet(self):
+        facets = compute_facets({}, 'Student')
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(len(facets['facets']['subject']), 2)
+        self.assertEqual(self.counts(facets, 'subject'), {'math': 3, 'physics': 1})
+        self.assertIn(facets['facets']['subject'][0]['value'], {'Math', 'math', 'MATH'})
+        self.assertEqual(self.counts(facets, 'semester'), {'fall': 3, 'spring': 1})
+
+    def test_counts_agree_with_the_case_insensitive_listing(self):
+        params = {'subject': 'math'}
+        facets = compute_facets(params, 'Student')
+        self.assertEqual(facets['total'], filtered_files(params, 'Student').count())
+        # The subject dimension ignores its own filter; the others are narrowed by it
+        self.assertEqual(self.counts(facets, 'subject'), {'math': 3, 'physics': 1})
+        self.assertEqual(self.counts(facets, 'semester'), {'fall': 2, 'spring': 1})
+        for entry in facets['facets']['semester']:
+            selected = dict(params, semester=entry['value'])
+            self.assertEqual(filtered_files(selected, 'Student').count(), entry['count'])
@@ -0,0 +1,44 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from api.file_access import readable_by, sync_permissions
+from api.models import File, FilePermission
+
+
+class FileAccessTests(TestCase):
+    def create(self, name, permissions):
+        file = File.objects.create(name=name, uploaded_by='Teacher', type='txt', permissions=permissions)
+        sync_permissions(file)
+        return file
+
+    def test_readable_by_uses_the_permission_rows(self):
+        shared = self.create('shared.txt', {'Student': {'read': True}, 'Teacher': {'read': True, 'write': True}})
+        private = self.create('private.txt', {'Student': {'read': False}, 'Teacher': {'read': True}})
+        self.create('admin.txt', {})
+
+        self.assertEqual(list(readable_by(File.objects.all(), 'Student')), [shared])
+        self.assertEqual(set(readable_by(File.objects.all(), 'Teacher')), {shared, private})
+        self.assertEqual(readable_by(File.objects.all(), 'Admin').count(), 3)
+
+        private.permissions = {'Student': {'read': True}}
+        sync_permissions(private)
+        self.assertEqual(set(readable_by(File.objects.all(), 'Student')), {shared, private})
+        self.assertFalse(FilePermission.objects.filter(file=private, role='Teacher').exists())
+
+    def test_benchmark_removes_its_rows_without_per_row_signals(self):
+        kept = self.create('kept.txt', {'Student': {'read': True}})
+        deleted = []
+
+        def record(sender, instance, **kwargs):
+            deleted.append(instance.pk)
+
+        post_delete.connect(record, sender=File)
+        self.addCleanup(post_delete.disconnect, record, sender=File)
+        out = StringIO()
+        call_command('benchmark_file_permissions', '--files', '30', '--batch-size', '7', '--repeat', '1', stdout=out)
+
+        self.assertIn('Removed 30 benchmark files', out.getvalue())
+        self.assertEqual(deleted, [])
+        self.assertEqual(list(File.objects.all()), [kept])
+        self.assertEqual(list(FilePermission.objects.values_list('file_id', flat=True)), [kept.id])
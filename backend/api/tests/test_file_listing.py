@@ -0,0 +1,39 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.file_access import sync_permissions
+from api.models import File, Profile
+from api.serializers import FILE_SUMMARY_FIELDS
+
+
+class FileSummaryListingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profile = Profile.objects.create(uid='owner', first_name='Owner', email='owner@example.com')
+        for i in range(3):
+            file = File.objects.create(user=profile, name=f'notes-{i}.txt', uploaded_by='Teacher', type='txt',
+                                       content='x' * 1000, tags=['physics'])
+            sync_permissions(file)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_summary_fetches_metadata_columns_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/files/?view=summary&user_role=Teacher')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual(set(results[0]), set(FILE_SUMMARY_FIELDS))
+        self.assertEqual(results[0]['user'], 'owner')
+        file_queries = [query['sql'] for query in queries.captured_queries if 'FROM "api_file"' in query['sql']]
+        self.assertEqual(len(file_queries), 1)
+        for column in ('content', 'permissions', 'file'):
+            self.assertNotIn(f'"api_file"."{column}"', file_queries[0])
+
+    def test_full_listing_keeps_the_heavy_fields(self):
+        results = self.client.get('/api/files/?user_role=Teacher').json()['results']
+        self.assertEqual(results[0]['content'], 'x' * 1000)
+        self.assertIn('permissions', results[0])
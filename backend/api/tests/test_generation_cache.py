@@ -0,0 +1,71 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from api import generation
+from api.generation import (evict_cache_entries, get_cached_completion, make_cache_key, maybe_evict_cache_entries,
+                            store_completion)
+from api.models import GenerationCache
+
+
+def user_message(content):
+    return [{'role': 'system', 'content': 'You are a helpful assistant.'}, {'role': 'user', 'content': content}]
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_whitespace_differences_share_a_key(self):
+        self.assertEqual(make_cache_key(user_message('Generate  a curriculum\n for Physics ')),
+                         make_cache_key(user_message('Generate a curriculum for Physics')))
+
+    def test_case_and_parameters_change_the_key(self):
+        key = make_cache_key(user_message('Explain the SQL keyword IN'))
+        self.assertNotEqual(key, make_cache_key(user_message('Explain the SQL keyword in')))
+        self.assertNotEqual(key, make_cache_key(user_message('Explain the SQL keyword IN'), model='other'))
+        self.assertNotEqual(key, make_cache_key(user_message('Explain the SQL keyword IN'), max_tokens=10))
+        self.assertNotEqual(key, make_cache_key(user_message('Explain the SQL keyword IN'), temperature=0.2))
+        self.assertNotEqual(key, make_cache_key([{'role': 'user', 'content': 'Explain the SQL keyword IN'}]))
+
+
+@override_settings(GENERATION_CACHE_TTL=60, GENERATION_CACHE_MAX_ENTRIES=3, GENERATION_CACHE_EVICT_INTERVAL=300)
+class CacheStoreTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(generation, '_last_eviction', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def store(self, prompt):
+        key = make_cache_key(user_message(prompt))
+        store_completion(key, user_message(prompt), f'answer to {prompt}')
+        return key
+
+    def test_hit_updates_usage(self):
+        key = self.store('photosynthesis')
+        self.assertEqual(get_cached_completion(key), 'answer to photosynthesis')
+        self.assertEqual(GenerationCache.objects.get(key=key).hit_count, 1)
+        self.assertIsNone(get_cached_completion(make_cache_key(user_message('mitosis'))))
+
+    def test_expired_entries_are_not_returned_and_are_evicted(self):
+        key = self.store('photosynthesis')
+        GenerationCache.objects.filter(key=key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(get_cached_completion(key))
+        evict_cache_entries()
+        self.assertFalse(GenerationCache.objects.filter(key=key).exists())
+
+    def test_least_recently_used_entries_are_evicted_above_the_limit(self):
+        keys = [self.store(prompt) for prompt in ('a', 'b', 'c', 'd', 'e')]
+        base = timezone.now() - timedelta(minutes=10)
+        for minutes, key in enumerate(keys):
+            GenerationCache.objects.filter(key=key).update(last_used_at=base + timedelta(minutes=minutes))
+        get_cached_completion(keys[0])
+
+        evict_cache_entries()
+        self.assertEqual(set(GenerationCache.objects.values_list('key', flat=True)), {keys[0], keys[3], keys[4]})
+
+    def test_eviction_runs_at_most_once_per_interval(self):
+        with mock.patch.object(generation, 'evict_cache_entries') as evict:
+            for prompt in ('a', 'b', 'c'):
+                self.store(prompt)
+            self.assertEqual(evict.call_count, 1)
+            with mock.patch.object(generation.time, 'monotonic', return_value=generation._last_eviction + 301):
+                self.assertTrue(maybe_evict_cache_entries())
+            self.assertEqual(evict.call_count, 2)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest import mock
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+from api.jobs import claim_jobs, execute_job, requeue_stale_jobs
+from api.models import Curriculum, File, GenerationJob, Profile
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.profile = Profile.objects.create(uid='worker', first_name='Work', email='worker@example.com')
+        # Test transactions cannot survive close_old_connections(); real workers run in autocommit
+        patcher = mock.patch('api.jobs.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def job(self, **fields):
+        fields.setdefault('kind', 'custom_curriculum')
+        fields.setdefault('params', {'degree': 'BSc', 'subject': 'Physics', 'topics': 'Optics'})
+        return GenerationJob.objects.create(user=self.profile, **fields)
+
+    def test_claim_takes_pending_jobs_oldest_first(self):
+        jobs = [self.job() for _ in range(3)]
+        self.job(status='running')
+
+        self.assertEqual(claim_jobs(2), [jobs[0].id, jobs[1].id])
+        self.assertEqual(claim_jobs(5), [jobs[2].id])
+        self.assertEqual(claim_jobs(5), [])
+        self.assertEqual(claim_jobs(0), [])
+        for job in GenerationJob.objects.filter(id__in=[j.id for j in jobs]):
+            self.assertEqual((job.status, job.attempts), ('running', 1))
+            self.assertIsNotNone(job.started_at)
+
+    def test_job_claimed_by_another_worker_is_skipped(self):
+        jobs = [self.job() for _ in range(3)]
+        other_worker = []
+        real_update = QuerySet.update
+
+        def racing_update(queryset, **kwargs):
+            # Another worker claims the first candidate between our SELECT and UPDATE
+            if not other_worker:
+                other_worker.append(None)
+                other_worker.extend(claim_jobs(1))
+            return real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=racing_update):
+            claimed = claim_jobs(2)
+
+        self.assertEqual(other_worker[1:], [jobs[0].id])
+        self.assertEqual(claimed, [jobs[1].id, jobs[2].id])
+        self.assertEqual(list(GenerationJob.objects.values_list('attempts', flat=True).distinct()), [1])
+
+    def test_requeue_stale_jobs(self):
+        stale = self.job(status='running', started_at=timezone.now() - timedelta(minutes=20))
+        fresh = self.job(status='running', started_at=timezone.now())
+        done = self.job(status='succeeded', started_at=timezone.now() - timedelta(minutes=20))
+
+        self.assertEqual(requeue_stale_jobs(600), 1)
+        statuses = dict(GenerationJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {stale.id: 'pending', fresh.id: 'running', done.id: 'succeeded'})
+        self.assertEqual(claim_jobs(5), [stale.id])
+
+    def test_failed_generation_marks_the_job_failed(self):
+        job = self.job()
+        claim_jobs(1)
+        with mock.patch('api.jobs.run_generation', side_effect=RuntimeError('upstream exploded')):
+            execute_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, 'upstream exploded')
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(job.curriculum_id)
+
+    def test_successful_generation_links_the_results(self):
+        job = self.job()
+        curriculum = Curriculum.objects.create(user=self.profile, degree='BSc', subject='Physics', topics='Optics',
+                                               generated_content='content')
+        file = File.objects.create(name='physics.txt', uploaded_by='Teacher', type='txt')
+        claim_jobs(1)
+        with mock.patch('api.jobs.run_generation', return_value={'id': curriculum.id, 'file_id': file.id}) as run:
+            execute_job(job.id)
+
+        run.assert_called_once_with('custom_curriculum', self.profile, job.params, use_cache=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('succeeded', ''))
+        self.assertEqual((job.curriculum_id, job.file_id), (curriculum.id, file.id))
+        self.assertIsNotNone(job.finished_at)
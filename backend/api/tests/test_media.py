@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.file_access import sync_permissions
+from api.models import File, ShareLink
+
+CONTENT = b'0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+class ServeMediaTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.root, MEDIA_DELIVERY='')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        os.makedirs(os.path.join(self.root, 'files'))
+        with open(os.path.join(self.root, 'files', 'notes.txt'), 'wb') as f:
+            f.write(CONTENT)
+        self.file = File.objects.create(name='notes.txt', uploaded_by='Teacher', type='txt', file='files/notes.txt',
+                                        permissions={'Student': {'read': False}, 'Teacher': {'read': True}})
+        sync_permissions(self.file)
+
+    def get(self, role='Teacher', path='files/notes.txt', share=None, **headers):
+        params = {'user_role': role, 'share': share} if share else {'user_role': role}
+        response = self.client.get(f'/media/{path}', params, headers=headers)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_access_follows_file_permissions(self):
+        self.assertEqual(self.get('Student').status_code, 403)
+        self.assertEqual(self.get('Teacher').status_code, 200)
+        self.assertEqual(self.get(path='files/unknown.txt').status_code, 404)
+        self.assertEqual(self.get(path='../outside.txt').status_code, 404)
+
+        link = ShareLink.objects.create(file=self.file, link_id='link', created_by='Teacher',
+                                        expires_at=timezone.now() + timedelta(hours=1))
+        shared = self.get('Student', share=link.link_id)
+        self.assertEqual(self.body(shared), CONTENT)
+        link.expires_at = timezone.now() - timedelta(minutes=1)
+        link.save()
+        expired = self.get('Student', share=link.link_id)
+        self.assertEqual(expired.status_code, 403)
+
+    def test_full_response_and_revalidation(self):
+        response = self.get()
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        not_modified = self.get(If_None_Match=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(self.get('Student', If_None_Match=response['ETag']).status_code, 403)
+
+    def test_byte_ranges(self):
+        partial = self.get(Range='bytes=2-5')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(self.body(partial), CONTENT[2:6])
+        self.assertEqual(partial['Content-Range'], f'bytes 2-5/{len(CONTENT)}')
+        self.assertEqual(partial['Content-Length'], '4')
+
+        suffix = self.get(Range='bytes=-4')
+        self.assertEqual(self.body(suffix), CONTENT[-4:])
+        open_ended = self.get(Range='bytes=30-')
+        self.assertEqual(self.body(open_ended), CONTENT[30:])
+
+        unsatisfiable = self.get(Range=f'bytes={len(CONTENT)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], f'bytes */{len(CONTENT)}')
+
+        # Multiple or malformed ranges fall back to the whole file
+        self.assertEqual(self.get(Range='bytes=0-1,4-5').status_code, 200)
+        self.assertEqual(self.get(Range='pages=1').status_code, 200)
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        matching = self.get(Range='bytes=0-3', If_Range=etag)
+        self.assertEqual(matching.status_code, 206)
+        self.assertEqual(self.body(matching), CONTENT[:4])
+
+        stale = self.get(Range='bytes=0-3', If_Range='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.body(stale), CONTENT)
+
+    def test_head(self):
+        response = self.client.head('/media/files/notes.txt', {'user_role': 'Teacher'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response.content, b'')
+
+    def test_proxy_delivery(self):
+        with self.settings(MEDIA_DELIVERY='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get(Range='bytes=0-3')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Accel-Redirect'], '/protected-media/files/notes.txt')
+            self.assertNotIn('X-Sendfile', response)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(self.get('Student').status_code, 403)
+
+        with self.settings(MEDIA_DELIVERY='x-sendfile'):
+            response = self.get()
+            self.assertEqual(response['X-Sendfile'], os.path.join(self.root, 'files', 'notes.txt'))
+            self.assertNotIn('X-Accel-Redirect', response)
+            self.assertEqual(response.content, b'')
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from api import openai_client
+from api.openai_client import CircuitOpenError, DeadlineExceededError, chat_completion, openai_module
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Chat completions endpoint answering with the statuses and delays queued on the server."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            status = server.statuses.pop(0) if server.statuses else 200
+        if server.delay:
+            time.sleep(server.delay)
+        if status == 200:
+            body = {'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': 'stub', 'choices': [
+                {'index': 0, 'message': {'role': 'assistant', 'content': ' stub answer '}, 'finish_reason': 'stop'}
+            ]}
+        else:
+            body = {'error': {'message': f'stub error {status}', 'type': 'server_error'}}
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class OpenAIClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.hits = 0
+        self.server.statuses = []
+        self.server.delay = 0
+        settings = override_settings(
+            OPENAI_BASE_URL=f'http://127.0.0.1:{self.server.server_port}/v1',
+            OPENAI_MAX_RETRIES=3,
+            OPENAI_BACKOFF_BASE=0.01,
+            OPENAI_BACKOFF_MAX=0.02,
+            OPENAI_BREAKER_THRESHOLD=2,
+            OPENAI_BREAKER_COOLDOWN=0.1,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        environ = mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-test'})
+        environ.start()
+        self.addCleanup(environ.stop)
+        openai_client.reset_client()
+        self.addCleanup(openai_client.reset_client)
+
+    def complete(self, deadline=None):
+        return chat_completion([{'role': 'user', 'content': 'hi'}], model='stub', max_tokens=10, temperature=0,
+                               deadline=deadline)
+
+    def test_retries_server_errors_until_success(self):
+        self.server.statuses = [500, 503]
+        self.assertEqual(self.complete(), 'stub answer')
+        self.assertEqual(self.server.hits, 3)
+        self.assertFalse(openai_client.breaker.is_open)
+
+    def test_retries_rate_limits(self):
+        self.server.statuses = [429]
+        self.assertEqual(self.complete(), 'stub answer')
+        self.assertEqual(self.server.hits, 2)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.statuses = [500] * 10
+        with self.assertRaises(openai_module().InternalServerError):
+            self.complete()
+        self.assertEqual(self.server.hits, 4)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.statuses = [400]
+        with self.assertRaises(openai_module().BadRequestError):
+            self.complete()
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(openai_client.breaker.failures, 0)
+
+    @override_settings(OPENAI_MAX_RETRIES=0)
+    def test_breaker_opens_then_closes_after_a_successful_trial(self):
+        self.server.statuses = [500, 500]
+        for _ in range(2):
+            with self.assertRaises(openai_module().InternalServerError):
+                self.complete()
+        self.assertTrue(openai_client.breaker.is_open)
+
+        with self.assertRaises(CircuitOpenError):
+            self.complete()
+        self.assertEqual(self.server.hits, 2)
+
+        time.sleep(0.15)
+        self.assertEqual(self.complete(), 'stub answer')
+        self.assertFalse(openai_client.breaker.is_open)
+        self.assertEqual(self.server.hits, 3)
+
+    @override_settings(OPENAI_MAX_RETRIES=0)
+    def test_failed_trial_reopens_the_breaker(self):
+        self.server.statuses = [500, 500, 500]
+        for _ in range(2):
+            with self.assertRaises(openai_module().InternalServerError):
+                self.complete()
+        time.sleep(0.15)
+        with self.assertRaises(openai_module().InternalServerError):
+            self.complete()
+        with self.assertRaises(CircuitOpenError):
+            self.complete()
+        self.assertEqual(self.server.hits, 3)
+
+    @override_settings(OPENAI_MAX_RETRIES=0)
+    def test_trial_ending_in_an_unexpected_error_lets_the_next_call_through(self):
+        self.server.statuses = [500, 500]
+        for _ in range(2):
+            with self.assertRaises(openai_module().InternalServerError):
+                self.complete()
+        time.sleep(0.15)
+        with self.assertRaises(TypeError):
+            openai_client._call_with_retries({'unexpected_argument': True}, 5.0)
+        self.assertFalse(openai_client.breaker.trial_in_flight)
+        self.assertEqual(self.complete(), 'stub answer')
+        self.assertFalse(openai_client.breaker.is_open)
+
+    def test_slow_upstream_fails_within_the_deadline(self):
+        self.server.delay = 1.0
+        started = time.monotonic()
+        with self.assertRaises((openai_module().APITimeoutError, DeadlineExceededError)):
+            self.complete(deadline=0.3)
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(openai_client.breaker.failures, 1)
@@ -0,0 +1,109 @@
+import base64
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from api.models import Curriculum, Profile
+from api.pagination import KeysetPagination
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(uid='pager', first_name='Page', email='pager@example.com')
+        Curriculum.objects.bulk_create([
+            Curriculum(user=cls.profile, degree='BSc', subject=f'Subject {i % 4}', topics='t', generated_content='c')
+            for i in range(23)
+        ])
+        # Three timestamps only, so most rows tie on created_at and the id decides
+        now = timezone.now()
+        for i, curriculum_id in enumerate(Curriculum.objects.order_by('id').values_list('id', flat=True)):
+            Curriculum.objects.filter(id=curriculum_id).update(created_at=now - timedelta(hours=i % 3))
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def request(self, url):
+        return Request(self.factory.get(url))
+
+    def walk(self, page_size, ordering=None):
+        pages = []
+        url = f'/items/?page_size={page_size}'
+        while url:
+            paginator = KeysetPagination(ordering)
+            pages.append(paginator.paginate_queryset(Curriculum.objects.all(), self.request(url)))
+            url = paginator.get_next_link()
+        return pages
+
+    def test_pages_cover_every_row_once_in_order_despite_ties(self):
+        for page_size in (1, 2, 5, 7, 23, 50):
+            with self.subTest(page_size=page_size):
+                pages = self.walk(page_size)
+                rows = [row.id for page in pages for row in page]
+                expected = list(Curriculum.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+                self.assertEqual(rows, expected)
+                self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+
+    def test_ascending_and_mixed_orderings(self):
+        for ordering in (('subject', 'id'), ('subject', '-id'), ('-subject', 'created_at', 'id')):
+            with self.subTest(ordering=ordering):
+                rows = [row.id for page in self.walk(4, ordering) for row in page]
+                self.assertEqual(rows, list(Curriculum.objects.order_by(*ordering).values_list('id', flat=True)))
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        values = ['2026-01-01T10:00:00+00:00', '42']
+        cursor = paginator.encode_cursor(values)
+        self.assertEqual(paginator.decode_cursor(self.request(f'/items/?cursor={cursor}')), values)
+        self.assertIsNone(paginator.decode_cursor(self.request('/items/')))
+
+    def test_invalid_cursors_are_not_found(self):
+        paginator = KeysetPagination()
+        bad = [
+            'not base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            paginator.encode_cursor({'created_at': 'x'}),
+            paginator.encode_cursor(['2026-01-01T10:00:00+00:00']),
+            paginator.encode_cursor(['yesterday', '1']),
+        ]
+        for cursor in bad:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(NotFound):
+                    paginator.paginate_queryset(Curriculum.objects.all(), self.request(f'/items/?cursor={cursor}'))
+
+    def test_rows_inserted_after_the_first_page_do_not_shift_later_pages(self):
+        paginator = KeysetPagination()
+        first = paginator.paginate_queryset(Curriculum.objects.all(), self.request('/items/?page_size=5'))
+        next_link = paginator.get_next_link()
+        Curriculum.objects.create(user=self.profile, degree='BSc', subject='New', topics='t', generated_content='c')
+
+        rest = []
+        url = next_link
+        while url:
+            paginator = KeysetPagination()
+            rest.extend(paginator.paginate_queryset(Curriculum.objects.all(), self.request(url)))
+            url = paginator.get_next_link()
+        self.assertEqual(len(first) + len(rest), 23)
+        self.assertFalse({row.id for row in first} & {row.id for row in rest})
+
+    @override_settings(API_PAGE_SIZE=10, API_MAX_PAGE_SIZE=20)
+    def test_page_size_is_clamped(self):
+        paginator = KeysetPagination()
+        for query, expected in (('', 10), ('?page_size=3', 3), ('?page_size=500', 20), ('?page_size=0', 1),
+                                ('?page_size=abc', 10)):
+            with self.subTest(query=query):
+                self.assertEqual(paginator.get_page_size(self.request(f'/items/{query}')), expected)
+
+    def test_curriculum_endpoint_follows_next(self):
+        client = APIClient()
+        url = '/api/get-user-curriculums/pager/?page_size=10'
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.json()['curriculums'])
+            url = response.json()['next']
+        self.assertEqual(len(ids), 23)
+        self.assertEqual(len(set(ids)), 23)
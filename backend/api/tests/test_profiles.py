@@ -0,0 +1,51 @@
+from unittest import mock
+from django.test import TestCase
+from api.models import Profile
+
+VARIANTS = {'thumbnail': 'profile_images/variants/thumb.jpg'}
+
+
+class ProfileSaveTests(TestCase):
+    def test_new_instance_with_explicit_pk_is_inserted(self):
+        Profile(pk=4242, uid='fixed', first_name='Fixed', email='fixed@example.com').save()
+        Profile.objects.create(pk=4343, uid='created', first_name='Created', email='created@example.com')
+
+        self.assertEqual(Profile.objects.get(pk=4242).uid, 'fixed')
+        self.assertEqual(Profile.objects.get(pk=4343).uid, 'created')
+
+    def test_loaded_instance_copied_under_a_new_pk_is_inserted(self):
+        Profile.objects.create(uid='owner', first_name='Owner', email='owner@example.com',
+                               profile_image='profile_images/profile_owner.png')
+        Profile.objects.filter(uid='owner').update(image_variants=VARIANTS)
+        copy = Profile.objects.get(uid='owner')
+        copy.pk, copy.uid, copy.email = 4444, 'copy', 'copy@example.com'
+        storage = Profile._meta.get_field('profile_image').storage
+
+        with mock.patch.object(storage, 'delete') as delete:
+            copy.save()
+        delete.assert_not_called()
+        self.assertEqual(Profile.objects.get(pk=4444).uid, 'copy')
+        self.assertEqual(Profile.objects.get(uid='owner').image_variants, VARIANTS)
+
+    def test_loaded_instance_keeps_variants_written_meanwhile(self):
+        profile = Profile.objects.create(uid='owner', first_name='Owner', email='owner@example.com',
+                                         profile_image='profile_images/profile_owner.png')
+        stale = Profile.objects.get(pk=profile.pk)
+        # The image worker stores the resized copies behind the loaded instance's back
+        Profile.objects.filter(pk=profile.pk).update(image_variants=VARIANTS)
+
+        stale.bio = 'Physics teacher'
+        stale.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.bio, 'Physics teacher')
+        self.assertEqual(profile.image_variants, VARIANTS)
+
+    def test_unsaved_instance_for_an_existing_row_writes_every_field(self):
+        profile = Profile.objects.create(uid='owner', first_name='Owner', email='owner@example.com')
+        Profile.objects.filter(pk=profile.pk).update(image_variants=VARIANTS)
+
+        Profile(pk=profile.pk, uid='owner', first_name='Replaced', email='owner@example.com',
+                created_at=profile.created_at).save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.first_name, 'Replaced')
+        self.assertEqual(profile.image_variants, {})
@@ -0,0 +1,42 @@
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from api.management.commands.benchmark_quiz_writes import _question
+from api.models import Quiz
+from api.serializers import QuizSerializer
+
+
+class QuizWriteQueryTests(TestCase):
+    def save(self, instance, data):
+        serializer = QuizSerializer(instance, data=data, partial=instance is not None)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def assert_constant_queries(self, size):
+        data = {'title': 'Quiz', 'mode': 'assessment', 'difficulty': 'Medium',
+                'questions': [_question(i) for i in range(size)]}
+        # Quiz insert, question insert, then bucket insert, candidate lookups and duplicate flags
+        with self.assertNumQueries(10):
+            quiz = self.save(None, data)
+        self.assertEqual(quiz.questions.count(), size)
+
+        current = QuizSerializer(Quiz.objects.get(id=quiz.id)).data['questions']
+        with self.assertNumQueries(3):
+            self.save(quiz, {'title': 'Renamed'})
+        with self.assertNumQueries(4):
+            self.save(quiz, {'questions': current})
+
+        edited = [dict(q, text=q['text'] + ' (edited)') if i % 2 else q for i, q in enumerate(current)]
+        mixed = edited[:size - size // 4] + [_question(i, ' new') for i in range(size // 4)]
+        with self.assertNumQueries(18):
+            self.save(quiz, {'questions': mixed})
+        self.assertEqual(list(quiz.questions.order_by('position').values_list('text', flat=True)),
+                         [q['text'] for q in mixed])
+
+    def test_small_quiz(self):
+        self.assert_constant_queries(10)
+
+    def test_query_count_does_not_grow_with_questions(self):
+        # Lift SQLite's 999 bound-parameter cap, which splits bulk INSERTs into batches
+        with mock.patch.object(connection.features, 'max_query_params', 100000):
+            self.assert_constant_queries(200)
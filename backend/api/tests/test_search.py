@@ -0,0 +1,104 @@
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.file_access import sync_permissions
+from api.models import Curriculum, File, LessonPlan, Profile, SearchDocument
+from api.search import FTS_TABLE, ranked, search
+
+STUDENT_READABLE = {'Student': {'read': True}, 'Teacher': {'read': True}}
+TEACHERS_ONLY = {'Student': {'read': False}, 'Teacher': {'read': True}}
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = Profile.objects.create(uid='owner', first_name='Owner', email='owner@example.com')
+        cls.other = Profile.objects.create(uid='other', first_name='Other', email='other@example.com')
+        cls.title_match = cls.file('Photosynthesis basics', 'How plants turn light into energy.', STUDENT_READABLE)
+        cls.body_match = cls.file('Plant biology', 'Chloroplasts carry out photosynthesis in leaves.',
+                                  STUDENT_READABLE)
+        cls.hidden = cls.file('Photosynthesis answers', 'Photosynthesis marking scheme.', TEACHERS_ONLY)
+        cls.unrelated = cls.file('Roman history', 'The republic and the empire.', STUDENT_READABLE)
+        # bm25 only separates matches when the term is rare across the index
+        for topic in ('Algebra', 'Geometry', 'Poetry', 'Grammar', 'Chemistry', 'Music', 'Art', 'Drama'):
+            cls.file(f'{topic} notes', f'Week one of {topic.lower()}.', STUDENT_READABLE)
+        cls.own_curriculum = Curriculum.objects.create(user=cls.owner, degree='BSc', subject='Biology',
+                                                       topics='Photosynthesis', generated_content='Light reactions')
+        cls.other_curriculum = Curriculum.objects.create(user=cls.other, degree='BSc', subject='Biology',
+                                                         topics='Photosynthesis', generated_content='Dark reactions')
+        cls.lesson_plan = LessonPlan.objects.create(user=cls.owner, subject='Biology', topics='Cells',
+                                                    grade_level='9', generated_content='Photosynthesis lab')
+
+    @classmethod
+    def file(cls, title, content, permissions):
+        file = File.objects.create(user=cls.owner, name=f'{title}.txt', title=title, uploaded_by='Teacher',
+                                   type='txt', content=content, permissions=permissions)
+        sync_permissions(file)
+        return file
+
+    def ids(self, results):
+        return [(result['kind'], result['id']) for result in results]
+
+    def assert_visibility(self):
+        student = set(self.ids(search('photosynthesis', self.owner, 'Student')))
+        self.assertEqual(student, {('file', self.title_match.id), ('file', self.body_match.id),
+                                   ('curriculum', self.own_curriculum.id), ('lesson_plan', self.lesson_plan.id)})
+        admin = set(self.ids(search('photosynthesis', None, 'Admin')))
+        self.assertEqual(admin, {('file', self.title_match.id), ('file', self.body_match.id),
+                                 ('file', self.hidden.id)})
+        files_only = self.ids(search('photosynthesis', self.owner, 'Teacher', kinds=['file']))
+        self.assertEqual({kind for kind, _ in files_only}, {'file'})
+        self.assertIn(('file', self.hidden.id), files_only)
+        self.assertEqual(search('   ', self.owner, 'Admin'), [])
+
+    def test_fts5_ranks_title_matches_first_and_builds_snippets(self):
+        results = search('photosynthesis', self.owner, 'Student', kinds=['file'])
+        self.assertEqual(self.ids(results), [('file', self.title_match.id), ('file', self.body_match.id)])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertIn('photosynthesis', results[1]['snippet'])
+        self.assertEqual(self.ids(search('chloroplasts leaves', self.owner, 'Student')),
+                         [('file', self.body_match.id)])
+        self.assertEqual(search('chloroplasts empire', self.owner, 'Student'), [])
+
+    def test_fts5_respects_roles_and_ownership(self):
+        self.assert_visibility()
+
+    def test_like_fallback(self):
+        with mock.patch('api.search._uses_fts5', return_value=False):
+            self.assert_visibility()
+            results = search('chloroplasts', self.owner, 'Student')
+        self.assertEqual(self.ids(results), [('file', self.body_match.id)])
+        self.assertEqual(results[0]['rank'], 0.0)
+        self.assertIn('Chloroplasts carry out photosynthesis', results[0]['snippet'])
+
+    def test_mysql_fulltext_query(self):
+        with mock.patch('api.search._uses_fts5', return_value=False), \
+                mock.patch('api.search._uses_fulltext', return_value=True):
+            queryset = ranked(SearchDocument.objects.filter(kind='file'), ['cell', 'energy'])
+        sql, params = queryset.query.sql_with_params()
+        match = 'MATCH(api_searchdocument.title, api_searchdocument.body) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+        select, where = sql.split(' WHERE ')
+        self.assertIn(match, select)
+        self.assertIn(match, where)
+        self.assertEqual(params.count('cell energy'), 2)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.unrelated.content = 'Aqueducts and photosynthesis in Roman gardens.'
+        self.unrelated.save()
+        self.assertIn(('file', self.unrelated.id), self.ids(search('aqueducts', None, 'Admin')))
+
+        document_id = SearchDocument.objects.get(kind='file', object_id=self.unrelated.id).id
+        self.unrelated.delete()
+        self.assertEqual(search('aqueducts', None, 'Admin'), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE rowid = %s', [document_id])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_search_endpoint(self):
+        response = APIClient().get('/api/search/', {'q': 'photosynthesis', 'uid': 'owner', 'user_role': 'Student',
+                                                    'kind': 'curriculum,lesson_plan'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self.ids(response.json()['results'])),
+                         {('curriculum', self.own_curriculum.id), ('lesson_plan', self.lesson_plan.id)})
+        self.assertEqual(APIClient().get('/api/search/').status_code, 400)
@@ -0,0 +1,118 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from api.generation import create_completion, make_cache_key
+from api.models import GenerationCache, GenerationLock
+from api.singleflight import single_flight
+
+MESSAGES = [{'role': 'system', 'content': 'You are an expert curriculum designer.'},
+            {'role': 'user', 'content': 'Generate a curriculum for Physics'}]
+
+
+class ConcurrentCompletionTests(TransactionTestCase):
+    def test_identical_concurrent_requests_make_one_upstream_call(self):
+        calls = []
+        release = threading.Event()
+        results, errors = [], []
+
+        def slow_completion(messages, *args):
+            calls.append(messages)
+            release.wait(5)
+            return 'shared answer'
+
+        def request():
+            try:
+                results.append(create_completion(MESSAGES))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with mock.patch('api.generation.chat_completion', side_effect=slow_completion):
+            threads = [threading.Thread(target=request) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while not calls and time.monotonic() < deadline:
+                time.sleep(0.01)
+            # Let the other requests miss the cache and queue up behind the leader
+            time.sleep(0.2)
+            release.set()
+            for thread in threads:
+                thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('shared answer', False)] + [('shared answer', True)] * 7)
+        self.assertEqual(GenerationCache.objects.get(key=make_cache_key(MESSAGES)).response, 'shared answer')
+        self.assertFalse(GenerationLock.objects.exists())
+
+    def test_leader_error_reaches_every_waiter(self):
+        release = threading.Event()
+        errors = []
+
+        def failing_compute():
+            release.wait(5)
+            raise RuntimeError('upstream exploded')
+
+        def request():
+            try:
+                single_flight('failing', failing_compute, lambda: None)
+            except RuntimeError as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual([str(e) for e in errors], ['upstream exploded'] * 4)
+        self.assertFalse(GenerationLock.objects.exists())
+
+
+@override_settings(GENERATION_LOCK_TTL=0.3, GENERATION_LOCK_POLL_INTERVAL=0.02)
+class DatabaseLockTests(TestCase):
+    def hold_lock(self, key, expires_in):
+        GenerationLock.objects.create(key=key, owner='other-process',
+                                      expires_at=timezone.now() + timedelta(seconds=expires_in))
+
+    def test_stale_lock_is_taken_over(self):
+        self.hold_lock('stale', -1)
+        compute = mock.Mock(return_value='fresh')
+
+        self.assertEqual(single_flight('stale', compute, lambda: None), ('fresh', True))
+        compute.assert_called_once()
+        self.assertFalse(GenerationLock.objects.filter(key='stale').exists())
+
+    def test_waiter_reads_the_other_process_result(self):
+        self.hold_lock('shared', 60)
+        lookup = mock.Mock(side_effect=[None, None, 'from the other process'])
+        compute = mock.Mock()
+
+        self.assertEqual(single_flight('shared', compute, lookup), ('from the other process', False))
+        compute.assert_not_called()
+
+    def test_waiter_times_out_and_generates_locally(self):
+        self.hold_lock('stuck', 60)
+        compute = mock.Mock(return_value='local')
+        started = time.monotonic()
+
+        self.assertEqual(single_flight('stuck', compute, lambda: None), ('local', True))
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        compute.assert_called_once()
+        self.assertEqual(GenerationLock.objects.get(key='stuck').owner, 'other-process')
+
+    def test_result_stored_before_the_lock_was_taken_is_reused(self):
+        compute = mock.Mock()
+        self.assertEqual(single_flight('done', compute, lambda: 'cached'), ('cached', False))
+        compute.assert_not_called()
+        self.assertFalse(GenerationLock.objects.exists())
@@ -0,0 +1,192 @@
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api import uploads
+from api.models import File, UploadSession
+from api.uploads import UploadError, decode_data_url, expire_uploads, start_upload, temp_path
+
+CONTENT = b'The quick brown fox jumps over the lazy dog.\n' * 3
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=root, CHUNKED_UPLOAD_DIR=os.path.join(root, 'chunked_uploads'),
+                                     CHUNKED_UPLOAD_CHUNK_SIZE=32)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(uploads._hashers.clear)
+
+    def start(self, content=CONTENT, sha256=None):
+        response = self.client.post('/api/uploads/', {
+            'user_role': 'Teacher', 'filename': 'notes.txt', 'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest() if sha256 is None else sha256,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['upload']['upload_id']
+
+    def put(self, upload_id, content, start, end):
+        return self.client.generic('PUT', f'/api/uploads/{upload_id}/', content[start:end],
+                                   content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(content)}')
+
+    def send(self, upload_id, content=CONTENT, between_chunks=None, offset=0):
+        for start in range(offset, len(content), 32):
+            response = self.put(upload_id, content, start, min(start + 32, len(content)))
+            self.assertEqual(response.status_code, 200)
+            if between_chunks:
+                between_chunks()
+
+    def complete(self, upload_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/uploads/{upload_id}/complete/', {'title': 'Notes'}, format='json')
+
+    def session(self, upload_id):
+        return UploadSession.objects.get(upload_id=upload_id)
+
+    def test_upload_in_chunks_creates_the_file(self):
+        upload_id = self.start()
+        self.send(upload_id)
+        with mock.patch('api.uploads.file_sha256', wraps=uploads.file_sha256) as recompute:
+            response = self.complete(upload_id)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['sha256'], hashlib.sha256(CONTENT).hexdigest())
+        recompute.assert_not_called()
+        session = self.session(upload_id)
+        self.assertEqual(session.status, 'complete')
+        with session.file.file.open('rb') as stored:
+            self.assertEqual(stored.read(), CONTENT)
+        self.assertFalse(os.path.exists(temp_path(session)))
+
+    def test_hash_is_recomputed_when_another_process_took_a_chunk(self):
+        upload_id = self.start()
+        # Simulates chunks landing on other worker processes, whose hash state this one never sees
+        self.send(upload_id, between_chunks=uploads._hashers.clear)
+        with mock.patch('api.uploads.file_sha256', wraps=uploads.file_sha256) as recompute:
+            response = self.complete(upload_id)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['sha256'], hashlib.sha256(CONTENT).hexdigest())
+        recompute.assert_called_once()
+
+    def test_out_of_order_and_replayed_chunks_are_rejected_with_the_offset(self):
+        upload_id = self.start()
+        skipped = self.put(upload_id, CONTENT, 32, 64)
+        self.assertEqual(skipped.status_code, 409)
+        self.assertEqual(skipped.json()['offset'], 0)
+
+        self.assertEqual(self.put(upload_id, CONTENT, 0, 32).status_code, 200)
+        replayed = self.put(upload_id, CONTENT, 0, 32)
+        self.assertEqual(replayed.status_code, 409)
+        self.assertEqual(replayed.json()['offset'], 32)
+
+        self.send(upload_id, offset=32)
+        self.assertEqual(self.complete(upload_id).status_code, 201)
+
+    def test_incomplete_upload_cannot_be_completed(self):
+        upload_id = self.start()
+        self.put(upload_id, CONTENT, 0, 32)
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['offset'], 32)
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        upload_id = self.start(sha256='0' * 64)
+        self.send(upload_id)
+        self.assertEqual(self.complete(upload_id).status_code, 422)
+        session = self.session(upload_id)
+        self.assertEqual(session.status, 'aborted')
+        self.assertFalse(os.path.exists(temp_path(session)))
+        self.assertFalse(File.objects.exists())
+
+    def test_upload_completes_only_once(self):
+        upload_id = self.start()
+        self.send(upload_id)
+        self.assertEqual(self.complete(upload_id).status_code, 201)
+        self.assertEqual(self.complete(upload_id).status_code, 410)
+        self.assertEqual(File.objects.count(), 1)
+
+    def test_failed_file_save_leaves_the_upload_open_for_a_retry(self):
+        upload_id = self.start()
+        self.send(upload_id)
+        with mock.patch('api.serializers.FileSerializer.create', side_effect=RuntimeError('disk full')):
+            self.assertEqual(self.complete(upload_id).status_code, 500)
+
+        session = self.session(upload_id)
+        self.assertEqual((session.status, session.received), ('open', len(CONTENT)))
+        self.assertTrue(os.path.exists(temp_path(session)))
+        self.assertEqual(self.complete(upload_id).status_code, 201)
+        self.assertEqual(self.session(upload_id).status, 'complete')
+
+    def test_failure_after_the_file_was_stored_rolls_back_and_restarts_the_upload(self):
+        upload_id = self.start()
+        self.send(upload_id)
+        with mock.patch('api.views.mark_complete', side_effect=RuntimeError('database went away')):
+            self.assertEqual(self.complete(upload_id).status_code, 500)
+
+        # The File row was rolled back with the session, and the moved temp file is gone
+        self.assertFalse(File.objects.exists())
+        session = self.session(upload_id)
+        self.assertEqual((session.status, session.received), ('open', 0))
+        self.assertEqual(os.path.getsize(temp_path(session)), 0)
+
+        self.send(upload_id)
+        self.assertEqual(self.complete(upload_id).status_code, 201)
+
+    def test_expire_uploads_aborts_idle_open_uploads(self):
+        idle = start_upload(None, 'Teacher', 'idle.txt', 10)
+        recent = start_upload(None, 'Teacher', 'recent.txt', 10)
+        finished = start_upload(None, 'Teacher', 'done.txt', 10)
+        old = timezone.now() - timedelta(hours=48)
+        UploadSession.objects.filter(id__in=[idle.id, finished.id]).update(updated_at=old)
+        UploadSession.objects.filter(id=finished.id).update(status='complete')
+
+        self.assertEqual(expire_uploads(24), 1)
+        self.assertEqual(self.session(idle.upload_id).status, 'aborted')
+        self.assertFalse(os.path.exists(temp_path(idle)))
+        self.assertEqual(self.session(recent.upload_id).status, 'open')
+        self.assertTrue(os.path.exists(temp_path(recent)))
+        self.assertEqual(self.session(finished.upload_id).status, 'complete')
+
+        out = StringIO()
+        UploadSession.objects.filter(id=recent.id).update(updated_at=old)
+        call_command('expire_uploads', stdout=out)
+        self.assertIn('Expired 1 upload(s)', out.getvalue())
+        self.assertEqual(self.session(recent.upload_id).status, 'aborted')
+
+
+class DataUrlTests(SimpleTestCase):
+    def decode(self, data_url):
+        # Small blocks so a payload spans many of them
+        with mock.patch.object(uploads, 'READ_BLOCK', 30):
+            extension, output = decode_data_url(data_url)
+        with output:
+            return extension, output.read()
+
+    def test_decodes_across_blocks(self):
+        payload = base64.b64encode(CONTENT).decode()
+        self.assertEqual(self.decode(f'data:image/PNG;base64,{payload}'), ('png', CONTENT))
+
+    def test_line_wrapped_payload(self):
+        # MIME-style 76-character lines, plus stray spaces that shift every later block
+        payload = base64.encodebytes(CONTENT).decode().replace('A', ' A')
+        self.assertIn('\n', payload)
+        self.assertEqual(self.decode(f'data:text/plain;base64,\n{payload}'), ('plain', CONTENT))
+
+    def test_invalid_payloads_are_rejected(self):
+        payload = base64.b64encode(CONTENT).decode()
+        for data_url in ('data:text/plain,plain text', f'data:text/plain;base64,{payload[:-1]}'):
+            with self.assertRaises(UploadError):
+                self.decode(data_url)
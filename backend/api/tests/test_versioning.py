@@ -0,0 +1,153 @@
+import random
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from api.models import AuditEvent, File, FileVersion
+from api.serializers import FileSerializer
+from api.versioning import apply_delta, compute_delta, content_at, get_version_state, record_version
+
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta']
+
+
+def random_line(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 6)))
+
+
+def edit(rng, content):
+    """Apply a few random line inserts, deletes and replacements to `content`."""
+    lines = content.split('\n')
+    for _ in range(rng.randint(1, 4)):
+        position = rng.randint(0, len(lines))
+        action = rng.choice(['insert', 'delete', 'replace'])
+        if action == 'insert' or not lines:
+            lines[position:position] = [random_line(rng) for _ in range(rng.randint(1, 3))]
+        elif action == 'delete':
+            del lines[min(position, len(lines) - 1):position + rng.randint(1, 2)]
+        else:
+            lines[min(position, len(lines) - 1)] = random_line(rng)
+    return '\n'.join(lines)
+
+
+class DeltaTests(SimpleTestCase):
+    def test_round_trip_over_random_edit_sequences(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            content = '\n'.join(random_line(rng) for _ in range(rng.randint(0, 30)))
+            for _ in range(20):
+                target = edit(rng, content)
+                self.assertEqual(apply_delta(content, compute_delta(content, target)), target)
+                content = target
+
+    def test_edge_cases(self):
+        cases = [
+            ('', ''),
+            ('', 'new\ncontent'),
+            ('old\ncontent\n', ''),
+            ('no trailing newline', 'no trailing newline\n'),
+            ('windows\r\nline endings\r\n', 'windows\r\nline\r\nendings\r\n'),
+            ('unicode   separator\n', 'unicode   separator changed\n'),
+        ]
+        for base, target in cases:
+            with self.subTest(base=base, target=target):
+                self.assertEqual(apply_delta(base, compute_delta(base, target)), target)
+
+
+class VersionHistoryTests(TestCase):
+    def setUp(self):
+        self.file = File.objects.create(name='notes.txt', uploaded_by='Teacher', type='txt')
+
+    def record(self, contents):
+        for content in contents:
+            record_version(self.file, {'name': 'notes.txt', 'title': '', 'type': 'txt', 'content': content},
+                           'Updated to version {version}')
+
+    def history(self, count, seed=11):
+        rng = random.Random(seed)
+        content = '\n'.join(random_line(rng) or 'line' for _ in range(60))
+        contents = []
+        for _ in range(count):
+            contents.append(content)
+            content = edit(rng, content)
+        return contents
+
+    @override_settings(FILE_VERSION_SNAPSHOT_INTERVAL=10)
+    def test_snapshot_every_interval_and_deltas_between(self):
+        contents = self.history(25)
+        self.record(contents)
+        snapshots = list(FileVersion.objects.filter(file=self.file, is_snapshot=True)
+                         .values_list('version', flat=True))
+        self.assertEqual(snapshots, [1, 11, 21])
+        for version, content in enumerate(contents, start=1):
+            self.assertEqual(content_at(self.file.id, version), content)
+
+    @override_settings(FILE_VERSION_SNAPSHOT_INTERVAL=10)
+    def test_reconstructs_after_the_interval_changes(self):
+        contents = self.history(15)
+        self.record(contents)
+        with self.settings(FILE_VERSION_SNAPSHOT_INTERVAL=4):
+            for version, content in enumerate(contents, start=1):
+                self.assertEqual(content_at(self.file.id, version), content)
+
+    def test_version_that_would_not_shrink_is_stored_in_full(self):
+        self.record(['short', 'completely different'])
+        self.assertTrue(FileVersion.objects.get(file=self.file, version=2).is_snapshot)
+        self.assertEqual(content_at(self.file.id, 2), 'completely different')
+
+    def test_missing_version(self):
+        self.record(['only version'])
+        self.assertIsNone(content_at(self.file.id, 2))
+        self.assertIsNone(get_version_state(self.file.id, 2))
+
+
+@override_settings(FILE_VERSION_SNAPSHOT_INTERVAL=10)
+class RollbackTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        serializer = FileSerializer(data={
+            'name': 'plan.txt', 'uploaded_by': 'Teacher', 'type': 'txt', 'content': 'version one\n' * 20,
+            'permissions': {'Teacher': {'read': True, 'write': True, 'delete': False}},
+        })
+        serializer.is_valid(raise_exception=True)
+        self.file = serializer.save()
+        rng = random.Random(3)
+        content = self.file.content
+        for _ in range(12):
+            content = edit(rng, content)
+            serializer = FileSerializer(self.file, data={'content': content}, partial=True)
+            serializer.is_valid(raise_exception=True)
+            self.file = serializer.save()
+
+    def test_rollback_restores_content_and_records_a_new_version(self):
+        latest = FileVersion.objects.filter(file=self.file).count()
+        expected = get_version_state(self.file.id, 4)['content']
+
+        response = self.client.post(f'/api/files/{self.file.id}/rollback/?user_role=Teacher', {'version': 4},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.content, expected)
+        self.assertEqual(FileVersion.objects.filter(file=self.file).count(), latest + 1)
+        self.assertEqual(content_at(self.file.id, latest + 1), expected)
+        self.assertEqual(
+            list(FileVersion.objects.filter(file=self.file, is_snapshot=True).values_list('version', flat=True))[:2],
+            [1, 11]
+        )
+
+    def test_rollback_needs_write_permission_and_an_existing_version(self):
+        url = f'/api/files/{self.file.id}/rollback/'
+        self.assertEqual(self.client.post(url + '?user_role=Student', {'version': 1}, format='json').status_code, 403)
+        self.assertEqual(self.client.post(url + '?user_role=Teacher', {'version': 99}, format='json').status_code, 404)
+
+    def test_failed_rollback_keeps_no_version(self):
+        latest = FileVersion.objects.filter(file=self.file).count()
+        content = self.file.content
+        with mock.patch('api.views.log_event', side_effect=RuntimeError('audit table unavailable')):
+            response = self.client.post(f'/api/files/{self.file.id}/rollback/?user_role=Teacher', {'version': 4},
+                                        format='json')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(FileVersion.objects.filter(file=self.file).count(), latest)
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.content, content)
+        self.assertFalse(AuditEvent.objects.filter(file=self.file, action='rolled back').exists())
@@ -0,0 +1,296 @@
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request or from disk at a time; bounds memory per upload
+READ_BLOCK = 64 * 1024
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+# upload id -> (offset, sha256 object) for uploads whose previous chunk this process received.
+# Hash state cannot be stored in the database, so another process recomputes it from disk.
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """A rejected upload request; `offset` tells the client where to resume."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def upload_dir():
+    path = getattr(settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'chunked_uploads'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+
+
+def max_upload_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 1024 * 1024 * 1024)
+
+
+def temp_path(session):
+    return os.path.join(upload_dir(), f'{session.upload_id}.part')
+
+
+def start_upload(profile, user_role, filename, size, expected_sha256=''):
+    filename = os.path.basename(str(filename or '')).strip()
+    if not filename:
+        raise UploadError('Filename is required')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('Size must be a number of bytes')
+    if not 0 < size <= max_upload_size():
+        raise UploadError(f'Size must be between 1 and {max_upload_size()} bytes', status=413)
+    expected_sha256 = (expected_sha256 or '').strip().lower()
+    if expected_sha256 and not re.fullmatch(r'[0-9a-f]{64}', expected_sha256):
+        raise UploadError('sha256 must be a hex digest')
+
+    session = UploadSession.objects.create(
+        user=profile, user_role=user_role, filename=filename[:255], size=size, expected_sha256=expected_sha256
+    )
+    open(temp_path(session), 'wb').close()
+    logger.info(f"Started upload {session.upload_id} for {filename} ({size} bytes)")
+    return session
+
+
+def parse_content_range(header, length):
+    """(start, length) from a `Content-Range: bytes start-end/total` header; start 0 without one."""
+    if not header:
+        return 0, length
+    match = CONTENT_RANGE.match(header.strip())
+    if not match:
+        raise UploadError('Content-Range must look like "bytes start-end/total"')
+    start, end = int(match.group(1)), int(match.group(2))
+    if end < start or end - start + 1 != length:
+        raise UploadError('Content-Range does not match Content-Length')
+    return start, length
+
+
+def _take_hasher(session):
+    with _hashers_lock:
+        offset, hasher = _hashers.pop(session.upload_id, (None, None))
+    if offset == session.received:
+        return hasher
+    if session.received == 0:
+        return hashlib.sha256()
+    return None
+
+
+def _keep_hasher(session, hasher):
+    if hasher is not None:
+        with _hashers_lock:
+            _hashers[session.upload_id] = (session.received, hasher)
+
+
+def append_chunk(upload_id, stream, start, length):
+    """
+    Write `length` bytes from `stream` at `start`, READ_BLOCK bytes at a time.
+
+    Chunks must arrive in order: a chunk not starting at the received offset is
+    rejected with that offset (409) so the client can resume from it. The
+    session row is locked while writing, so concurrent appends cannot interleave.
+    """
+    with transaction.atomic():
+        session = _open_session(upload_id, lock=True)
+        if start != session.received:
+            raise UploadError('Chunk does not start at the received offset', status=409, offset=session.received)
+        if length <= 0 or length > chunk_size():
+            raise UploadError(f'Chunks must be between 1 and {chunk_size()} bytes', status=413,
+                              offset=session.received)
+        if start + length > session.size:
+            raise UploadError('Chunk goes past the declared size', offset=session.received)
+
+        hasher = _take_hasher(session)
+        remaining = length
+        with open(temp_path(session), 'r+b') as out:
+            out.seek(start)
+            while remaining:
+                block = stream.read(min(READ_BLOCK, remaining))
+                if not block:
+                    break
+                out.write(block)
+                if hasher is not None:
+                    hasher.update(block)
+                remaining -= len(block)
+        if remaining:
+            # The partial bytes past `received` are overwritten by the retried chunk
+            raise UploadError('Chunk body ended early', offset=session.received)
+
+        session.received += length
+        session.save(update_fields=['received', 'updated_at'])
+    _keep_hasher(session, hasher)
+    return session
+
+
+def _open_session(upload_id, lock=False):
+    sessions = UploadSession.objects.select_for_update() if lock else UploadSession.objects
+    try:
+        session = sessions.get(upload_id=upload_id)
+    except UploadSession.DoesNotExist:
+        raise UploadError('Upload not found', status=404)
+    if session.status != 'open':
+        raise UploadError(f'Upload is {session.status}', status=410)
+    return session
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(READ_BLOCK), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class AssembledFile(DjangoFile):
+    """The finished temp file; FileSystemStorage moves it into place instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def finish_upload(upload_id):
+    """
+    Verify a fully received upload and return (session, AssembledFile).
+
+    The checksum comes from the incremental hash when this process saw every
+    chunk, and is recomputed from disk otherwise; a mismatch discards the
+    upload. The session stays open: the caller calls claim_upload, saves the
+    File and calls mark_complete in one transaction, or release_upload if
+    saving the File fails.
+    """
+    session = _open_session(upload_id)
+    if session.received != session.size:
+        raise UploadError(f'Upload is incomplete: {session.received} of {session.size} bytes received',
+                          offset=session.received)
+
+    path = temp_path(session)
+    try:
+        with open(path, 'r+b') as out:
+            out.truncate(session.size)
+        with _hashers_lock:
+            offset, hasher = _hashers.pop(session.upload_id, (None, None))
+        digest = hasher.hexdigest() if offset == session.size else file_sha256(path)
+        if session.expected_sha256 and digest != session.expected_sha256:
+            UploadSession.objects.filter(id=session.id, status='open').update(status='aborted',
+                                                                             updated_at=timezone.now())
+            _remove(path)
+            raise UploadError('Checksum mismatch, upload discarded', status=422)
+        assembled = AssembledFile(open(path, 'rb'), name=session.filename)
+    except FileNotFoundError:
+        # Another request completed the upload and storage moved the temp file away
+        raise UploadError('Upload is already being completed', status=409)
+    session.sha256 = digest
+    return session, assembled
+
+
+def claim_upload(session):
+    """
+    Lock a verified upload until the surrounding transaction ends. Only one
+    request may complete an upload: concurrent ones wait here, then find it taken.
+    """
+    if not UploadSession.objects.select_for_update().filter(id=session.id, status='open').exists():
+        raise UploadError('Upload is already being completed', status=409)
+
+
+def mark_complete(session, file_instance):
+    session.status = 'complete'
+    session.file = file_instance
+    session.save(update_fields=['status', 'file', 'sha256', 'updated_at'])
+    path = temp_path(session)
+    transaction.on_commit(lambda: _remove(path))
+
+
+def release_upload(session):
+    """
+    Keep an upload retryable after saving its File failed. The session was
+    rolled back to open; if storage had already moved the temp file away, its
+    bytes are gone and the client resumes from offset 0.
+    """
+    path = temp_path(session)
+    if not os.path.exists(path):
+        UploadSession.objects.filter(id=session.id, status='open').update(received=0, updated_at=timezone.now())
+        open(path, 'wb').close()
+
+
+def abort_upload(upload_id):
+    with transaction.atomic():
+        session = _open_session(upload_id, lock=True)
+        session.status = 'aborted'
+        session.save(update_fields=['status', 'updated_at'])
+    with _hashers_lock:
+        _hashers.pop(session.upload_id, None)
+    _remove(temp_path(session))
+    return session
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def expire_uploads(max_age_hours):
+    """Abort open uploads untouched for `max_age_hours` and delete their temp files."""
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    stale = list(UploadSession.objects.filter(status='open', updated_at__lt=cutoff))
+    for session in stale:
+        _remove(temp_path(session))
+    UploadSession.objects.filter(id__in=[session.id for session in stale]).update(status='aborted')
+    return len(stale)
+
+
+def decode_data_url(data_url, max_size=None):
+    """
+    Decode a base64 `data:` URL into a temporary file, a block at a time.
+
+    Returns (extension, file object positioned at 0). Only one READ_BLOCK-sized
+    slice is decoded in memory at once, instead of a second full-size copy.
+    """
+    header, _, payload = data_url.partition(';base64,')
+    if not payload:
+        raise UploadError('Not a base64 data URL')
+    extension = header.split('/')[-1].lower()
+    max_size = max_size or max_upload_size()
+    if len(payload) * 3 // 4 > max_size:
+        raise UploadError(f'Data is larger than {max_size} bytes', status=413)
+
+    output = tempfile.TemporaryFile()
+    step = READ_BLOCK // 3 * 4
+    pending = ''
+    try:
+        for offset in range(0, len(payload), step):
+            # Line breaks and spaces are dropped first, so a block may end mid-quantum;
+            # only whole 4-character groups are decoded and the rest carried over
+            block = pending + ''.join(payload[offset:offset + step].split())
+            usable = len(block) - len(block) % 4
+            output.write(base64.b64decode(block[:usable]))
+            pending = block[usable:]
+        if pending:
+            output.write(base64.b64decode(pending))
+    except (binascii.Error, ValueError) as e:
+        output.close()
+        raise UploadError(f'Invalid base64 data: {str(e)}')
+    output.seek(0)
+    return extension, output
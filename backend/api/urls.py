@@ -6,16 +6,27 @@ urlpatterns = [
     path('generate-standard-curriculum/', views.generate_standard_curriculum, name='generate-standard-curriculum'),
     path('get-user-curriculums/<str:uid>/', views.get_user_curriculums, name='get-user-curriculums'),
     path('generate-lesson-plan/', views.generate_lesson_plan, name='generate-lesson-plan'),
+    path('generate-quiz/', views.generate_quiz_view, name='generate-quiz'),
+    path('generate-batch/', views.generate_batch, name='generate-batch'),
     path('get-user-lesson-plans/<str:uid>/', views.get_user_lesson_plans, name='get-user-lesson-plans'),
     path('get-profile/<str:uid>/', views.get_profile, name='get-profile'),
     path('save-profile/', views.save_profile, name='save-profile'),
     path('quizzes/', views.QuizListCreateView.as_view(), name='quiz-list-create'),
     path('quizzes/<int:pk>/', views.QuizRetrieveUpdateView.as_view(), name='quiz-retrieve-update'),
     path('files/', views.FileListCreateView.as_view(), name='file-list-create'),
+    path('files/tags/', views.get_file_tags, name='file-tags'),
+    path('files/facets/', views.get_file_facets, name='file-facets'),
     path('files/<int:file_id>/', views.FileRetrieveUpdateView.as_view(), name='file-retrieve-update'),
     path('files/<int:file_id>/delete/', views.delete_file, name='delete-file'),
     path('files/<int:file_id>/permissions/', views.update_permissions, name='update-permissions'),
     path('files/<int:file_id>/share/', views.generate_share_link, name='generate-share-link'),
     path('files/<int:file_id>/share/<str:link_id>/access/', views.access_share_link, name='access-share-link'),
     path('files/<int:file_id>/rollback/', views.rollback_file, name='rollback-file'),
+    path('files/<int:file_id>/versions/<int:version>/', views.get_file_version, name='file-version'),
+    path('files/<int:file_id>/audit/', views.FileAuditEventListView.as_view(), name='file-audit-events'),
+    path('uploads/', views.start_chunked_upload, name='start-chunked-upload'),
+    path('uploads/<uuid:upload_id>/', views.chunked_upload_detail, name='chunked-upload'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_chunked_upload, name='complete-chunked-upload'),
+    path('search/', views.search_content, name='search'),
+    path('jobs/<uuid:job_id>/', views.get_generation_job, name='generation-job'),
 ]
\ No newline at end of file
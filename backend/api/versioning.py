@@ -0,0 +1,158 @@
+import difflib
+import json
+import logging
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Prefetch
+from django.utils import timezone
+from .models import FileVersion
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_interval():
+    return max(1, getattr(settings, 'FILE_VERSION_SNAPSHOT_INTERVAL', 10))
+
+
+def snapshot_base(version):
+    """First version of the snapshot window containing `version` (always a full snapshot)."""
+    interval = snapshot_interval()
+    return ((version - 1) // interval) * interval + 1
+
+
+def compute_delta(base, target):
+    """
+    Line-based delta turning `base` into `target`.
+
+    Ops are ["=", n] (copy n lines), ["-", n] (skip n lines) and
+    ["+", [lines]] (insert lines).
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['=', i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(['-', i2 - i1])
+        if j2 > j1:
+            ops.append(['+', target_lines[j1:j2]])
+    return ops
+
+
+def apply_delta(base, ops):
+    base_lines = base.splitlines(keepends=True)
+    position = 0
+    out = []
+    for op, value in ops:
+        if op == '=':
+            out.extend(base_lines[position:position + value])
+            position += value
+        elif op == '-':
+            position += value
+        else:
+            out.extend(value)
+    return ''.join(out)
+
+
+def build_version(file_id, version, state, changes, previous_content=None, date=None):
+    """
+    Build (unsaved) FileVersion `version` for `state`.
+
+    Versions at the start of a snapshot window, or whose delta would not be
+    smaller than the content itself, store the full content.
+    """
+    content = state.get('content') or ''
+    entry = FileVersion(
+        file_id=file_id,
+        version=version,
+        date=date or timezone.now().date(),
+        changes=changes,
+        name=state.get('name') or '',
+        title=state.get('title') or '',
+        type=state.get('type') or '',
+    )
+    if previous_content is not None and snapshot_base(version) != version:
+        delta = compute_delta(previous_content, content)
+        if len(json.dumps(delta)) < len(content):
+            entry.is_snapshot = False
+            entry.delta = delta
+            return entry
+    entry.is_snapshot = True
+    entry.content = content
+    return entry
+
+
+def content_at(file_id, version):
+    """Reconstruct the content of `version` from its snapshot window, or None if missing."""
+    versions = FileVersion.objects.filter(file_id=file_id, version__lte=version).order_by('version')
+    rows = list(versions.filter(version__gte=snapshot_base(version)).values('version', 'is_snapshot', 'content', 'delta'))
+    if not rows or rows[-1]['version'] != version:
+        return None
+    if not any(row['is_snapshot'] for row in rows):
+        # Written under a different snapshot interval; widen to the last snapshot
+        base = versions.filter(is_snapshot=True).aggregate(base=Max('version'))['base']
+        rows = list(versions.filter(version__gte=base).values('version', 'is_snapshot', 'content', 'delta'))
+    start = max(i for i, row in enumerate(rows) if row['is_snapshot'])
+    content = rows[start]['content']
+    for row in rows[start + 1:]:
+        content = apply_delta(content, row['delta'])
+    return content
+
+
+def get_version_state(file_id, version):
+    """Return the {name, title, type, content} state recorded for `version`, or None."""
+    entry = FileVersion.objects.filter(file_id=file_id, version=version).only('name', 'title', 'type').first()
+    if entry is None:
+        return None
+    return {
+        'name': entry.name,
+        'title': entry.title,
+        'type': entry.type,
+        'content': content_at(file_id, version),
+    }
+
+
+def record_version(file, state, changes):
+    """
+    Append the next FileVersion for `file`, retrying if a concurrent writer took
+    the number. A `{version}` placeholder in `changes` is filled in.
+    """
+    for _ in range(3):
+        latest = FileVersion.objects.filter(file=file).aggregate(latest=Max('version'))['latest'] or 0
+        previous_content = content_at(file.id, latest) if latest else None
+        entry = build_version(file.id, latest + 1, state, changes.replace('{version}', str(latest + 1)),
+                              previous_content)
+        try:
+            with transaction.atomic():
+                entry.save()
+            return entry
+        except IntegrityError:
+            logger.warning(f"Version {latest + 1} of file {file.id} was taken concurrently, retrying")
+    raise IntegrityError(f"Could not record a new version for file {file.id}")
+
+
+SUMMARY_FIELDS = ('id', 'file_id', 'version', 'date', 'changes', 'name', 'title', 'type')
+
+
+def versions_prefetch():
+    """Prefetch for file querysets that loads history metadata without content or deltas."""
+    return Prefetch('versions', queryset=FileVersion.objects.only(*SUMMARY_FIELDS))
+
+
+def version_summaries(file):
+    """History metadata for the API; content is fetched per version on demand."""
+    versions = file.versions.all()
+    if 'versions' not in getattr(file, '_prefetched_objects_cache', {}):
+        versions = versions.only(*SUMMARY_FIELDS)
+    return [
+        {
+            'version': entry.version,
+            'date': entry.date.isoformat(),
+            'changes': entry.changes,
+            'state': {'name': entry.name, 'title': entry.title, 'type': entry.type}
+        }
+        for entry in versions
+    ]
@@ -1,30 +1,68 @@
 import logging
-import base64
-from django.core.files.base import ContentFile
+import json
+from django.core.files import File as DjangoFile
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.response import Response
 from rest_framework import status, generics
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
-from .models import Profile, Curriculum, LessonPlan, Quiz, File, ShareLink
-from .serializers import ProfileSerializer, CurriculumSerializer, LessonPlanSerializer, QuizSerializer, FileSerializer
-from django.db import IntegrityError
-import openai
-from openai import AuthenticationError, OpenAIError
-from decouple import config
+from rest_framework.exceptions import PermissionDenied
+from .models import Profile, Curriculum, LessonPlan, Quiz, File, ShareLink, GenerationJob, AuditEvent, UploadSession
+from .serializers import ProfileSerializer, CurriculumSerializer, LessonPlanSerializer, QuizSerializer, FileSerializer, FileSummarySerializer, GenerationJobSerializer, AuditEventSerializer, FILE_SUMMARY_FIELDS
+from .versioning import get_version_state, record_version, versions_prefetch
+from .audit import log_event
+from .file_access import readable_by, sync_permissions
+from .pagination import KeysetPagination
+from .search import search
+from .tagging import parse_tags, tag_counts
+from .file_filters import filtered_files
+from .quiz_generation import extract_quiz_params, generate_quiz, QuizGenerationError
+from .facets import file_facets
+from .profile_cache import cached_profile, invalidate_profile
+from .conditional import ConditionalGetMixin, model_fingerprint, not_modified, response_validators, watermark, with_validators
+from .parsers import FastJSONParser
+from .images import enqueue_profile_image
+from .uploads import (UploadError, abort_upload, append_chunk, chunk_size, claim_upload, decode_data_url,
+                      finish_upload, mark_complete, parse_content_range, release_upload, start_upload)
+from .openai_client import openai_errors
+from .generation import GENERATORS, extract_params, run_generation, stream_generation, run_batch_generation, cache_enabled, request_flag
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.conf import settings
 from django.utils import timezone
 import uuid
 from datetime import datetime
 
-# Configure OpenAI API client
-openai.api_key = config('OPENAI_API_KEY')
-
 logger = logging.getLogger(__name__)
 
-@api_view(['POST'])
-def generate_custom_curriculum(request):
-    logger.info("Received request for generate_custom_curriculum")
-    logger.info(f"Request data: {request.data}")
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stream_generation_response(kind, profile, params, use_cache):
+    spec = GENERATORS[kind]
+
+    def events():
+        yield _sse_event('start', {'kind': kind})
+        try:
+            for event, data in stream_generation(kind, profile, params, use_cache=use_cache):
+                yield _sse_event(event, data)
+            logger.info(f"Successfully streamed {spec['label']}")
+        except openai_errors() as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            yield _sse_event('error', {'message': spec['error_message'], 'error': str(e)})
+        except Exception as e:
+            logger.error(f"Unexpected error streaming {spec['label']}: {str(e)}")
+            yield _sse_event('error', {'message': 'An unexpected error occurred', 'error': str(e)})
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the event stream
+    return response
+
+def _handle_generation(request, kind):
+    spec = GENERATORS[kind]
+    label = spec['label']
     try:
         uid = request.data.get('uid')
         if not uid:
@@ -35,7 +73,7 @@ def generate_custom_curriculum(request):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            profile = Profile.objects.get(uid=uid)
+            profile = cached_profile(uid, request)
         except Profile.DoesNotExist:
             logger.error("Profile not found")
             return Response({
@@ -43,129 +81,75 @@ def generate_custom_curriculum(request):
                 'message': 'Profile not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        degree = request.data.get('degree')
-        subject = request.data.get('subject')
-        topics = request.data.get('topics')
-
-        if not all([degree, subject, topics]):
-            logger.error("Degree, subject, and topics are required")
+        params = extract_params(kind, request.data)
+        if params is None:
+            logger.error(spec['required_message'])
             return Response({
                 'status': 'error',
-                'message': 'Degree, subject, and topics are required'
+                'message': spec['required_message']
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        prompt = (
-            f"Generate a detailed curriculum for a {degree} degree focusing on the subject {subject}. "
-            f"Include the following topics: {topics}. "
-            f"Structure the curriculum with the following sections:\n"
-            f"- Course Title\n"
-            f"- Degree Overview\n"
-            f"- Learning Objectives\n"
-            f"- Course Modules (with detailed topics and subtopics)\n"
-            f"- Assessments\n"
-            f"- Resources\n"
-            f"Ensure the curriculum is comprehensive and suitable for academic use."
-        )
+        if request_flag(request.data, 'async'):
+            job = GenerationJob.objects.create(
+                user=profile,
+                kind=kind,
+                params=params,
+                use_cache=cache_enabled(request.data)
+            )
+            logger.info(f"Queued {label} generation job {job.job_id}")
+            return Response({
+                'status': 'accepted',
+                'job': {
+                    'job_id': str(job.job_id),
+                    'status': job.status,
+                    'poll_url': reverse('generation-job', kwargs={'job_id': job.job_id})
+                }
+            }, status=status.HTTP_202_ACCEPTED)
+
+        if request_flag(request.data, 'stream'):
+            return _stream_generation_response(kind, profile, params, cache_enabled(request.data))
 
         try:
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert curriculum designer."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7,
-            )
-            generated_content = response.choices[0].message.content.strip()
-        except AuthenticationError as e:
-            logger.error(f"OpenAI API Authentication error: {str(e)}")
-            generated_content = (
-                f"Course Title\n"
-                f"{subject} Curriculum for {degree}\n\n"
-                f"Degree Overview\n"
-                f"This curriculum introduces key concepts for {degree} students...\n\n"
-                f"Learning Objectives\n"
-                f"- Understand the basics of {topics}\n"
-                f"- Apply {topics} in practical scenarios\n\n"
-                f"Course Modules\n"
-                f"- Module 1: Introduction to {subject}\n"
-                f"- Module 2: {topics}\n\n"
-                f"Assessments\n"
-                f"- Midterm exam\n"
-                f"- Final project\n\n"
-                f"Resources\n"
-                f"- Textbook: '{subject} Fundamentals'\n"
-                f"- Website: www.{subject.lower()}-education.com"
-            )
-            logger.warning("Using mock response due to OpenAI API key issue.")
-        except OpenAIError as e:
+            result = run_generation(kind, profile, params, use_cache=cache_enabled(request.data))
+        except openai_errors() as e:
             logger.error(f"OpenAI API error: {str(e)}")
             return Response({
                 'status': 'error',
-                'message': 'Failed to generate curriculum with OpenAI',
+                'message': spec['error_message'],
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        curriculum = Curriculum.objects.create(
-            user=profile,
-            degree=degree,
-            subject=subject,
-            topics=topics,
-            generated_content=generated_content,
-            curriculum_type='custom'
-        )
-
-        # Save to File model for file manager
-        file_data = {
-            'user': profile.uid,
-            'name': f"{subject}_{degree}_curriculum.txt",
-            'title': f"Curriculum for {subject} - {degree}",
-            'author': profile.role,
-            'uploaded_by': profile.role,
-            'type': 'txt',
-            'content': generated_content,
-            'category': 'Curriculum',
-        }
-        file_serializer = FileSerializer(data=file_data)
-        if file_serializer.is_valid():
-            file_serializer.save()
-            logger.info("Successfully saved curriculum to file manager")
-        else:
-            logger.error(f"Failed to save curriculum to file manager: {file_serializer.errors}")
-
-        logger.info("Successfully generated custom curriculum")
+        logger.info(f"Successfully generated {label}")
         return Response({
-            'curriculum': {
-                'id': curriculum.id,
-                'generated_content': generated_content,
-                'file_id': file_serializer.instance.id if file_serializer.is_valid() else None
-            }
+            spec['result_key']: result
         }, status=status.HTTP_201_CREATED)
 
     except Exception as e:
-        logger.error(f"Unexpected error generating curriculum: {str(e)}")
+        logger.error(f"Unexpected error generating {label}: {str(e)}")
         return Response({
             'status': 'error',
             'message': 'An unexpected error occurred',
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+def generate_custom_curriculum(request):
+    logger.info("Received request for generate_custom_curriculum")
+    logger.info(f"Request data: {request.data}")
+    return _handle_generation(request, 'custom_curriculum')
+
 @api_view(['POST'])
 def generate_standard_curriculum(request):
     logger.info("Received request for generate_standard_curriculum")
     logger.info(f"Request data: {request.data}")
-    try:
-        uid = request.data.get('uid')
-        if not uid:
-            logger.error("UID is required")
-            return Response({
-                'status': 'error',
-                'message': 'UID is required'
-            }, status=status.HTTP_400_BAD_REQUEST)
+    return _handle_generation(request, 'standard_curriculum')
 
+@api_view(['GET'])
+def get_user_curriculums(request, uid):
+    logger.info(f"Received request for get_user_curriculums with uid: {uid}")
+    try:
         try:
-            profile = Profile.objects.get(uid=uid)
+            profile = cached_profile(uid, request)
         except Profile.DoesNotExist:
             logger.error("Profile not found")
             return Response({
@@ -173,119 +157,54 @@ def generate_standard_curriculum(request):
                 'message': 'Profile not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        degree = request.data.get('degree')
-        subject = request.data.get('subject')
-
-        if not all([degree, subject]):
-            logger.error("Degree and subject are required")
-            return Response({
-                'status': 'error',
-                'message': 'Degree and subject are required'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        prompt = (
-            f"Generate a standard curriculum for a {degree} degree in the subject {subject}. "
-            f"Base the curriculum on widely accepted academic standards. "
-            f"Structure the curriculum with the following sections:\n"
-            f"- Course Title\n"
-            f"- Degree Overview\n"
-            f"- Learning Objectives\n"
-            f"- Course Modules (with detailed topics and subtopics)\n"
-            f"- Assessments\n"
-            f"- Resources\n"
-            f"Ensure the curriculum is comprehensive, aligned with academic standards, and suitable for university use."
+        etag, last_modified = response_validators(
+            request, [('curriculum', profile.id)], watermark(Curriculum.objects.filter(user=profile), 'updated_at'),
+            parts=[model_fingerprint(profile)]
         )
+        unchanged = not_modified(request, etag, last_modified)
+        if unchanged is not None:
+            logger.info("Curriculums not modified")
+            return unchanged
 
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert curriculum designer specializing in standard academic curricula."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7,
-            )
-            generated_content = response.choices[0].message.content.strip()
-        except AuthenticationError as e:
-            logger.error(f"OpenAI API Authentication error: {str(e)}")
-            generated_content = (
-                f"Course Title\n"
-                f"Standard {subject} Curriculum for {degree}\n\n"
-                f"Degree Overview\n"
-                f"This curriculum aligns with academic standards for {degree} students...\n\n"
-                f"Learning Objectives\n"
-                f"- Master core concepts of {subject}\n"
-                f"- Develop critical thinking skills\n\n"
-                f"Course Modules\n"
-                f"- Module 1: Foundations of {subject}\n"
-                f"- Module 2: Advanced {subject} Topics\n\n"
-                f"Assessments\n"
-                f"- Midterm exam\n"
-                f"- Final project\n\n"
-                f"Resources\n"
-                f"- Textbook: '{subject} Essentials'\n"
-                f"- Website: www.{subject.lower()}-standards.org"
-            )
-            logger.warning("Using mock response due to OpenAI API key issue.")
-        except OpenAIError as e:
-            logger.error(f"OpenAI API error: {str(e)}")
-            return Response({
-                'status': 'error',
-                'message': 'Failed to generate curriculum with OpenAI',
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        curriculum = Curriculum.objects.create(
-            user=profile,
-            degree=degree,
-            subject=subject,
-            topics=f"Standard {subject} topics",
-            generated_content=generated_content,
-            curriculum_type='standard'
-        )
-
-        # Save to File model for file manager
-        file_data = {
-            'user': profile.uid,
-            'name': f"{subject}_{degree}_standard_curriculum.txt",
-            'title': f"Standard Curriculum for {subject} - {degree}",
-            'author': profile.role,
-            'uploaded_by': profile.role,
-            'type': 'txt',
-            'content': generated_content,
-            'category': 'Curriculum',
-        }
-        file_serializer = FileSerializer(data=file_data)
-        if file_serializer.is_valid():
-            file_serializer.save()
-            logger.info("Successfully saved standard curriculum to file manager")
-        else:
-            logger.error(f"Failed to save standard curriculum to file manager: {file_serializer.errors}")
-
-        logger.info("Successfully generated standard curriculum")
-        return Response({
-            'curriculum': {
-                'id': curriculum.id,
-                'generated_content': generated_content,
-                'file_id': file_serializer.instance.id if file_serializer.is_valid() else None
-            }
-        }, status=status.HTTP_201_CREATED)
+        paginator = KeysetPagination()
+        curriculums = paginator.paginate_queryset(Curriculum.objects.filter(user=profile).select_related('user'), request)
+        serializer = CurriculumSerializer(curriculums, many=True)
+        logger.info("Successfully fetched curriculums")
+        return with_validators(Response({
+            'status': 'success',
+            'curriculums': serializer.data,
+            'next': paginator.get_next_link()
+        }, status=status.HTTP_200_OK), etag, last_modified)
 
     except Exception as e:
-        logger.error(f"Unexpected error generating standard curriculum: {str(e)}")
+        logger.error(f"Unexpected error fetching curriculums: {str(e)}")
         return Response({
             'status': 'error',
             'message': 'An unexpected error occurred',
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-@api_view(['GET'])
-def get_user_curriculums(request, uid):
-    logger.info(f"Received request for get_user_curriculums with uid: {uid}")
+@api_view(['POST'])
+def generate_lesson_plan(request):
+    logger.info("Received request for generate_lesson_plan")
+    logger.info(f"Request data: {request.data}")
+    return _handle_generation(request, 'lesson_plan')
+
+@api_view(['POST'])
+def generate_quiz_view(request):
+    logger.info("Received request for generate_quiz")
+    logger.info(f"Request data: {request.data}")
     try:
+        uid = request.data.get('uid')
+        if not uid:
+            logger.error("UID is required")
+            return Response({
+                'status': 'error',
+                'message': 'UID is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            profile = Profile.objects.get(uid=uid)
+            profile = cached_profile(uid, request)
         except Profile.DoesNotExist:
             logger.error("Profile not found")
             return Response({
@@ -293,16 +212,37 @@ def get_user_curriculums(request, uid):
                 'message': 'Profile not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        curriculums = Curriculum.objects.filter(user=profile)
-        serializer = CurriculumSerializer(curriculums, many=True)
-        logger.info("Successfully fetched curriculums")
+        params, error = extract_quiz_params(request.data)
+        if error:
+            logger.error(error)
+            return Response({
+                'status': 'error',
+                'message': error
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = generate_quiz(
+                profile,
+                params,
+                use_bank=request_flag(request.data, 'use_bank', default=True),
+                save=request_flag(request.data, 'save', default=True)
+            )
+        except QuizGenerationError as e:
+            logger.error(f"Quiz generation failed: {str(e)}")
+            return Response({
+                'status': 'error',
+                'message': 'Failed to generate quiz',
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        logger.info("Successfully generated quiz")
         return Response({
             'status': 'success',
-            'curriculums': serializer.data
-        }, status=status.HTTP_200_OK)
+            **result
+        }, status=status.HTTP_201_CREATED)
 
     except Exception as e:
-        logger.error(f"Unexpected error fetching curriculums: {str(e)}")
+        logger.error(f"Unexpected error generating quiz: {str(e)}")
         return Response({
             'status': 'error',
             'message': 'An unexpected error occurred',
@@ -310,9 +250,8 @@ def get_user_curriculums(request, uid):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
-def generate_lesson_plan(request):
-    logger.info("Received request for generate_lesson_plan")
-    logger.info(f"Request data: {request.data}")
+def generate_batch(request):
+    logger.info("Received request for generate_batch")
     try:
         uid = request.data.get('uid')
         if not uid:
@@ -323,7 +262,7 @@ def generate_lesson_plan(request):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            profile = Profile.objects.get(uid=uid)
+            profile = cached_profile(uid, request)
         except Profile.DoesNotExist:
             logger.error("Profile not found")
             return Response({
@@ -331,114 +270,64 @@ def generate_lesson_plan(request):
                 'message': 'Profile not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        subject = request.data.get('subject')
-        topics = request.data.get('topics')
-        grade_level = request.data.get('grade_level')
-        duration = request.data.get('duration', '1 hour')
-
-        if not all([subject, topics, grade_level]):
-            logger.error("Subject, topics, and grade level are required")
+        items = request.data.get('items')
+        max_items = getattr(settings, 'GENERATION_BATCH_MAX_ITEMS', 50)
+        if not isinstance(items, list) or not items:
+            logger.error("Items are required")
             return Response({
                 'status': 'error',
-                'message': 'Subject, topics, and grade level are required'
+                'message': 'A non-empty list of items is required'
             }, status=status.HTTP_400_BAD_REQUEST)
-
-        prompt = (
-            f"Generate a detailed lesson plan for a {grade_level} class focusing on the subject {subject}. "
-            f"Include the following topics: {topics}. The lesson should last approximately {duration}. "
-            f"Structure the lesson plan with the following sections:\n"
-            f"- Lesson Title\n"
-            f"- Subject Overview\n"
-            f"- Learning Objectives\n"
-            f"- Materials Needed\n"
-            f"- Lesson Procedure (with time allocations for each activity)\n"
-            f"- Assessments\n"
-            f"- Resources (e.g., books, websites, worksheets)\n"
-            f"Ensure the lesson plan is engaging, age-appropriate, and suitable for classroom use."
-        )
-
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert lesson plan designer."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7,
-            )
-            generated_content = response.choices[0].message.content.strip()
-        except AuthenticationError as e:
-            logger.error(f"OpenAI API Authentication error: {str(e)}")
-            generated_content = (
-                f"Lesson Title\n"
-                f"Lesson Plan for {subject} - {grade_level}\n\n"
-                f"Subject Overview\n"
-                f"{subject} introduces key concepts for {grade_level} students...\n\n"
-                f"Learning Objectives\n"
-                f"- Understand the basics of {topics}\n"
-                f"- Apply {topics} in classroom activities\n\n"
-                f"Materials Needed\n"
-                f"- Textbooks, worksheets, whiteboard\n\n"
-                f"Lesson Procedure\n"
-                f"0-10 min: Introduction to {subject}\n"
-                f"10-40 min: Interactive activity on {topics}\n"
-                f"40-60 min: Group discussion and wrap-up\n\n"
-                f"Assessments\n"
-                f"- Class participation\n"
-                f"- Short quiz on {topics}\n\n"
-                f"Resources\n"
-                f"- Book: '{subject} for Beginners'\n"
-                f"- Website: www.{subject.lower()}-education.com"
-            )
-            logger.warning("Using mock response due to OpenAI API key issue.")
-        except OpenAIError as e:
-            logger.error(f"OpenAI API error: {str(e)}")
+        if len(items) > max_items:
+            logger.error(f"Batch of {len(items)} items exceeds limit of {max_items}")
             return Response({
                 'status': 'error',
-                'message': 'Failed to generate lesson plan with OpenAI',
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                'message': f'A batch may contain at most {max_items} items'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        lesson_plan = LessonPlan.objects.create(
-            user=profile,
-            subject=subject,
-            topics=topics,
-            grade_level=grade_level,
-            duration=duration,
-            generated_content=generated_content,
-            lesson_type='custom'
-        )
+        # Validate every spec up front; only valid ones are sent to OpenAI
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            kind = item.get('kind') if isinstance(item, dict) else None
+            if kind not in GENERATORS:
+                results[index] = {'index': index, 'kind': kind, 'status': 'error',
+                                  'message': f"Kind must be one of: {', '.join(GENERATORS)}"}
+                continue
+            params = extract_params(kind, item)
+            if params is None:
+                results[index] = {'index': index, 'kind': kind, 'status': 'error',
+                                  'message': GENERATORS[kind]['required_message']}
+                continue
+            valid.append((index, kind, params))
 
-        # Save to File model for file manager
-        file_data = {
-            'user': profile.uid,
-            'name': f"{subject}_{grade_level}_lesson_plan.txt",
-            'title': f"Lesson Plan for {subject} - {grade_level}",
-            'author': profile.role,
-            'uploaded_by': profile.role,
-            'type': 'txt',
-            'content': generated_content,
-            'category': 'Lesson Plan',
-        }
-        file_serializer = FileSerializer(data=file_data)
-        if file_serializer.is_valid():
-            file_serializer.save()
-            logger.info("Successfully saved lesson plan to file manager")
-        else:
-            logger.error(f"Failed to save lesson plan to file manager: {file_serializer.errors}")
+        try:
+            concurrency = int(request.data.get('concurrency') or 0) or None
+        except (TypeError, ValueError):
+            concurrency = None
+
+        if valid:
+            batch_results = run_batch_generation(
+                profile,
+                [(kind, params) for _, kind, params in valid],
+                use_cache=cache_enabled(request.data),
+                concurrency=concurrency
+            )
+            for (index, _, _), result in zip(valid, batch_results):
+                result['index'] = index
+                results[index] = result
 
-        logger.info("Successfully generated lesson plan")
+        succeeded = sum(1 for result in results if result['status'] == 'success')
+        logger.info(f"Batch generation finished: {succeeded}/{len(results)} succeeded")
         return Response({
-            'lesson_plan': {
-                'id': lesson_plan.id,
-                'generated_content': generated_content,
-                'file_id': file_serializer.instance.id if file_serializer.is_valid() else None
-            }
-        }, status=status.HTTP_201_CREATED)
+            'status': 'success' if succeeded == len(results) else ('partial' if succeeded else 'error'),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Unexpected error generating lesson plan: {str(e)}")
+        logger.error(f"Unexpected error in batch generation: {str(e)}")
         return Response({
             'status': 'error',
             'message': 'An unexpected error occurred',
@@ -450,7 +339,7 @@ def get_user_lesson_plans(request, uid):
     logger.info(f"Received request for get_user_lesson_plans with uid: {uid}")
     try:
         try:
-            profile = Profile.objects.get(uid=uid)
+            profile = cached_profile(uid, request)
         except Profile.DoesNotExist:
             logger.error("Profile not found")
             return Response({
@@ -458,13 +347,24 @@ def get_user_lesson_plans(request, uid):
                 'message': 'Profile not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        lesson_plans = LessonPlan.objects.filter(user=profile)
+        etag, last_modified = response_validators(
+            request, [('lessonplan', profile.id)], watermark(LessonPlan.objects.filter(user=profile), 'updated_at'),
+            parts=[model_fingerprint(profile)]
+        )
+        unchanged = not_modified(request, etag, last_modified)
+        if unchanged is not None:
+            logger.info("Lesson plans not modified")
+            return unchanged
+
+        paginator = KeysetPagination()
+        lesson_plans = paginator.paginate_queryset(LessonPlan.objects.filter(user=profile).select_related('user'), request)
         serializer = LessonPlanSerializer(lesson_plans, many=True)
         logger.info("Successfully fetched lesson plans")
-        return Response({
+        return with_validators(Response({
             'status': 'success',
-            'lesson_plans': serializer.data
-        }, status=status.HTTP_200_OK)
+            'lesson_plans': serializer.data,
+            'next': paginator.get_next_link()
+        }, status=status.HTTP_200_OK), etag, last_modified)
 
     except Exception as e:
         logger.error(f"Unexpected error fetching lesson plans: {str(e)}")
@@ -478,13 +378,19 @@ def get_user_lesson_plans(request, uid):
 def get_profile(request, uid):
     logger.info(f"Received request for get_profile with uid: {uid}")
     try:
-        profile = Profile.objects.get(uid=uid)
+        profile = cached_profile(uid, request)
+        # Fingerprinted rather than versioned: the profile may come from a per-process cache
+        etag, _ = response_validators(request, parts=[model_fingerprint(profile)])
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            logger.info("Profile not modified")
+            return unchanged
         serializer = ProfileSerializer(profile)
         logger.info("Successfully fetched profile")
-        return Response({
+        return with_validators(Response({
             'status': 'success',
             'profile': serializer.data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK), etag)
     except Profile.DoesNotExist:
         logger.error("Profile not found")
         return Response({
@@ -500,7 +406,7 @@ def get_profile(request, uid):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
-@parser_classes([MultiPartParser, FormParser, JSONParser])
+@parser_classes([MultiPartParser, FormParser, FastJSONParser])
 def save_profile(request):
     logger.info(f"Received request for save_profile")
     logger.info(f"Request data (raw): {request.data}")
@@ -530,11 +436,11 @@ def save_profile(request):
         # Handle profile_image
         profile_image = data_dict.get('profile_image', '')
         if profile_image and isinstance(profile_image, str) and profile_image.startswith('data:image'):
-            format, imgstr = profile_image.split(';base64,')
-            ext = format.split('/')[-1]
-            filename = f'profile_{uid}.{ext}'
-            data = ContentFile(base64.b64decode(imgstr), name=filename)
-            data_dict['profile_image'] = data
+            try:
+                ext, decoded = decode_data_url(profile_image)
+            except UploadError as e:
+                return _upload_error(e)
+            data_dict['profile_image'] = DjangoFile(decoded, name=f'profile_{uid}.{ext}')
             logger.info("Processed base64 profile image")
         elif profile_image and isinstance(profile_image, str) and profile_image.startswith('/media/'):
             logger.info("Profile image is a URL, excluding from update")
@@ -548,30 +454,41 @@ def save_profile(request):
 
         logger.info(f"Sanitized data_dict: {data_dict}")
 
-        try:
-            profile = Profile.objects.get(uid=uid)
-            logger.info(f"Profile exists for UID {uid}, updating")
-            serializer = ProfileSerializer(profile, data=data_dict, partial=True)
-        except Profile.DoesNotExist:
-            logger.info(f"Profile does not exist for UID {uid}, creating")
-            serializer = ProfileSerializer(data=data_dict)
-
-        if serializer.is_valid():
-            try:
-                profile = serializer.save()
-                logger.info(f"Profile saved successfully for UID: {uid}")
-                return Response({
-                    'status': 'success',
-                    'message': 'Profile saved successfully',
-                    'profile': serializer.data
-                }, status=status.HTTP_200_OK)
-            except IntegrityError as e:
-                logger.error(f"Database integrity error: {str(e)}")
-                return Response({
-                    'status': 'error',
-                    'message': 'Database integrity error',
-                    'error': str(e)
-                }, status=status.HTTP_400_BAD_REQUEST)
+        # Write from a locked, freshly read row: the cached copy may be stale, and saving it
+        # would overwrite newer columns and clean up the wrong image files
+        with transaction.atomic():
+            profile = Profile.objects.select_for_update().filter(uid=uid).first()
+            if profile is not None:
+                logger.info(f"Profile exists for UID {uid}, updating")
+                serializer = ProfileSerializer(profile, data=data_dict, partial=True)
+            else:
+                logger.info(f"Profile does not exist for UID {uid}, creating")
+                serializer = ProfileSerializer(data=data_dict)
+
+            valid = serializer.is_valid()
+            if valid:
+                try:
+                    with transaction.atomic():
+                        profile = serializer.save()
+                except IntegrityError as e:
+                    logger.error(f"Database integrity error: {str(e)}")
+                    return Response({
+                        'status': 'error',
+                        'message': 'Database integrity error',
+                        'error': str(e)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+        if valid:
+            invalidate_profile(uid, request=request)
+            if 'profile_image' in data_dict:
+                # Thumbnails are made by run_generation_worker, not in this request
+                enqueue_profile_image(profile)
+            logger.info(f"Profile saved successfully for UID: {uid}")
+            return Response({
+                'status': 'success',
+                'message': 'Profile saved successfully',
+                'profile': serializer.data
+            }, status=status.HTTP_200_OK)
         else:
             logger.error(f"Validation errors: {serializer.errors}")
             return Response({
@@ -588,82 +505,90 @@ def save_profile(request):
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class QuizListCreateView(generics.ListCreateAPIView):
+class QuizPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+class QuizListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     logger.info("Initializing QuizListCreateView")
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = [AllowAny]
+    pagination_class = QuizPagination
+    version_scopes = [('quizzes',)]
 
     def get_queryset(self):
         logger.info("Fetching quiz queryset")
         uid = self.request.query_params.get('uid')
         if uid:
             try:
-                profile = Profile.objects.get(uid=uid)
-                return Quiz.objects.filter(user=profile)
+                profile = cached_profile(uid, self.request)
+                return Quiz.objects.filter(user=profile).prefetch_related('questions')
             except Profile.DoesNotExist:
                 return Quiz.objects.none()
-        return Quiz.objects.filter(user__isnull=True)
+        return Quiz.objects.filter(user__isnull=True).prefetch_related('questions')
 
     def perform_create(self, serializer):
         logger.info("Performing quiz creation")
         uid = self.request.data.get('uid')
         if uid:
             try:
-                profile = Profile.objects.get(uid=uid)
+                profile = cached_profile(uid, self.request)
                 serializer.save(user=profile)
             except Profile.DoesNotExist:
                 serializer.save()
         else:
             serializer.save()
 
-class QuizRetrieveUpdateView(generics.RetrieveUpdateAPIView):
+class QuizRetrieveUpdateView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     logger.info("Initializing QuizRetrieveUpdateView")
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = [AllowAny]
-    
+    version_scopes = [('quizzes',)]
+
     def get_queryset(self):
         logger.info("Fetching quiz queryset for retrieve/update")
         uid = self.request.query_params.get('uid')
         if uid:
             try:
-                profile = Profile.objects.get(uid=uid)
-                return Quiz.objects.filter(user=profile)
+                profile = cached_profile(uid, self.request)
+                return Quiz.objects.filter(user=profile).prefetch_related('questions')
             except Profile.DoesNotExist:
                 return Quiz.objects.none()
-        return Quiz.objects.filter(user__isnull=True)
+        return Quiz.objects.filter(user__isnull=True).prefetch_related('questions')
+
+class FilePagination(KeysetPagination):
+    ordering = ('-date', '-id')
 
-class FileListCreateView(generics.ListCreateAPIView):
+class FileListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     logger.info("Initializing FileListCreateView")
     queryset = File.objects.all()
     serializer_class = FileSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
+    pagination_class = FilePagination
+    version_scopes = [('files',)]
 
     def get_queryset(self):
         logger.info("Fetching file queryset")
-        uid = self.request.query_params.get('uid')
         user_role = self.request.query_params.get('user_role', 'Student')
-        filters = {}
-        for key in ['type', 'uploaded_by', 'course', 'department', 'semester', 'subject', 'class_name', 'category']:
-            value = self.request.query_params.get(key)
-            if value:
-                filters[f'{key}__iexact'] = value
-        date_range = self.request.query_params.get('date_range')
-        if date_range:
-            if date_range == '7days':
-                filters['date__gte'] = timezone.now().date() - timezone.timedelta(days=7)
-            elif date_range == '30days':
-                filters['date__gte'] = timezone.now().date() - timezone.timedelta(days=30)
-        if 'tag' in self.request.query_params:
-            filters['tags__contains'] = self.request.query_params.get('tag')
-
-        queryset = File.objects.filter(**filters)
-        # Apply permission-based filtering
-        if user_role == 'Admin':
-            return queryset
-        return queryset.filter(permissions__contains={user_role: {'read': True}})
+        queryset = filtered_files(self.request.query_params, user_role)
+        if self.is_summary():
+            # Never fetch content or the other heavy columns for the grid
+            queryset = queryset.select_related('user').only(
+                *[field for field in FILE_SUMMARY_FIELDS if field != 'user'], 'user__uid'
+            )
+        else:
+            queryset = queryset.select_related('user').prefetch_related(versions_prefetch(), 'share_links')
+        return queryset
+
+    def is_summary(self):
+        return self.request.method == 'GET' and self.request.query_params.get('view') == 'summary'
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return FileSummarySerializer
+        return FileSerializer
 
     def perform_create(self, serializer):
         logger.info("Performing file creation")
@@ -676,38 +601,17 @@ class FileListCreateView(generics.ListCreateAPIView):
                 'message': 'Permission denied: Only Admin and Teacher can upload files'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        tags = self.request.data.get('tags', '')
-        if isinstance(tags, str):
-            tags = [tag.strip() for tag in tags.split(',')] if tags else []
-
-        history_entry = {
-            'version': 1,
-            'date': timezone.now().date().isoformat(),
-            'changes': 'Initial upload',
-            'state': {
-                'name': self.request.data.get('name'),
-                'title': self.request.data.get('title'),
-                'type': self.request.data.get('name', '').split('.')[-1].lower(),
-                'content': self.request.data.get('content', f"Mock content for {self.request.data.get('name')}")
-            }
-        }
-
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': user_role,
-            'action': 'uploaded'
-        }
+        tags = parse_tags(self.request.data.get('tags', ''))
 
         if uid:
             try:
-                profile = Profile.objects.get(uid=uid)
+                profile = cached_profile(uid, self.request)
                 serializer.save(
                     user=profile,
                     uploaded_by=user_role,
                     author=user_role,
                     tags=tags,
-                    history=[history_entry],
-                    audit_logs=[audit_log],
+                    audit_user=user_role,
                     type=self.request.data.get('name', '').split('.')[-1].lower()
                 )
             except Profile.DoesNotExist:
@@ -721,16 +625,17 @@ class FileListCreateView(generics.ListCreateAPIView):
                 uploaded_by=user_role,
                 author=user_role,
                 tags=tags,
-                history=[history_entry],
-                audit_logs=[audit_log],
+                audit_user=user_role,
                 type=self.request.data.get('name', '').split('.')[-1].lower()
             )
 
-class FileRetrieveUpdateView(generics.RetrieveUpdateAPIView):
+class FileRetrieveUpdateView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     logger.info("Initializing FileRetrieveUpdateView")
     queryset = File.objects.all()
     serializer_class = FileSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    lookup_url_kwarg = 'file_id'
+    version_scopes = [('files',)]
 
     def get_queryset(self):
         logger.info("Fetching file queryset for retrieve/update")
@@ -738,16 +643,15 @@ class FileRetrieveUpdateView(generics.RetrieveUpdateAPIView):
         user_role = self.request.query_params.get('user_role', 'Student')
         if uid:
             try:
-                profile = Profile.objects.get(uid=uid)
+                profile = cached_profile(uid, self.request)
                 queryset = File.objects.filter(user=profile)
             except Profile.DoesNotExist:
                 queryset = File.objects.none()
         else:
             queryset = File.objects.all()
+        queryset = queryset.select_related('user').prefetch_related(versions_prefetch())
 
-        if user_role == 'Admin':
-            return queryset
-        return queryset.filter(permissions__contains={user_role: {'read': True}})
+        return readable_by(queryset, user_role)
 
     def perform_update(self, serializer):
         logger.info("Performing file update")
@@ -760,35 +664,10 @@ class FileRetrieveUpdateView(generics.RetrieveUpdateAPIView):
                 'message': 'Permission denied'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        # Update history
-        new_version = len(instance.history) + 1
-        history_entry = {
-            'version': new_version,
-            'date': timezone.now().date().isoformat(),
-            'changes': f'Updated to version {new_version}',
-            'state': {
-                'name': instance.name,
-                'title': instance.title,
-                'type': instance.type,
-                'content': instance.content
-            }
-        }
-        instance.history.append(history_entry)
-
-        # Update audit logs
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': user_role,
-            'action': 'edited'
-        }
-        instance.audit_logs.append(audit_log)
-
-        # Handle tags
-        tags = self.request.data.get('tags', instance.tags)
-        if isinstance(tags, str):
-            tags = [tag.strip() for tag in tags.split(',')] if tags else instance.tags
-
-        serializer.save(tags=tags, history=instance.history, audit_logs=instance.audit_logs)
+        # History is versioned by FileSerializer.update when tracked fields change
+        tags = parse_tags(self.request.data.get('tags', instance.tags), default=instance.tags)
+
+        serializer.save(tags=tags, audit_user=user_role)
 
 @api_view(['DELETE'])
 def delete_file(request, file_id):
@@ -803,15 +682,8 @@ def delete_file(request, file_id):
                 'message': 'Permission denied'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Log deletion in audit logs before deleting
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': user_role,
-            'action': 'deleted'
-        }
-        file.audit_logs.append(audit_log)
-        file.save()
-        
+        # Audit events are kept after the file is gone
+        log_event(file.id, user_role, 'deleted')
         file.delete()
         logger.info(f"Successfully deleted file with id: {file_id}")
         return Response({
@@ -847,16 +719,10 @@ def update_permissions(request, file_id):
         
         new_permissions = request.data.get('permissions', {})
         file.permissions = new_permissions
-        
-        # Update audit logs
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': user_role,
-            'action': 'updated permissions'
-        }
-        file.audit_logs.append(audit_log)
-        
-        file.save()
+        with transaction.atomic():
+            file.save(update_fields=['permissions'])
+            sync_permissions(file)
+            log_event(file.id, user_role, 'updated permissions')
         logger.info(f"Successfully updated permissions for file with id: {file_id}")
         return Response({
             'status': 'success',
@@ -898,14 +764,7 @@ def generate_share_link(request, file_id):
             created_by=user_role
         )
         
-        # Update audit logs
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': user_role,
-            'action': 'generated share link'
-        }
-        file.audit_logs.append(audit_log)
-        file.save()
+        log_event(file.id, user_role, 'generated share link')
         
         logger.info(f"Successfully generated share link for file with id: {file_id}")
         return Response({
@@ -950,14 +809,7 @@ def access_share_link(request, file_id, link_id):
                 'message': 'Share link has expired'
             }, status=status.HTTP_410_GONE)
 
-        # Update audit logs
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': user_role,
-            'action': f'accessed share link {link_id}'
-        }
-        file.audit_logs.append(audit_log)
-        file.save()
+        log_event(file.id, user_role, f'accessed share link {link_id}')
 
         serializer = FileSerializer(file)
         logger.info(f"Successfully accessed share link {link_id} for file with id: {file_id}")
@@ -980,6 +832,46 @@ def access_share_link(request, file_id, link_id):
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def get_file_version(request, file_id, version):
+    logger.info(f"Received request for version {version} of file with id: {file_id}")
+    try:
+        file = File.objects.only('id', 'permissions').get(id=file_id)
+        user_role = request.query_params.get('user_role', 'Student')
+        if user_role != 'Admin' and not file.permissions.get(user_role, {}).get('read', False):
+            logger.error("Permission denied for reading file version")
+            return Response({
+                'status': 'error',
+                'message': 'Permission denied'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        state = get_version_state(file.id, version)
+        if not state:
+            logger.error(f"Version {version} not found")
+            return Response({
+                'status': 'error',
+                'message': 'Version not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'status': 'success',
+            'version': version,
+            'state': state
+        }, status=status.HTTP_200_OK)
+    except File.DoesNotExist:
+        logger.error(f"File with id {file_id} not found")
+        return Response({
+            'status': 'error',
+            'message': 'File not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Unexpected error fetching file version: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
 def rollback_file(request, file_id):
     logger.info(f"Received request to rollback file with id: {file_id}")
@@ -1001,38 +893,28 @@ def rollback_file(request, file_id):
                 'message': 'Version is required'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        version_entry = next((entry for entry in file.history if entry['version'] == int(version)), None)
-        if not version_entry or not version_entry.get('state'):
+        try:
+            state = get_version_state(file.id, int(version))
+        except (TypeError, ValueError):
+            state = None
+        if not state:
             logger.error(f"Version {version} not found or invalid")
             return Response({
                 'status': 'error',
                 'message': 'Version not found or invalid'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        state = version_entry['state']
-        new_version = len(file.history) + 1
-        history_entry = {
-            'version': new_version,
-            'date': timezone.now().date().isoformat(),
-            'changes': f'Rolled back to version {version}',
-            'state': state
-        }
-        file.history.append(history_entry)
-
-        # Update audit logs
-        audit_log = {
-            'timestamp': timezone.now().isoformat(),
-            'user': user_role,
-            'action': 'rolled back'
-        }
-        file.audit_logs.append(audit_log)
-
-        # Update file fields
-        file.name = state.get('name', file.name)
-        file.title = state.get('title', file.title)
-        file.type = state.get('type', file.type)
-        file.content = state.get('content', file.content)
-        file.save()
+        # The new version, the restored fields and the audit row are kept or discarded together
+        with transaction.atomic():
+            record_version(file, state, f'Rolled back to version {version}')
+
+            # Update file fields
+            file.name = state.get('name', file.name)
+            file.title = state.get('title', file.title)
+            file.type = state.get('type', file.type)
+            file.content = state.get('content', file.content)
+            file.save(update_fields=['name', 'title', 'type', 'content'])
+            log_event(file.id, user_role, 'rolled back')
 
         serializer = FileSerializer(file)
         logger.info(f"Successfully rolled back file with id: {file_id} to version {version}")
@@ -1053,4 +935,263 @@ def rollback_file(request, file_id):
             'status': 'error',
             'message': 'An unexpected error occurred',
             'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def get_generation_job(request, job_id):
+    logger.info(f"Received request for get_generation_job with id: {job_id}")
+    try:
+        job = GenerationJob.objects.get(job_id=job_id)
+    except GenerationJob.DoesNotExist:
+        logger.error(f"Generation job {job_id} not found")
+        return Response({
+            'status': 'error',
+            'message': 'Job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = GenerationJobSerializer(job)
+    return Response({
+        'status': 'success',
+        'job': serializer.data
+    }, status=status.HTTP_200_OK)
+
+class AuditEventPagination(KeysetPagination):
+    ordering = ('-timestamp', '-id')
+
+class FileAuditEventListView(generics.ListAPIView):
+    logger.info("Initializing FileAuditEventListView")
+    serializer_class = AuditEventSerializer
+    pagination_class = AuditEventPagination
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        logger.info("Fetching audit event queryset")
+        file_id = self.kwargs['file_id']
+        user_role = self.request.query_params.get('user_role', 'Student')
+        if user_role != 'Admin':
+            # Deleted files keep their events, but only Admin can read those
+            permissions = File.objects.filter(id=file_id).values_list('permissions', flat=True).first()
+            if not permissions or not permissions.get(user_role, {}).get('read', False):
+                raise PermissionDenied('Permission denied')
+        return AuditEvent.objects.filter(file_id=file_id)
+
+@api_view(['GET'])
+def search_content(request):
+    logger.info(f"Received search request: {request.query_params.get('q')}")
+    try:
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            logger.error("Search query is required")
+            return Response({
+                'status': 'error',
+                'message': 'Search query is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        user_role = request.query_params.get('user_role', 'Student')
+        uid = request.query_params.get('uid')
+        try:
+            profile = cached_profile(uid, request) if uid else None
+        except Profile.DoesNotExist:
+            profile = None
+        kinds = [kind for kind in request.query_params.get('kind', '').split(',') if kind]
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            limit = 20
+
+        results = search(query, profile, user_role, kinds=kinds, limit=limit)
+        logger.info(f"Search for '{query}' returned {len(results)} result(s)")
+        return Response({
+            'status': 'success',
+            'query': query,
+            'results': results
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Unexpected error during search: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def get_file_tags(request):
+    logger.info("Received request for get_file_tags")
+    try:
+        user_role = request.query_params.get('user_role', 'Student')
+        files = readable_by(File.objects.all(), user_role)
+        tags = tag_counts(files)
+        logger.info(f"Returning {len(tags)} tag count(s) for role {user_role}")
+        return Response({
+            'status': 'success',
+            'tags': tags
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Unexpected error fetching tag counts: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def get_file_facets(request):
+    logger.info("Received request for get_file_facets")
+    try:
+        user_role = request.query_params.get('user_role', 'Student')
+        facets, cache_hit = file_facets(request.query_params, user_role)
+        logger.info(f"Returning file facets for role {user_role} (cached: {cache_hit})")
+        return Response({
+            'status': 'success',
+            'total': facets['total'],
+            'facets': facets['facets'],
+            'cached': cache_hit
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Unexpected error fetching file facets: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _upload_state(session):
+    return {
+        'upload_id': str(session.upload_id),
+        'filename': session.filename,
+        'size': session.size,
+        'offset': session.received,
+        'chunk_size': chunk_size(),
+        'status': session.status,
+    }
+
+def _upload_error(e):
+    logger.error(f"Upload error: {str(e)}")
+    body = {'status': 'error', 'message': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return Response(body, status=e.status)
+
+UPLOAD_METADATA_FIELDS = ['title', 'course', 'department', 'semester', 'subject', 'class_name', 'category',
+                          'permissions', 'content']
+
+@api_view(['POST'])
+def start_chunked_upload(request):
+    logger.info("Received request to start a chunked upload")
+    try:
+        user_role = request.data.get('user_role', 'Student')
+        if user_role not in ['Admin', 'Teacher']:
+            logger.error("Permission denied for file upload")
+            return Response({
+                'status': 'error',
+                'message': 'Permission denied: Only Admin and Teacher can upload files'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        profile = None
+        uid = request.data.get('uid')
+        if uid:
+            try:
+                profile = cached_profile(uid, request)
+            except Profile.DoesNotExist:
+                logger.error("Profile not found for UID")
+                return Response({
+                    'status': 'error',
+                    'message': 'Profile not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+
+        session = start_upload(profile, user_role, request.data.get('filename'), request.data.get('size'),
+                               request.data.get('sha256', ''))
+        return Response({
+            'status': 'success',
+            'upload': _upload_state(session)
+        }, status=status.HTTP_201_CREATED)
+    except UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        logger.error(f"Unexpected error starting upload: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+def chunked_upload_detail(request, upload_id):
+    """
+    GET returns the received offset to resume from, PUT appends the raw request
+    body at its Content-Range and DELETE aborts the upload.
+    """
+    try:
+        if request.method == 'GET':
+            try:
+                session = UploadSession.objects.get(upload_id=upload_id)
+            except UploadSession.DoesNotExist:
+                raise UploadError('Upload not found', status=404)
+        elif request.method == 'DELETE':
+            session = abort_upload(upload_id)
+            logger.info(f"Aborted upload {upload_id}")
+        else:
+            # Read the body straight from the socket; request.data would buffer the whole chunk
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+            start, length = parse_content_range(request.META.get('HTTP_CONTENT_RANGE'), length)
+            session = append_chunk(upload_id, request._request, start, length)
+        return Response({
+            'status': 'success',
+            'upload': _upload_state(session)
+        }, status=status.HTTP_200_OK)
+    except UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        logger.error(f"Unexpected error handling upload {upload_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+def complete_chunked_upload(request, upload_id):
+    logger.info(f"Received request to complete upload {upload_id}")
+    try:
+        session, assembled = finish_upload(upload_id)
+    except UploadError as e:
+        return _upload_error(e)
+
+    try:
+        role = session.user_role
+        data = {field: request.data[field] for field in UPLOAD_METADATA_FIELDS if field in request.data}
+        data.update(name=session.filename, uploaded_by=role, type=session.filename.split('.')[-1].lower(),
+                    file=assembled)
+        serializer = FileSerializer(data=data)
+        if not serializer.is_valid():
+            logger.error(f"Validation errors: {serializer.errors}")
+            return Response({
+                'status': 'error',
+                'message': 'File validation failed',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # The upload only becomes complete if the File is saved with it
+        with transaction.atomic():
+            claim_upload(session)
+            instance = serializer.save(user=session.user, author=role,
+                                       tags=parse_tags(request.data.get('tags', '')), audit_user=role)
+            mark_complete(session, instance)
+        logger.info(f"Upload {upload_id} stored as file {instance.id} (sha256 {session.sha256})")
+        return Response({
+            'status': 'success',
+            'sha256': session.sha256,
+            'file': FileSerializer(instance).data
+        }, status=status.HTTP_201_CREATED)
+    except UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        release_upload(session)
+        logger.error(f"Unexpected error completing upload {upload_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': 'An unexpected error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    finally:
+        assembled.close()
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # should be high up
+    'api.compression.CompressionMiddleware',  # before anything that reads or writes the body
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -111,11 +112,22 @@ TEMPLATES = [
 ]
 
 REST_FRAMEWORK = {
+    # orjson when installed (see requirements.txt), the standard library encoder otherwise
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# Text/JSON responses at least this many bytes are brotli (when installed, see requirements.txt) or gzip compressed
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_GZIP_LEVEL = 6
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 4
+
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
@@ -188,6 +200,13 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Who sends media bytes after api.media has checked access: '' streams from Django,
+# 'x-accel-redirect' hands off to nginx, 'x-sendfile' to Apache (mod_xsendfile) or lighttpd.
+# nginx needs an internal location mapping MEDIA_ACCEL_PREFIX onto MEDIA_ROOT:
+#   location /protected-media/ { internal; alias /path/to/backend/media/; }
+MEDIA_DELIVERY = os.environ.get('MEDIA_DELIVERY', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 # File Upload Settings
 FILE_UPLOAD_HANDLERS = [
     'django.core.files.uploadhandler.MemoryFileUploadHandler',
@@ -196,6 +215,12 @@ FILE_UPLOAD_HANDLERS = [
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 
+# Resumable uploads (/api/uploads/): chunks are streamed to this directory, not held in memory.
+# Keep it on the same filesystem as MEDIA_ROOT so finished files are moved rather than copied.
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'chunked_uploads')
+CHUNKED_UPLOAD_CHUNK_SIZE = 5242880  # 5MB per PUT
+CHUNKED_UPLOAD_MAX_SIZE = 1073741824  # 1GB per file
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -229,16 +254,96 @@ LOGGING = {
     },
 }
 
+# AI generation cache (seconds / rows)
+GENERATION_CACHE_TTL = 60 * 60 * 24 * 7
+GENERATION_CACHE_MAX_ENTRIES = 5000
+GENERATION_CACHE_EVICT_INTERVAL = 300  # evict expired/excess rows at most this often per process
+
+# Single-flight lock rows for identical in-flight generations (seconds)
+GENERATION_LOCK_TTL = 120
+GENERATION_LOCK_POLL_INTERVAL = 0.25
+
+# File history: store a full content snapshot every N versions, line deltas in between
+FILE_VERSION_SNAPSHOT_INTERVAL = 10
+
+# OpenAI client: connection pool, retry/backoff, latency deadline and circuit breaker.
+# OPENAI_BASE_URL can point at a local stub server for testing.
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None
+OPENAI_DEADLINE = 30.0
+OPENAI_MAX_RETRIES = 3
+OPENAI_BACKOFF_BASE = 0.5
+OPENAI_BACKOFF_MAX = 8.0
+OPENAI_POOL_MAX_CONNECTIONS = 20
+OPENAI_POOL_MAX_KEEPALIVE = 10
+OPENAI_POOL_KEEPALIVE_EXPIRY = 30.0
+OPENAI_BREAKER_THRESHOLD = 5
+OPENAI_BREAKER_COOLDOWN = 30.0
+
+# Batch generation: concurrent OpenAI calls per request and items per batch
+GENERATION_BATCH_CONCURRENCY = 4
+GENERATION_BATCH_MAX_ITEMS = 50
+
+# Shared cache (facet counts) and the uid -> Profile lookup cache. Redis when
+# REDIS_URL is set; otherwise a database table created by migration 0011, and a
+# per-process memory cache for profiles (a database cache would cost the query it saves).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+        'profiles': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'profiles',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'api_cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+        'profiles': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'profiles',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Profile lookups by uid (seconds). With the per-process cache, other workers
+# only see a profile change once this expires.
+PROFILE_CACHE_ALIAS = 'profiles'
+PROFILE_CACHE_TTL = 300 if os.environ.get('REDIS_URL') else 60
+
+# FileManager facet counts, cached per role and filter combination (seconds)
+FILE_FACETS_CACHE_TTL = 300
+
+# Server-side quiz generation: model, questions per quiz, concurrent OpenAI calls
+QUIZ_GENERATION_MODEL = 'gpt-4o-mini'
+QUIZ_MAX_QUESTIONS = 50
+QUIZ_GENERATION_CONCURRENCY = 4
+
+# Estimated text similarity (0-1) above which a new question is flagged as a near-duplicate
+QUESTION_DUPLICATE_THRESHOLD = 0.8
+
+# Keyset pagination for list endpoints (?page_size= is capped at API_MAX_PAGE_SIZE)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+# Profile image variants (longest side in pixels) made by run_generation_worker, and their JPEG/WebP quality
+PROFILE_IMAGE_VARIANTS = {'thumbnail': 128, 'medium': 512}
+PROFILE_IMAGE_QUALITY = 82
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-import firebase_admin
-from firebase_admin import credentials, db
-import os
 
-cred = credentials.Certificate(os.path.join(BASE_DIR, 'backend/firebase_config.json'))
+# Firebase Admin SDK, initialized on first use by firebase_config.get_app()
+FIREBASE_CREDENTIALS = os.path.join(BASE_DIR, 'backend/firebase_config.json')
+FIREBASE_DATABASE_URL = 'smart-teacher-planner-bfe1f-default-rtdb.firebaseio.com/'  # 🔁 Replace with your actual URL
 
-firebase_admin.initialize_app(cred, {
-    'databaseURL': 'smart-teacher-planner-bfe1f-default-rtdb.firebaseio.com/'  # 🔁 Replace with your actual URL
-})
+# Import-time budget for a worker cold start, checked by `manage.py startup_profile`
+STARTUP_IMPORT_BUDGET_MS = 750
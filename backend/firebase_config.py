@@ -1,13 +1,35 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
+from django.conf import settings
 
-# Full path to your Firebase Admin SDK key file
-cred = credentials.Certificate(
-    "C:/Users/Sohaib Hassan Raja/smart-teacher-planner-bfe1f-firebase-adminsdk-fbsvc-b71b218e33/firebase-adminsdk.json"
-)
+# The Admin SDK is imported and initialized on first use rather than at startup,
+# so workers that never touch Firebase don't pay for it when booting.
+_app = None
+_lock = threading.Lock()
 
-# Initialize Firebase
-firebase_admin.initialize_app(cred)
 
-# Get Firestore client
-db = firestore.client()
+def get_app():
+    """Return the default Firebase app, initializing it from FIREBASE_CREDENTIALS on first use."""
+    global _app
+    if _app is None:
+        with _lock:
+            if _app is None:
+                import firebase_admin
+                from firebase_admin import credentials
+
+                cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS)
+                _app = firebase_admin.initialize_app(cred, {
+                    'databaseURL': settings.FIREBASE_DATABASE_URL
+                })
+    return _app
+
+
+def get_firestore():
+    """Firestore client for the default app."""
+    from firebase_admin import firestore
+    return firestore.client(get_app())
+
+
+def get_database_reference(path='/'):
+    """Realtime Database reference for the default app."""
+    from firebase_admin import db
+    return db.reference(path, app=get_app())
@@ -18,20 +18,28 @@ function CurriculumDisplay() {
           return;
         }
 
-        const response = await fetch(`/api/get-user-curriculums/${currentUser.uid}/`, {
-          credentials: 'include'
-        });
+        // The list is paginated: follow `next` until every page is loaded
+        const loaded = [];
+        let url = `/api/get-user-curriculums/${currentUser.uid}/`;
+        while (url) {
+          const response = await fetch(url, {
+            credentials: 'include'
+          });
 
-        if (!response.ok) {
-          throw new Error('Failed to fetch curriculums');
-        }
+          if (!response.ok) {
+            throw new Error('Failed to fetch curriculums');
+          }
 
-        const data = await response.json();
-        if (data.status === 'success') {
-          setCurriculums(data.curriculums);
-        } else {
-          throw new Error(data.message || 'Failed to fetch curriculums');
+          const data = await response.json();
+          if (data.status !== 'success') {
+            throw new Error(data.message || 'Failed to fetch curriculums');
+          }
+          loaded.push(...data.curriculums);
+          // `next` is absolute; keep requests on this origin (and its dev proxy)
+          const next = data.next ? new URL(data.next) : null;
+          url = next ? next.pathname + next.search : null;
         }
+        setCurriculums(loaded);
       } catch (err) {
         setError(err.message);
       } finally {
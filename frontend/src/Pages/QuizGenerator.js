@@ -1,7 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { jsPDF } from 'jspdf';
 import { FaBook } from 'react-icons/fa';
-import OpenAI from 'openai';
 import axios from 'axios';
 import SubjectTemplates from '../components/SubjectTemplates';
 
@@ -28,8 +27,6 @@ const QuizGenerator = () => {
   const [editingQuiz, setEditingQuiz] = useState(null);
   const [userUid, setUserUid] = useState(null);
   const [authToken, setAuthToken] = useState(null);
-  const [openai, setOpenai] = useState(null);
-  const [openAIError, setOpenAIError] = useState(null);
   const [selectedTemplate, setSelectedTemplate] = useState(null);
 
   // Image paths for subject templates (replace with actual paths)
@@ -54,23 +51,6 @@ const QuizGenerator = () => {
 
   console.log('API_BASE_URL:', API_BASE_URL);
 
-  useEffect(() => {
-    console.log('REACT_APP_OPENAI_API_KEY:', process.env.REACT_APP_OPENAI_API_KEY);
-    try {
-      if (process.env.REACT_APP_OPENAI_API_KEY) {
-        const client = new OpenAI({
-          apiKey: process.env.REACT_APP_OPENAI_API_KEY,
-          dangerouslyAllowBrowser: true,
-        });
-        setOpenai(client);
-      } else {
-        setOpenAIError('OpenAI API key is missing. AI-generated questions are disabled.');
-      }
-    } catch (err) {
-      setOpenAIError(`Failed to initialize OpenAI: ${err.message}`);
-    }
-  }, []);
-
   useEffect(() => {
     const uid = localStorage.getItem('userUid') || null;
     const token = localStorage.getItem('authToken') || null;
@@ -80,11 +60,18 @@ const QuizGenerator = () => {
     const fetchQuizzes = async () => {
       try {
         console.log('Fetching quizzes from:', '/api/quizzes/');
-        const response = await axios.get('/api/quizzes/', {
+        let response = await axios.get('/api/quizzes/', {
           params: { uid: uid || '' },
         });
         console.log('Fetch quizzes response:', response.status, response.data);
-        setSavedQuizzes(response.data);
+        const quizzes = [...response.data.results];
+        // The list is paginated: follow `next` (same origin) until every page is loaded
+        while (response.data.next) {
+          const next = new URL(response.data.next);
+          response = await axios.get(next.pathname + next.search);
+          quizzes.push(...response.data.results);
+        }
+        setSavedQuizzes(quizzes);
       } catch (err) {
         console.error('Failed to fetch quizzes:', err.response?.status, err.response?.data, err.message);
         setError('Failed to load quizzes. Using local storage.');
@@ -170,6 +157,8 @@ const QuizGenerator = () => {
           options: q.options,
           correct_answer: q.correctAnswer,
           explanation: q.explanation,
+          // Marks question-bank reuse, which the server keeps out of duplicate detection
+          bank_question: q.bank_question,
         })),
       };
       if (userUid) {
@@ -255,37 +244,31 @@ const QuizGenerator = () => {
   };
 
   const generateAIQuestions = async () => {
-    if (!openai) {
-      setError(openAIError || 'OpenAI client is not initialized.');
-      return;
-    }
     setIsGenerating(true);
     setError('');
     try {
-      const prompt = mode === 'quiz'
-        ? `Generate a quiz with ${aiInputs.questionCount} questions for ${aiInputs.grade} students on ${aiInputs.subject} about ${aiInputs.topic} at ${aiInputs.difficulty} difficulty (Easy: recall, Medium: application, Hard: analysis). Include ${aiInputs.questionTypes.join(', ')}. For Multiple Choice, provide 4 options with 1 correct answer. For True/False, provide 2 options. For Short Answer, provide a concise correct answer. For each question, include a 1-2 sentence explanation justifying the correct answer. Output in JSON format with fields: text (question text), type (mcq, truefalse, shortanswer), options (array, empty for shortanswer), correctAnswer (string), explanation (string).`
-        : `Generate an assessment with ${aiInputs.questionCount} questions for ${aiInputs.grade} students on ${aiInputs.subject} about ${aiInputs.topic} at ${aiInputs.difficulty} difficulty (Easy: recall, Medium: application, Hard: analysis). Include Short Answer and Essay questions (open-ended, problem-solving, or analytical tasks aligned with Bloom’s Taxonomy: knowledge, comprehension, analysis, evaluation). Do not include Multiple Choice or True/False. Provide a suggested answer for each question and a 1-2 sentence explanation justifying the answer. Output in JSON format with fields: text (question text), type (shortanswer, essay), options (empty array), correctAnswer (string), explanation (string).`;
-
-      const response = await openai.chat.completions.create({
-        model: 'gpt-4o-mini',
-        messages: [{ role: 'user', content: prompt }],
-        response_format: { type: 'json_object' },
+      // Generated server-side from the shared question bank; saved only once reviewed
+      const response = await axios.post('/api/generate-quiz/', {
+        uid: userUid,
+        mode,
+        topic: aiInputs.topic,
+        subject: aiInputs.subject,
+        grade: aiInputs.grade,
+        question_count: aiInputs.questionCount,
+        question_types: aiInputs.questionTypes,
+        difficulty: aiInputs.difficulty,
+        save: false,
       });
-
-      let generated = JSON.parse(response.choices[0].message.content);
-      if (!Array.isArray(generated)) {
-        generated = generated.questions || [];
-      }
       setGeneratedQuestions(
-        generated.map((q) => ({
+        response.data.quiz.questions.map((q) => ({
           ...q,
           id: Date.now() + Math.random(),
-          correctAnswer: q.correctAnswer || q.correct_answer,
+          correctAnswer: q.correct_answer,
         }))
       );
       setStep(5);
     } catch (err) {
-      setError('Failed to generate questions: ' + err.message);
+      setError('Failed to generate questions: ' + (err.response?.data?.message || err.message));
     } finally {
       setIsGenerating(false);
     }
@@ -328,11 +311,15 @@ const QuizGenerator = () => {
         mode: editingQuiz.mode,
         difficulty: editingQuiz.difficulty,
         questions: editingQuiz.questions.map((q) => ({
+          // Stored questions keep their id so the server updates them in place;
+          // locally added ones (no id, or a random placeholder) are created
+          ...(Number.isInteger(q.id) ? { id: q.id } : {}),
           text: q.text,
           type: q.type,
           options: q.options,
           correct_answer: q.correctAnswer,
           explanation: q.explanation,
+          bank_question: q.bank_question,
         })),
       };
       if (userUid) {
@@ -414,12 +401,6 @@ const QuizGenerator = () => {
           {mode === 'quiz' ? 'Create Your Quiz' : 'Design Your Assessment'}
         </h2>
 
-        {openAIError && (
-          <div className="bg-yellow-100 text-yellow-800 p-4 rounded-lg shadow-md mb-8 mx-auto max-w-2xl">
-            {openAIError} Manual creation and templates are still available.
-          </div>
-        )}
-
         {/* Subject Templates Section */}
         <div className="bg-white p-8 rounded-xl shadow-lg mb-8">
           <h3 className="text-2xl font-semibold text-indigo-700 mb-6">
@@ -824,7 +805,7 @@ const QuizGenerator = () => {
               {step === 4 && (
                 <button
                   onClick={generateAIQuestions}
-                  disabled={isGenerating || aiInputs.questionTypes.length === 0 || !openai}
+                  disabled={isGenerating || aiInputs.questionTypes.length === 0}
                   className="bg-indigo-600 text-white px-4 py-2 rounded-lg shadow-md hover:bg-indigo-700 disabled:bg-gray-400 transition"
                 >
                   {isGenerating ? 'Generating...' : 'Generate Questions'}
@@ -130,6 +130,14 @@ const Profile = () => {
         }
     };
 
+    // Small resized avatar once the backend has made it; a freshly picked image is shown as-is
+    const avatarUrl = (profile) => {
+        const image = profile.profile_image || "";
+        if (image.startsWith("data:")) return image;
+        const variants = profile.profile_image_variants || {};
+        return variants.thumbnail_webp || variants.thumbnail || image;
+    };
+
     const handleCancel = () => {
         setProfileData(originalProfileData);
         setIsEditing(false);
@@ -151,6 +159,7 @@ const Profile = () => {
             // Prepare the data
             const formData = new FormData();
             Object.keys(profileData).forEach(key => {
+                if (key === 'profile_image_variants') return; // Read-only, made by the backend
                 if (profileData[key] !== null && profileData[key] !== undefined) {
                     formData.append(key, profileData[key]);
                 }
@@ -237,7 +246,7 @@ const Profile = () => {
                 </div>
                 <div className="relative">
                     <button onClick={() => setDropdownOpen(!dropdownOpen)} className="flex items-center">
-                        <img className="h-8 w-8 rounded-full" src={profileData.profileImage || "https://ui-avatars.com/api/?name=User&background=random"} alt="Profile" />
+                        <img className="h-8 w-8 rounded-full" src={avatarUrl(profileData) || "https://ui-avatars.com/api/?name=User&background=random"} alt="Profile" />
                     </button>
                     {dropdownOpen && (
                         <div className="absolute right-0 mt-2 w-48 bg-white rounded-md shadow-lg py-2">
@@ -273,7 +282,7 @@ const Profile = () => {
                     <div className="flex flex-col items-center absolute -top-20 left-1/2 transform -translate-x-1/2">
                         <label htmlFor="imageUpload" className={`relative cursor-pointer ${!isEditing ? "opacity-50 cursor-not-allowed" : ""}`}>
                             {profileData.profile_image ? (
-                                <img className="h-28 w-28 rounded-full border-4 border-indigo-300 shadow-md" src={profileData.profile_image} alt="Profile" />
+                                <img className="h-28 w-28 rounded-full border-4 border-indigo-300 shadow-md" src={avatarUrl(profileData)} alt="Profile" />
                             ) : (
                                 <div className="h-28 w-28 flex items-center justify-center rounded-full border-4 border-indigo-300 bg-indigo-100 shadow-md">
                                     <FaCamera className="text-indigo-400 text-4xl" />